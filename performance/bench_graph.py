@@ -0,0 +1,98 @@
+import sys, os
+import time
+import tempfile
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+from sim_model import io_sim
+ENT_TYPE = sim.ENT_TYPE
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None # Python 2 and IronPython
+
+# the model to load
+filepath = sys.argv[1] if len(sys.argv) > 1 else '../tests/hdb_generated_model_greenglen.sim'
+
+# start
+if tracemalloc: tracemalloc.start()
+t0 = time.time()
+
+# load the model
+sm = sim.SIM()
+io_sim.import_sim_file(sm, filepath)
+t1 = time.time()
+
+# memory
+if tracemalloc:
+    mem, _ = tracemalloc.get_traced_memory()
+    print("Memory (MB) = ", round(mem / 1024.0 / 1024.0, 2))
+    tracemalloc.stop()
+
+# navigate from every pgon down to posis, and from every posi up to pgons
+pgons = sm.get_ents(ENT_TYPE.PGON)
+posis = sm.get_ents(ENT_TYPE.POSI)
+t2 = time.time()
+for pgon in pgons:
+    sm.get_ents(ENT_TYPE.POSI, pgon)
+for posi in posis:
+    sm.get_ents(ENT_TYPE.PGON, posi)
+t3 = time.time()
+# navigate from all pgons and from all posis, in bulk
+sm.get_ents(ENT_TYPE.POSI, pgons)
+sm.get_ents(ENT_TYPE.PGON, posis)
+t3_bulk = time.time()
+
+# export
+io_sim.export_sim_data(sm)
+t4 = time.time()
+
+# freeze, then navigate again
+sm.graph.freeze()
+t5 = time.time()
+for pgon in pgons:
+    sm.get_ents(ENT_TYPE.POSI, pgon)
+for posi in posis:
+    sm.get_ents(ENT_TYPE.PGON, posi)
+t6 = time.time()
+sm.graph.thaw()
+t7 = time.time()
+
+# calc times
+print("Import time = ", t1 - t0)
+print("Nav time = ", t3 - t2)
+print("Bulk nav time = ", t3_bulk - t3)
+print("Export time = ", t4 - t3_bulk)
+print("Freeze time = ", t5 - t4)
+print("Frozen nav time = ", t6 - t5)
+print("Thaw time = ", t7 - t6)
+
+# memory of the frozen model
+if tracemalloc:
+    tracemalloc.start()
+    sm = sim.SIM()
+    io_sim.import_sim_file(sm, filepath)
+    sm.graph.freeze()
+    mem, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("Frozen memory (MB) = ", round(mem / 1024.0 / 1024.0, 2))
+
+# save and load the graph
+graph_filepath = os.path.join(tempfile.gettempdir(), 'bench_graph.simgraph')
+t8 = time.time()
+sm.graph.save(graph_filepath)
+t9 = time.time()
+print("Save time = ", t9 - t8, ", file size (MB) = ", 
+    round(os.path.getsize(graph_filepath) / 1024.0 / 1024.0, 2))
+for use_mmap in [False, True]:
+    if tracemalloc: tracemalloc.start()
+    t10 = time.time()
+    sm = sim.SIM()
+    sm.graph.load(graph_filepath, use_mmap)
+    t11 = time.time()
+    print("Load time (mmap = " + str(use_mmap) + ") = ", t11 - t10)
+    if tracemalloc:
+        mem, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("Loaded memory (MB) = ", round(mem / 1024.0 / 1024.0, 2))
+    del sm
+os.remove(graph_filepath)
@@ -0,0 +1,60 @@
+import sys, os
+import time
+import threading
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+from sim_model import io_sim
+ENT_TYPE = sim.ENT_TYPE
+
+# the model to load
+filepath = sys.argv[1] if len(sys.argv) > 1 else '../tests/hdb_generated_model_greenglen.sim'
+# the number of seconds to run each test
+duration = 2.0
+
+# load the model
+sm = sim.SIM()
+io_sim.import_sim_file(sm, filepath)
+sm.set_concurrent(True)
+pgons = sm.get_ents(ENT_TYPE.PGON)
+posis = sm.get_ents(ENT_TYPE.POSI)
+
+def read(view, counts, i, stop):
+    # navigate from pgons down to posis, and get the coords, until stopped
+    num_reads = 0
+    while not stop.is_set():
+        for pgon in pgons[num_reads % len(pgons):][:100]:
+            for posi in view.get_ents(ENT_TYPE.POSI, pgon):
+                view.get_posi_coords(posi)
+        num_reads += 100
+    counts[i] = num_reads
+
+def write(stop):
+    # move posis, until stopped
+    num_writes = 0
+    while not stop.is_set():
+        posi = posis[num_writes % len(posis)]
+        xyz = sm.get_posi_coords(posi)
+        sm.set_posi_coords(posi, [xyz[0], xyz[1], xyz[2] + 1])
+        num_writes += 1
+
+# read with 1, 4 and 16 threads, each thread with its own view, while one thread writes
+for num_threads in [1, 4, 16]:
+    for with_writer in [False, True]:
+        stop = threading.Event()
+        counts = [0] * num_threads
+        views = [sm.new_view() for _ in range(num_threads)]
+        threads = [threading.Thread(target = read, args = (views[i], counts, i, stop))
+            for i in range(num_threads)]
+        if with_writer:
+            threads.append(threading.Thread(target = write, args = (stop,)))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        for view in views:
+            sm.release_view(view)
+        print("Read throughput (" + str(num_threads) + " threads" +
+            (", 1 writer" if with_writer else "") + ") = ",
+            round(sum(counts) / duration), "pgons/s")
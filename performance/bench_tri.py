@@ -0,0 +1,38 @@
+import sys, os
+import math
+import time
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+ENT_TYPE = sim.ENT_TYPE
+
+# the number of facades to triangulate
+num_pgons = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+def gen_model():
+    # facades with a boundary of 12 posis and a window hole of 4 posis
+    sm = sim.SIM()
+    boundaries = []
+    holes = []
+    for i in range(num_pgons):
+        x = (i % 1000) * 20.0
+        y = (i // 1000) * 20.0
+        boundary = [[x + 10 * math.cos(a * math.pi / 6), y, 5 + 5 * math.sin(a * math.pi / 6)]
+            for a in range(12)]
+        hole = [[x - 2, y, 4], [x - 2, y, 6], [x + 2, y, 6], [x + 2, y, 4]]
+        posis = sm.add_posis(boundary + hole)
+        boundaries.append(posis[:12])
+        holes.append([posis[12:]])
+    sm.add_pgons(boundaries, holes)
+    return sm
+
+if __name__ == '__main__':
+    sm = gen_model()
+    pgons = sm.get_ents(ENT_TYPE.PGON)
+    # triangulate all the pgons with 1, 2, 4 and 8 workers
+    # the pgons are moved first, to clear the cached triangles
+    for workers in [1, 2, 4, 8]:
+        sm.move(pgons, [0, 0, 1])
+        start = time.time()
+        sm.triangulate_pgons(workers = workers)
+        print("Triangulate " + str(num_pgons) + " pgons (" + str(workers) + " workers) = ",
+            round(time.time() - start, 2), "s")
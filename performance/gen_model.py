@@ -3,15 +3,16 @@ import random
 import time
 sys.path.insert(0, os.path.abspath('..'))
 from sim_model import sim
+from sim_model import io_sim
 ENT_TYPE = sim.ENT_TYPE
 DATA_TYPE = sim.DATA_TYPE
 
 # start
 t0 = time.time()
 
-# position with random XYZ coords
-def rand_posi():
-    return sm.add_posi([random.random(), random.random(), random.random()])
+# random XYZ coords
+def rand_coords(num_posis):
+    return [[random.random(), random.random(), random.random()] for _ in range(num_posis)]
 
 # create a graph
 sm = sim.SIM()
@@ -20,31 +21,29 @@ sm = sim.SIM()
 coll = sm.add_coll()
 
 # create 10000 points
-for i in range(10000):
-    point = sm.add_point(rand_posi())
+for posi in sm.add_posis(rand_coords(10000)):
+    point = sm.add_point(posi)
     if random.random() > 0.1:
         sm.add_coll_ent(coll, point)
 
-# create 10000 plines
-for i in range(10000):
-    posis = []
-    for j in range(random.randint(2, 30)):
-        posis.append(rand_posi())
-    pline = sm.add_pline(posis, True)
+# create 10000 plines, the posis are a flat list, with the offset of each pline
+nums_posis = [random.randint(2, 30) for i in range(10000)]
+posis = sm.add_posis(rand_coords(sum(nums_posis)))
+offsets = [0]
+for num_posis in nums_posis[:-1]:
+    offsets.append(offsets[-1] + num_posis)
+for pline in sm.add_plines(posis, True, offsets):
     if random.random() > 0.1:
         sm.add_coll_ent(coll, pline)
 
-# create 10000 pgons
-for i in range(10000):
-    posis = []
-    for j in range(random.randint(3, 30)):
-        posis.append(rand_posi())
-    pgon = sm.add_pgon(posis)
+# create 10000 pgons, the posis are a list of lists, one for each pgon
+boundaries = [sm.add_posis(rand_coords(random.randint(3, 30))) for i in range(10000)]
+for pgon in sm.add_pgons(boundaries):
     if random.random() > 0.1:
         sm.add_coll_ent(coll, pgon)
 
 # write to str
-json = sm.export_sim()
+json = io_sim.export_sim(sm)
 # with open("test.sim", "w") as f:
 #     f.write(json)
 
@@ -2,13 +2,61 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 # from __future__ import unicode_literals
+import os
+import sys
+import json
+import mmap
+import atexit
+import shutil
+import struct
+import tempfile
+import weakref
+import threading
+from array import array
 from collections import OrderedDict
-import copy
+from functools import partial, wraps
+from itertools import chain, islice, repeat
+try:
+    from itertools import accumulate as _accumulate
+except ImportError:
+    _accumulate = None # Python 2 and IronPython
+try:
+    from itertools import imap as _map # Python 2 and IronPython
+except ImportError:
+    _map = map
+# from python 3.7, dicts maintain insertion order
+_odict = dict if sys.version_info >= (3, 7) else OrderedDict
+# rows of edges with up to this number of nodes are stored as lists, larger rows are stored as dicts
+_ROW_LIST_MAX = 16
+# the typecode for arrays of node ids in frozen edges, at least 32 bits
+_ID_TYPECODE = 'i' if array('i').itemsize >= 4 else 'l'
+# frozen rows use dense offsets if at least one in this number of nodes has a row
+_CSR_SPARSE_RATIO = 16
+# the value of the numbers in the rows of tables that are not set
+_NAN = float('nan')
+# the number of rows in each page of a table, pages are copied on write by snapshots
+_TABLE_PAGE_ROWS = 1024
+# marks that no default value was given for a node property
+_NO_DEFAULT = object()
+_EMPTY_COL = {}
+# --------------------------------------------------------------------------------------------------
+if _accumulate is None:
+    def _accumulate(values):
+        """
+        Get the running totals of a list of numbers, the same as itertools.accumulate().
+        """
+        totals = list(values)
+        for i in range(1, len(totals)):
+            totals[i] += totals[i - 1]
+        return totals
 # ==================================================================================================
 # GRAPH CLASS
 # ==================================================================================================
 class Graph(object):
-    # the graph is created using a sigle dict of nodes and multiple dicts of edges
+    # the graph is created using a sigle table of nodes and multiple dicts of edges
+    # 
+    # node names are interned, each node is given a dense integer id
+    # all edges are stored using these integer ids, not the node names
     # 
     # for each edge type, there are two dicts, forward and reverse
     FWD = 0
@@ -17,32 +65,122 @@ class Graph(object):
     # CONSTRUCTOR
     # ==============================================================================================
     def __init__(self):
-        # nodes
-        self._nodes = OrderedDict() # key is node name, value is dict of properties
+        # nodes, the index in the lists is the node id
+        self._node_ids = dict() # key is node name, value is node id
+        self._node_names = [] # list of node names
+        # node properties, stored in columns, one column per property
+        # key is the property name, value is a dict, key is node id, value is the property value
+        self._node_props = OrderedDict()
         # edge_types, key is edge_type, value is boolean
         self._edges_reversed = dict() 
         # edges, nested dictionaries four levels deep
         # first level is the snapshot dict, key is the ssid, value is an OrderedDict
         # second level for each ssid, key is the edge_type, value is an dict
-        # third level for each edge type, key is FWD or REV, value is OrderedDict
-        # fourth level, for each edge_type, key is a start node, value is a list of end nodes
+        # third level for each edge type, key is FWD or REV, value is an ordered dict
+        # fourth level, for each edge_type, key is a start node id, value is a row of end node ids
+        # 
+        # a row is an ordered set of node ids
+        # small rows are lists, large rows are dicts with the value set to None
+        # 
+        # the edges of each edge type are copy-on-write, see _Edges
+        # in a frozen snapshot, the edges are compressed sparse rows, see _FrozenEdges
         self._edges = dict()
         # init snapshot 0
         self._edges[0] = OrderedDict() #TODO does this need to be ordered?
         self._curr_ssid = 0
+        self._next_ssid = 1
+        # the ssids of frozen snapshots, see freeze()
+        self._frozen = set()
+        # the ssids of all snapshots, the most recently used last
+        self._ss_used = OrderedDict([(0, None)])
+        # the snapshot retention policy, see set_snapshot_policy()
+        self._ss_policy = None
+        # the maximum number of snapshots in memory, see set_spill_policy()
+        self._spill_max = None
+        # the folder for the files of spilled snapshots, created when first needed
+        self._spill_dirpath = None
+        # the ssids of snapshots pinned by views, see new_view()
+        self._pinned = set()
+        # the lock used in concurrent mode, see set_concurrent()
+        self._lock = None
+        # the journal of changes, see start_journal()
+        self._journal = None
+        # counters, key is the counter name, value is the next value, see reserve_ids()
+        self._counters = dict()
+        # tables, key is the table name, value is a tuple with the width and typecode
+        self._table_types = OrderedDict()
+        # tables, key is the ssid, value is a dict, key is the table name, value is a _Table
+        self._tables = dict()
+        self._tables[0] = dict()
     # ==============================================================================================
     # METHODS
     # ==============================================================================================
     def add_node(self, node):
         """
-        Add a node to the graph. Throws an error if the node already exists.
+        Add a node to the graph. Throws an error if the node already exists, or if the active
+        snapshot is frozen.
 
         :param node: (str) The name of the node.
-        :return: No value.
+        :return: (int) The id of the new node.
+        """
+        if node in self._node_ids:
+            raise Exception('Node already exists.')
+        if self._curr_ssid in self._frozen:
+            raise Exception('Snapshot is frozen.')
+        node_id = len(self._node_names)
+        self._node_ids[node] = node_id
+        self._node_names.append(node)
+        if self._journal is not None:
+            self._journal.add_node(node)
+        return node_id
+    # ----------------------------------------------------------------------------------------------
+    def add_nodes(self, nodes, props = None):
         """
-        if node in self._nodes:
+        Add multiple nodes to the graph in one step, optionally with the same properties for every
+        node. Throws an error if any of the nodes already exists, or if the active snapshot is frozen.
+
+        :param nodes: (str[]) A list of node names.
+        :param props: (dict) A dict of property names and values, or None.
+        :return: (int[]) The ids of the new nodes.
+        """
+        nodes = list(nodes)
+        node_ids = self._node_ids
+        if len(set(nodes)) != len(nodes) or any(map(node_ids.__contains__, nodes)):
             raise Exception('Node already exists.')
-        self._nodes[node] = dict()
+        if self._curr_ssid in self._frozen:
+            raise Exception('Snapshot is frozen.')
+        start = len(self._node_names)
+        new_ids = list(range(start, start + len(nodes)))
+        node_ids.update(zip(nodes, new_ids))
+        self._node_names.extend(nodes)
+        if props:
+            for prop_name, prop_value in props.items():
+                self._get_prop_col(prop_name).update(dict.fromkeys(new_ids, prop_value))
+        if self._journal is not None:
+            self._journal.add_nodes(nodes, props)
+        return new_ids
+    # ----------------------------------------------------------------------------------------------
+    def get_node_id(self, node):
+        """
+        Get the integer id of a node. 
+        Throws an error if the node does not exist.
+
+        :param node: (str) The name of the node.
+        :return: (int) The id of the node.
+        """
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            raise Exception('Node does not exist.')
+        return node_id
+    # ----------------------------------------------------------------------------------------------
+    def get_node_name(self, node_id):
+        """
+        Get the name of a node, given its integer id. 
+
+        :param node_id: (int) The id of the node.
+        :return: (str) The name of the node.
+        """
+        return self._node_names[node_id]
     # ----------------------------------------------------------------------------------------------
     def set_node_prop(self, node, prop_name, prop_value):
         """
@@ -54,22 +192,30 @@ class Graph(object):
         :param prop_value (any) The value of the property.
         :return: No value
         """
-        if not node in self._nodes:
+        if not node in self._node_ids:
             raise Exception('Node does not exist.')
-        self._nodes[node][prop_name] = prop_value
+        node_id = self._node_ids[node]
+        self._get_prop_col(prop_name)[node_id] = prop_value
+        if self._journal is not None:
+            self._journal.set_node_prop(node_id, prop_name, prop_value)
     # ----------------------------------------------------------------------------------------------
-    def get_node_prop(self, node, prop_name):
+    def get_node_prop(self, node, prop_name, default = _NO_DEFAULT):
         """
         Get the value of a property of a node . 
         Throws an error if the node does not exist.
+        If the node does not have the property, then the default is returned. If no default is
+        given, then a KeyError is raised.
 
         :param node: (string) The name of the node.
         :param prop_name: (string) The name of the property.
+        :param default: (any) The value to return if the node does not have the property.
         :return: (any) The value of the property.
         """
-        if not node in self._nodes:
+        if not node in self._node_ids:
             raise Exception('Node does not exist.')
-        return self._nodes[node][prop_name]
+        if default is _NO_DEFAULT:
+            return self._node_props[prop_name][self._node_ids[node]]
+        return self._node_props.get(prop_name, _EMPTY_COL).get(self._node_ids[node], default)
     # ----------------------------------------------------------------------------------------------
     def get_node_prop_names(self, node):
         """
@@ -79,9 +225,10 @@ class Graph(object):
         :param node: (string) The name of the node.
         :return: (string[]) A list of property names.
         """
-        if not node in self._nodes:
+        if not node in self._node_ids:
             raise Exception('Node does not exist.')
-        return list(self._nodes[node].keys())
+        node_id = self._node_ids[node]
+        return [prop_name for prop_name, col in self._node_props.items() if node_id in col]
     # ----------------------------------------------------------------------------------------------
     def get_nodes(self):
         """
@@ -90,7 +237,7 @@ class Graph(object):
         :return: (str[]) A list of node names.
         """        
         # get the nodes
-        return list(self._nodes.keys())
+        return list(self._node_names)
     # ----------------------------------------------------------------------------------------------
     def get_nodes_with_out_edge(self, edge_type, ssid = None):
         """
@@ -103,8 +250,12 @@ class Graph(object):
             raise Exception('Edge type does not exist.')
         # get ssid
         if ssid is None: ssid = self._curr_ssid
+        # check if no edges of edge_type
+        if edge_type not in self._edges[ssid]:
+            return []
         # get the nodes
-        return list(self._edges[ssid][edge_type][Graph.FWD].keys())
+        names = self._node_names
+        return [names[node_id] for node_id in self._edges[ssid][edge_type][Graph.FWD]]
     # ----------------------------------------------------------------------------------------------
     def get_nodes_with_in_edge(self, edge_type, ssid = None):
         """
@@ -117,8 +268,102 @@ class Graph(object):
             raise Exception('Edge type does not exist.')
         # get ssid
         if ssid is None: ssid = self._curr_ssid
+        # check if no edges of edge_type
+        if edge_type not in self._edges[ssid]:
+            return []
         # get the nodes
-        return list(self._edges[ssid][edge_type][Graph.REV].keys())
+        names = self._node_names
+        return [names[node_id] for node_id in self._edges[ssid][edge_type][Graph.REV]]
+    # ----------------------------------------------------------------------------------------------
+    def nodes_view(self):
+        """
+        Get a read-only view of all nodes, without copying them into a list, see NodesView.
+
+        :return: (NodesView) A view of the node names.
+        """
+        return NodesView(None, self._node_names, self._node_ids)
+    # ----------------------------------------------------------------------------------------------
+    def nodes_with_out_edge_view(self, edge_type, ssid = None):
+        """
+        Get a read-only view of the nodes that have an outgoing edge of type edge_type, without
+        copying them into a list, see NodesView.
+
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (NodesView) A view of the node names.
+        """
+        rows = self._get_rows(edge_type, Graph.FWD, ssid)
+        return NodesView(_EMPTY if rows is None else rows, self._node_names, self._node_ids)
+    # ----------------------------------------------------------------------------------------------
+    def nodes_with_in_edge_view(self, edge_type, ssid = None):
+        """
+        Get a read-only view of the nodes that have an incoming edge of type edge_type, without
+        copying them into a list, see NodesView.
+
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (NodesView) A view of the node names.
+        """
+        rows = self._get_rows(edge_type, Graph.REV, ssid)
+        return NodesView(_EMPTY if rows is None else rows, self._node_names, self._node_ids)
+    # ----------------------------------------------------------------------------------------------
+    def num_nodes(self):
+        """
+        Count the number of nodes in the graph.
+
+        :return: (int) The number of nodes.
+        """
+        return len(self._node_names)
+    # ----------------------------------------------------------------------------------------------
+    def count_nodes_with_out_edge(self, edge_type, ssid = None):
+        """
+        Count the number of nodes that have an outgoing edge of type edge_type.
+
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (int) The number of nodes.
+        """
+        rows = self._get_rows(edge_type, Graph.FWD, ssid)
+        return 0 if rows is None else len(rows)
+    # ----------------------------------------------------------------------------------------------
+    def count_nodes_with_in_edge(self, edge_type, ssid = None):
+        """
+        Count the number of nodes that have an incoming edge of type edge_type.
+
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (int) The number of nodes.
+        """
+        rows = self._get_rows(edge_type, Graph.REV, ssid)
+        return 0 if rows is None else len(rows)
+    # ----------------------------------------------------------------------------------------------
+    def has_out_edge(self, node, edge_type, ssid = None):
+        """
+        Return True if a node has at least one outgoing edge of type edge_type.
+
+        :param node: (str) The name of the node.
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (bool) True if the node has an outgoing edge, false otherwise.
+        """
+        if not node in self._node_ids:
+            raise Exception('Node does not exist.')
+        rows = self._get_rows(edge_type, Graph.FWD, ssid)
+        return rows is not None and self._node_ids[node] in rows
+    # ----------------------------------------------------------------------------------------------
+    def has_in_edge(self, node, edge_type, ssid = None):
+        """
+        Return True if a node has at least one incoming edge of type edge_type.
+
+        :param node: (str) The name of the node.
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (bool) True if the node has an incoming edge, false otherwise.
+        """
+        if not node in self._node_ids:
+            raise Exception('Node does not exist.')
+        rows = self._get_rows(edge_type, Graph.REV, ssid)
+        return rows is not None and self._node_ids[node] in rows
     # ----------------------------------------------------------------------------------------------
     def has_node(self, node):
         """
@@ -127,7 +372,290 @@ class Graph(object):
         :param node: (string) The name of the node.
         :return: (bool) True or False.
         """
-        return node in self._nodes
+        return node in self._node_ids
+    # ----------------------------------------------------------------------------------------------
+    def del_node(self, node, ssid = None):
+        """
+        Delete a node, by deleting all its incoming and outgoing edges in a snapshot, see 
+        del_nodes().
+
+        :param node: (str) The name of the node.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        self.del_nodes([node], ssid)
+    # ----------------------------------------------------------------------------------------------
+    def del_nodes(self, nodes, ssid = None):
+        """
+        Delete multiple nodes in one step, by deleting all their incoming and outgoing edges of
+        every edge type in a snapshot, and their rows in all tables. If `ssid` is None, the current
+        active snapshot is used.
+
+        The nodes themselves are kept, since they may still have edges in other snapshots, and
+        their ids do not change. Nodes that have no edges in any snapshot are removed by
+        compact().
+
+        For edge types without reverse edges, the incoming edges are found by checking every row,
+        so the time depends on the number of rows of those edge types.
+
+        :param nodes: (str[]) A list of node names.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        node_ids = self._node_ids
+        try:
+            dead = set([node_ids[node] for node in nodes])
+        except KeyError:
+            raise Exception('Node does not exist.')
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        if ssid in self._frozen:
+            raise Exception('Snapshot is frozen.')
+        if type(self._edges[ssid]) is _SpilledSnapshot:
+            self._edges[ssid].reload()
+        for edge_type, edges in list(self._edges[ssid].items()):
+            fwd_ids = [node_id for node_id in dead if node_id in edges[Graph.FWD]]
+            if self._edges_reversed[edge_type]:
+                # the incoming edges are in the reverse rows
+                rev_ids = [node_id for node_id in dead if node_id in edges[Graph.REV]]
+                if not fwd_ids and not rev_ids:
+                    continue
+                edges = self._get_edges_for_write(edge_type, ssid)
+                for node0_id in fwd_ids:
+                    for node1_id in edges.pop_row(Graph.FWD, node0_id):
+                        if node1_id not in dead:
+                            edges.remove(Graph.REV, node1_id, node0_id)
+                for node1_id in rev_ids:
+                    for node0_id in edges.pop_row(Graph.REV, node1_id):
+                        if node0_id not in dead:
+                            edges.remove(Graph.FWD, node0_id, node1_id)
+            else:
+                # the incoming edges are found by checking every row
+                in_edges = []
+                for node0_id, row in edges[Graph.FWD].items():
+                    if node0_id in dead:
+                        continue
+                    if len(row) < len(dead):
+                        in_edges.extend((node0_id, node1_id) for node1_id in row if node1_id in dead)
+                    else:
+                        in_edges.extend((node0_id, node1_id) for node1_id in dead if node1_id in row)
+                if not fwd_ids and not in_edges:
+                    continue
+                edges = self._get_edges_for_write(edge_type, ssid)
+                for node0_id in fwd_ids:
+                    edges.pop_row(Graph.FWD, node0_id)
+                for node0_id, node1_id in in_edges:
+                    edges.remove(Graph.FWD, node0_id, node1_id)
+        # delete the rows in the tables
+        for table, table_rows in list(self._tables[ssid].items()):
+            row_ids = [node_id for node_id in dead if table_rows.get(node_id) is not None]
+            if row_ids:
+                self._get_table_for_write(table, ssid).clear_rows(row_ids)
+        if self._journal is not None:
+            self._journal.del_nodes(ssid, dead)
+    # ----------------------------------------------------------------------------------------------
+    def reserve_ids(self, counter, num_ids = 1):
+        """
+        Reserve a range of consecutive integers from a counter, and return the first integer in the
+        range. A counter starts at 0 when first used. 
+        
+        Counters can be used to create unique node names. The same integer is never returned
+        twice, even if nodes are deleted, or if the active snapshot is changed. Counters are saved
+        with the graph, and recorded in the journal.
+
+        :param counter: (str) The name of the counter.
+        :param num_ids: (int) The number of integers to reserve.
+        :return: (int) The first integer in the range.
+        """
+        start = self._counters.get(counter, 0)
+        self._counters[counter] = start + num_ids
+        if self._journal is not None:
+            self._journal.set_counter(counter, start + num_ids)
+        return start
+    # ----------------------------------------------------------------------------------------------
+    def get_counter(self, counter):
+        """
+        Get the next integer of a counter, without reserving it, see reserve_ids().
+
+        :param counter: (str) The name of the counter.
+        :return: (int) The next integer.
+        """
+        return self._counters.get(counter, 0)
+    # ----------------------------------------------------------------------------------------------
+    def set_counter(self, counter, value):
+        """
+        Set the next integer of a counter, see reserve_ids(). Care needs to be taken not to reuse
+        integers that are still used.
+
+        :param counter: (str) The name of the counter.
+        :param value: (int) The next integer.
+        :return: No value.
+        """
+        self._counters[counter] = value
+        if self._journal is not None:
+            self._journal.set_counter(counter, value)
+    # ----------------------------------------------------------------------------------------------
+    def add_table(self, table, width, typecode = 'd'):
+        """
+        Add a table of numbers to the graph. A table can have one row for each node, and each row
+        has `width` numbers. The rows are stored in flat arrays indexed by node id, each array a 
+        page of rows, so they use much less memory than node properties, and can be read and set 
+        quickly.
+
+        Tables are part of the snapshots, in the same way as edges. A new snapshot shares the tables
+        of the snapshot that it was created from. When a table is first modified, only the pages 
+        with the rows that are modified are copied, the other pages stay shared.
+
+        :param table: (str) The name of the table.
+        :param width: (int) The number of numbers in each row.
+        :param typecode: (str) The typecode of the array, 'd' for 64 bit or 'f' for 32 bit floats.
+        :return: No value.
+        """
+        if table in self._table_types:
+            raise Exception('Table already exists.')
+        self._table_types[table] = (width, typecode)
+        if self._journal is not None:
+            self._journal.add_table(table, width, typecode)
+    # ----------------------------------------------------------------------------------------------
+    def has_table(self, table):
+        """
+        Check if a table exists.
+
+        :param table: (str) The name of the table.
+        :return: (bool) True if the table exists, false otherwise.
+        """
+        return table in self._table_types
+    # ----------------------------------------------------------------------------------------------
+    def set_table_row(self, node_id, row, table, ssid = None):
+        """
+        Set the row of a node in a table. The node id is not checked.
+
+        :param node_id: (int) The id of the node.
+        :param row: (list) A list of numbers, with the width of the table.
+        :param table: (str) The name of the table.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        table_rows = self._get_table_for_write(table, ssid)
+        if len(row) != table_rows.width:
+            raise Exception('Row does not match the table.')
+        table_rows.set_row(node_id, row)
+        if self._journal is not None:
+            self._journal.set_table_rows(table, ssid, [node_id], [row])
+    # ----------------------------------------------------------------------------------------------
+    def set_table_rows(self, node_ids, rows, table, ssid = None):
+        """
+        Set the rows of multiple nodes in a table in one step. The node ids are not checked.
+
+        :param node_ids: (int[]) A list of node ids.
+        :param rows: (list) A list of rows, each a list of numbers, with the width of the table.
+        :param table: (str) The name of the table.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        table_rows = self._get_table_for_write(table, ssid)
+        width = table_rows.width
+        if not type(node_ids) is list:
+            node_ids = list(node_ids)
+        if not type(rows) is list:
+            rows = list(rows)
+        if len(node_ids) != len(rows) or any(len(row) != width for row in rows):
+            raise Exception('Rows do not match the table.')
+        table_rows.set_rows(node_ids, rows)
+        if self._journal is not None:
+            self._journal.set_table_rows(table, ssid, node_ids, rows)
+    # ----------------------------------------------------------------------------------------------
+    def del_table_row(self, node_id, table, ssid = None):
+        """
+        Delete the row of a node in a table. If the node has no row, nothing happens.
+
+        :param node_id: (int) The id of the node.
+        :param table: (str) The name of the table.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        if self.get_table_row(node_id, table, ssid) is not None:
+            self.set_table_row(node_id, [_NAN] * self._table_types[table][0], table, ssid)
+    # ----------------------------------------------------------------------------------------------
+    def get_table_row(self, node_id, table, ssid = None):
+        """
+        Get the row of a node in a table. If the node has no row, None is returned.
+
+        :param node_id: (int) The id of the node.
+        :param table: (str) The name of the table.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (list | None) A list of numbers, or None.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        table_rows = self._tables[ssid].get(table)
+        if table_rows is None:
+            if not table in self._table_types:
+                raise Exception('Table does not exist.')
+            return None
+        return table_rows.get(node_id)
+    # ----------------------------------------------------------------------------------------------
+    def get_table_rows(self, node_ids, table, ssid = None):
+        """
+        Get the rows of multiple nodes in a table, in one step. For nodes without a row, None is
+        returned.
+
+        :param node_ids: (int[]) A list of node ids.
+        :param table: (str) The name of the table.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (list) A list of rows, each a list of numbers or None.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        table_rows = self._tables[ssid].get(table)
+        if table_rows is None:
+            if not table in self._table_types:
+                raise Exception('Table does not exist.')
+            return [None] * len(node_ids)
+        return table_rows.get_rows(node_ids)
+    # ----------------------------------------------------------------------------------------------
+    def get_table_node_ids(self, table, ssid = None):
+        """
+        Get the ids of all the nodes that have a row in a table.
+
+        :param table: (str) The name of the table.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (int[]) A list of node ids.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        table_rows = self._tables[ssid].get(table)
+        if table_rows is None:
+            if not table in self._table_types:
+                raise Exception('Table does not exist.')
+            return []
+        return table_rows.node_ids()
+    # ----------------------------------------------------------------------------------------------
+    def diff_table(self, table, ssid_a, ssid_b):
+        """
+        Get the nodes with rows in a table that differ between two snapshots, including rows that
+        were set or deleted. If the table is still shared between the two snapshots, the result is
+        empty. Only the pages of rows that are not shared are compared.
+
+        :param table: (str) The name of the table.
+        :param ssid_a: (int) The ssid of the first snapshot.
+        :param ssid_b: (int) The ssid of the second snapshot.
+        :return: (str[]) A list of node names.
+        """
+        if not ssid_a in self._tables or not ssid_b in self._tables:
+            raise Exception('Snapshot ID does not exist.')
+        table_rows_a = self._tables[ssid_a].get(table)
+        table_rows_b = self._tables[ssid_b].get(table)
+        if table_rows_a is table_rows_b:
+            return []
+        node_ids = (table_rows_a or _EMPTY_TABLE).diff_node_ids(table_rows_b or _EMPTY_TABLE)
+        return [self._node_names[node_id] for node_id in node_ids]
     # ----------------------------------------------------------------------------------------------
     def add_edge(self, node0, node1, edge_type, ssid = None):
         """
@@ -138,37 +666,74 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: No value.
         """
-        if not node0 in self._nodes and node1 in self._nodes:
+        if not node0 in self._node_ids or not node1 in self._node_ids:
             raise Exception('Node does not exist.')
+        self.add_edge_id(self._node_ids[node0], self._node_ids[node1], edge_type, ssid)
+    # ----------------------------------------------------------------------------------------------
+    def add_edge_id(self, node0_id, node1_id, edge_type, ssid = None):
+        """
+        Add an edge to the graph, from node 0 to node 1, specifying the node ids.
+        The node ids are not checked.
+
+        :param node0_id: (int) The id of the start node.
+        :param node1_id: (int) The id of the end node.
+        :param edge_type: (str) The edge type.
+        :return: No value.
+        """
         if not edge_type in self._edges_reversed :
             raise Exception('Edge type does not exist.')
         # get ssid
         if ssid is None: ssid = self._curr_ssid
         # get the edges
-        if edge_type not in self._edges[ssid]:
-            edges = dict()
-            edges[Graph.FWD] = OrderedDict()
-            if (self._edges_reversed[edge_type]):
-                edges[Graph.REV] = OrderedDict()
-            self._edges.get(ssid)[edge_type] = edges
-        edges = self._edges[ssid][edge_type]
-        # =====
-        # Prior to 3.7 sets in python do not maintain order.
-        # We can use the keys in an ordered dict as an ordered set.
-        # We set the value to None.
-        # =====
+        edges = self._get_edges_for_write(edge_type, ssid)
         # add edge from node0 to node1
-        edge_fwd = self._edges[ssid][edge_type][Graph.FWD]
-        if node0 not in edge_fwd:
-            edge_fwd[node0] = OrderedDict() # ORDERED DICT
-        edge_fwd[node0][node1] = None # ADD TO ORDERED DICT
-        
+        edges.add(Graph.FWD, node0_id, node1_id)
         # add rev edge from node1 to node0
         if self._edges_reversed[edge_type]:
-            edge_rev = self._edges[ssid][edge_type][Graph.REV]
-            if node1 not in edge_rev:
-                edge_rev[node1] = OrderedDict() # ORDERED DICT
-            edge_rev[node1][node0] = None # ADD TO ORDERED DICT
+            edges.add(Graph.REV, node1_id, node0_id)
+        if self._journal is not None:
+            self._journal.add_edge(edge_type, ssid, node0_id, node1_id)
+    # ----------------------------------------------------------------------------------------------
+    def add_edges(self, pairs, edge_type, ssid = None):
+        """
+        Add multiple edges to the graph in one step. The nodes and the edge type are checked once,
+        for the whole batch.
+
+        :param pairs: (list) A list of (node0, node1) tuples, the names of the start and end nodes.
+        :param edge_type: (str) The edge type.
+        :return: No value.
+        """
+        node_ids = self._node_ids
+        try:
+            pairs_id = [(node_ids[node0], node_ids[node1]) for node0, node1 in pairs]
+        except KeyError:
+            raise Exception('Node does not exist.')
+        self.add_edges_id(pairs_id, edge_type, ssid)
+    # ----------------------------------------------------------------------------------------------
+    def add_edges_id(self, pairs, edge_type, ssid = None):
+        """
+        Add multiple edges to the graph in one step, specifying the node ids. 
+        The node ids are not checked.
+
+        :param pairs: (list) A list of (node0_id, node1_id) tuples, the ids of the start and end nodes.
+        :param edge_type: (str) The edge type.
+        :return: No value.
+        """
+        if not edge_type in self._edges_reversed :
+            raise Exception('Edge type does not exist.')
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        if not type(pairs) is list:
+            pairs = list(pairs)
+        # get the edges
+        edges = self._get_edges_for_write(edge_type, ssid)
+        # add fwd edges
+        edges.add_pairs(Graph.FWD, pairs)
+        # add rev edges
+        if self._edges_reversed[edge_type]:
+            edges.add_pairs(Graph.REV, [(node1_id, node0_id) for node0_id, node1_id in pairs])
+        if self._journal is not None:
+            self._journal.add_edges(edge_type, ssid, pairs)
     # ----------------------------------------------------------------------------------------------
     def del_edge(self, node0, node1, edge_type, ssid = None):
         """
@@ -197,35 +762,44 @@ class Graph(object):
         if node0 is None:
             if not rev:
                 raise Exception('Edge type "' + edge_type + '" does not have reverse edges.')
-            if node1 in edges[Graph.REV]:
-                for node in edges[Graph.REV][node1]:
-                    edges[Graph.FWD][node].pop(node1)
-                edges[Graph.REV][node1].clear()
+            node1_id = self._node_ids.get(node1)
+            if node1_id in edges[Graph.REV]:
+                edges = self._get_edges_for_write(edge_type, ssid)
+                for node_id in edges.pop_row(Graph.REV, node1_id):
+                    edges.remove(Graph.FWD, node_id, node1_id)
+                if self._journal is not None:
+                    self._journal.del_edge(edge_type, ssid, -1, node1_id)
             return
         # None cases, del all edges which start at node0
         if node1 is None:
-            if node0 in edges[Graph.FWD]:
+            node0_id = self._node_ids.get(node0)
+            if node0_id in edges[Graph.FWD]:
+                edges = self._get_edges_for_write(edge_type, ssid)
+                row = edges.pop_row(Graph.FWD, node0_id)
                 if rev:
-                    for node in edges[Graph.FWD][node0]:
-                        edges[Graph.REV][node].pop(node0)
-                edges[Graph.FWD][node0].clear()
+                    for node_id in row:
+                        edges.remove(Graph.REV, node_id, node0_id)
+                if self._journal is not None:
+                    self._journal.del_edge(edge_type, ssid, node0_id, -1)
             return
         # error check
-        if node0 not in self._nodes or node1 not in self._nodes:
+        if node0 not in self._node_ids or node1 not in self._node_ids:
             raise Exception('Node does not exist: ' + str(node0) + ', ' + str(node1) + '.')
         if (node0 == node1) :
             raise Exception('Nodes cannot be the same.')
-        # check if edge_type has any edges
-        if edge_type not in self._edges[ssid]:
-            return
+        node0_id = self._node_ids[node0]
+        node1_id = self._node_ids[node1]
         # if no edge, silently return
-        if node0 not in edges[Graph.FWD] or node1 not in edges[Graph.FWD][node0]:
+        if node0_id not in edges[Graph.FWD] or node1_id not in edges[Graph.FWD][node0_id]:
             return
         # del fwd edge from n0 to n1
-        edges[Graph.FWD][node0].pop(node1)
+        edges = self._get_edges_for_write(edge_type, ssid)
+        edges.remove(Graph.FWD, node0_id, node1_id)
         # del rev edge from n1 to n0
         if (rev) :
-            edges[Graph.REV][node1].pop(node0)
+            edges.remove(Graph.REV, node1_id, node0_id)
+        if self._journal is not None:
+            self._journal.del_edge(edge_type, ssid, node0_id, node1_id)
     # ----------------------------------------------------------------------------------------------
     def has_edge(self, node0, node1, edge_type, ssid = None):
         """
@@ -236,7 +810,7 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: (bool) True if the edge exists, false otherwise.
         """
-        if not node0 in self._nodes and node1 in self._nodes:
+        if not node0 in self._node_ids or not node1 in self._node_ids:
             raise Exception('Node does not exist.')
         if not edge_type in self._edges_reversed :
             raise Exception('Edge type does not exist.')
@@ -248,9 +822,10 @@ class Graph(object):
         # get edges
         edges_fwd = self._edges[ssid][edge_type][Graph.FWD]
         # check if edge exists
-        if node0 not in edges_fwd:
+        row = edges_fwd.get(self._node_ids[node0])
+        if row is None:
             return False
-        return node1 in edges_fwd[node0]
+        return self._node_ids[node1] in row
     # ----------------------------------------------------------------------------------------------
     def add_edge_type(self, edge_type, rev, ssid = None):
         """
@@ -266,6 +841,8 @@ class Graph(object):
         if ssid is None: ssid = self._curr_ssid
         # add edge type
         self._edges_reversed[edge_type] = rev
+        if self._journal is not None:
+            self._journal.add_edge_type(edge_type, rev)
         # self._edges[ssid][edge_type] = dict()
     # ----------------------------------------------------------------------------------------------
     def has_edge_type(self, edge_type):
@@ -288,8 +865,23 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: (str[]) A list of nodes names.
         """
-        if not node in self._nodes :
+        if not node in self._node_ids :
             raise Exception('Node does not exist.')
+        names = self._node_names
+        return [names[node_id] for node_id in 
+            self.successors_id(self._node_ids[node], edge_type, ssid)]
+    # ----------------------------------------------------------------------------------------------
+    def successors_id(self, node_id, edge_type, ssid = None):
+        """
+        Get multiple successors of a node in the graph, specifying the node id.
+        The node id is not checked.
+
+        If there are no successors, then an empty list is returned.
+
+        :param node_id: (int) The id of the node from which to find successors.
+        :param edge_type: (str) The edge type.
+        :return: (int[]) A list of nodes ids.
+        """
         if not edge_type in self._edges_reversed :
             raise Exception('Edge type does not exist.')
         # get ssid
@@ -300,9 +892,10 @@ class Graph(object):
         # get edges
         edges = self._edges[ssid][edge_type]
         # get successors
-        if node not in edges[Graph.FWD]:
+        row = edges[Graph.FWD].get(node_id)
+        if row is None:
             return []
-        return list(edges[Graph.FWD][node])
+        return list(row)
     # ----------------------------------------------------------------------------------------------
     def predecessors(self, node, edge_type, ssid = None):
         """
@@ -317,8 +910,23 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: (str[]) A list of nodes names, or a single node name.
         """
-        if not node in self._nodes :
+        if not node in self._node_ids :
             raise Exception('Node does not exist.')
+        names = self._node_names
+        return [names[node_id] for node_id in 
+            self.predecessors_id(self._node_ids[node], edge_type, ssid)]
+    # ----------------------------------------------------------------------------------------------
+    def predecessors_id(self, node_id, edge_type, ssid = None):
+        """
+        Get multiple predecessors of a node in the graph, specifying the node id.
+        The node id is not checked.
+
+        If there are no predecessors, then an empty list is returned.
+
+        :param node_id: (int) The id of the node from which to find predecessors.
+        :param edge_type: (str) The edge type.
+        :return: (int[]) A list of nodes ids.
+        """
         if not edge_type in self._edges_reversed :
             raise Exception('Edge type does not exist.')
         if not self._edges_reversed[edge_type] :
@@ -331,9 +939,42 @@ class Graph(object):
         # get edges
         edges = self._edges[ssid][edge_type]
         # get predecessors
-        if node not in edges[Graph.REV]:
+        row = edges[Graph.REV].get(node_id)
+        if row is None:
             return []
-        return list(edges[Graph.REV][node])
+        return list(row)
+    # ----------------------------------------------------------------------------------------------
+    def successors_view(self, node, edge_type, ssid = None):
+        """
+        Get a read-only view of the successors of a node, without copying them into a list, see
+        NodesView.
+
+        :param node: (str) The name of the node from which to find successors.
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (NodesView) A view of the node names.
+        """
+        if not node in self._node_ids :
+            raise Exception('Node does not exist.')
+        rows = self._get_rows(edge_type, Graph.FWD, ssid)
+        row = None if rows is None else rows.get(self._node_ids[node])
+        return NodesView(() if row is None else row, self._node_names, self._node_ids)
+    # ----------------------------------------------------------------------------------------------
+    def predecessors_view(self, node, edge_type, ssid = None):
+        """
+        Get a read-only view of the predecessors of a node, without copying them into a list, see
+        NodesView.
+
+        :param node: (str) The name of the node from which to find predecessors.
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (NodesView) A view of the node names.
+        """
+        if not node in self._node_ids :
+            raise Exception('Node does not exist.')
+        rows = self._get_rows(edge_type, Graph.REV, ssid)
+        row = None if rows is None else rows.get(self._node_ids[node])
+        return NodesView(() if row is None else row, self._node_names, self._node_ids)
     # ----------------------------------------------------------------------------------------------
     def set_successors(self, node0, nodes1, edge_type, ssid = None):
         """
@@ -347,23 +988,18 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: No value.
         """
-        if node0 not in self._nodes:
+        if node0 not in self._node_ids:
             raise Exception('Node does not exist: ' + node0 + '.')
         # get ssid
         if ssid is None: ssid = self._curr_ssid
-        # get successors
-        if edge_type not in self._edges[ssid]:
-            edges = dict()
-            edges[Graph.FWD] = OrderedDict()
-            if self._edges_reversed[edge_type]:
-                edges[Graph.REV] = OrderedDict()
-            self._edges[ssid][edge_type] = edges
         # get edges
-        edges = self._edges[ssid][edge_type]
+        edges = self._get_edges_for_write(edge_type, ssid)
         # set successors
-        edges[Graph.FWD][node0].clear()
-        for node1 in nodes1:
-            edges[Graph.FWD][node0][node1] = None # ORDERED SET
+        node_ids = self._node_ids
+        row = [node_ids[node1] for node1 in nodes1]
+        edges.set_row(Graph.FWD, node_ids[node0], row)
+        if self._journal is not None:
+            self._journal.set_row(edge_type, ssid, Graph.FWD, node_ids[node0], row)
     # ----------------------------------------------------------------------------------------------
     def set_predecessors(self, node1, nodes0, edge_type, ssid = None):
         """
@@ -377,25 +1013,67 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: No value.
         """
-        if node1 not in self._nodes:
+        if node1 not in self._node_ids:
             raise Exception('Node does not exist: ' + node1 + '.')
         if not self._edges_reversed.get(edge_type):
             raise Exception('Edge types "' + edge_type + '" does not have reverse edges.');
         # get ssid
         if ssid is None: ssid = self._curr_ssid
-        # check if edges of edge_type exist
-        if edge_type not in self._edges[ssid]:
-            edges = dict()
-            edges[Graph.FWD] = OrderedDict()
-            if self._edges_reversed.get(edge_type):
-                edges[Graph.REV] = OrderedDict()
-            self._edges[ssid][edge_type] = edges
         # get edges
-        edges = self._edges[ssid][edge_type]
+        edges = self._get_edges_for_write(edge_type, ssid)
         # set predecessors
-        edges[Graph.REV][node1].clear()
-        for node0 in nodes0:
-            edges[Graph.REV][node1][node0] = None # ORDERED SET
+        node_ids = self._node_ids
+        row = [node_ids[node0] for node0 in nodes0]
+        edges.set_row(Graph.REV, node_ids[node1], row)
+        if self._journal is not None:
+            self._journal.set_row(edge_type, ssid, Graph.REV, node_ids[node1], row)
+    # ----------------------------------------------------------------------------------------------
+    def redirect_edges_id(self, node_ids_map, edge_type, ssid = None):
+        """
+        Redirect the incoming edges of multiple nodes to other nodes in one step, specifying the
+        node ids. The node ids are not checked. The edge type must have reverse edges.
+
+        For each old node in node_ids_map, every edge that ends at the old node is replaced by an 
+        edge that ends at the new node, in the same position in the successors of the start node.
+        The predecessors of the old node are added to the predecessors of the new node, and the old
+        node is left without incoming edges. The new nodes cannot also be old nodes.
+
+        :param node_ids_map: (dict) A dict, where the key is the id of an old node and the value is
+            the id of the new node.
+        :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        if not self._edges_reversed.get(edge_type):
+            raise Exception('Edge types "' + edge_type + '" does not have reverse edges.');
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        # get edges
+        edges = self._get_edges_for_write(edge_type, ssid)
+        fwd_rows = edges[Graph.FWD]
+        rev_rows = edges[Graph.REV]
+        # the start nodes of the edges, and the new predecessors of the new nodes
+        starts = _odict()
+        preds_map = _odict()
+        for old_id, new_id in node_ids_map.items():
+            preds = rev_rows.get(old_id)
+            if not preds or old_id == new_id:
+                continue
+            starts.update(_odict.fromkeys(preds))
+            new_preds = preds_map.get(new_id)
+            if new_preds is None:
+                new_preds = preds_map[new_id] = list(rev_rows.get(new_id, ()))
+            new_preds.extend(preds)
+            preds_map[old_id] = []
+        # set the rows
+        get_new_id = node_ids_map.get
+        rows = [(Graph.FWD, node_id, [get_new_id(succ_id, succ_id) 
+            for succ_id in fwd_rows[node_id]]) for node_id in starts]
+        rows.extend((Graph.REV, node_id, preds) for node_id, preds in preds_map.items())
+        for direction, node_id, row in rows:
+            edges.set_row(direction, node_id, row)
+            if self._journal is not None:
+                self._journal.set_row(edge_type, ssid, direction, node_id, row)
     # ----------------------------------------------------------------------------------------------
     def degree_in(self, node, edge_type, ssid = None):
         """
@@ -406,7 +1084,7 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: (int) The number of incoming edges.
         """
-        if not node in self._nodes :
+        if not node in self._node_ids :
             raise Exception('Node does not exist.')
         if not edge_type in self._edges_reversed :
             raise Exception('Edge type does not exist.')
@@ -420,9 +1098,10 @@ class Graph(object):
         # get edges
         edges = self._edges[ssid][edge_type]
         # calc reverse degree
-        if node not in edges[Graph.REV]:
+        row = edges[Graph.REV].get(self._node_ids[node])
+        if row is None:
             return 0
-        return len(edges[Graph.REV][node])
+        return len(row)
     # ----------------------------------------------------------------------------------------------
     def degree_out(self, node, edge_type, ssid = None):
         """
@@ -433,7 +1112,7 @@ class Graph(object):
         :param edge_type: (str) The edge type.
         :return: (int) The number of outgoing edges.
         """        
-        if not node in self._nodes :
+        if not node in self._node_ids :
             raise Exception('Node does not exist.')
         if not edge_type in self._edges_reversed :
             raise Exception('Edge type does not exist.')
@@ -445,36 +1124,95 @@ class Graph(object):
         # get edges
         edges = self._edges[ssid][edge_type]
         # calc forward degree
-        if node not in edges[Graph.FWD]:
+        row = edges[Graph.FWD].get(self._node_ids[node])
+        if row is None:
             return 0
-        return len(edges[Graph.FWD][node])
+        return len(row)
     # ----------------------------------------------------------------------------------------------
-    def degree(self, node, edge_type):
+    def degree(self, node, edge_type, ssid = None):
         """
         Count the the total number of incoming and outgoing edges.
 
         :param node: (str) The name of the node for which to count edges
         :param edge_type: (str) The edge type.
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
         :return: (int) The number of edges.
         """
         # return result
-        return self.degree_in(node, edge_type) + self.degree_out(node, edge_type)
+        return self.degree_in(node, edge_type, ssid) + self.degree_out(node, edge_type, ssid)
+    # ----------------------------------------------------------------------------------------------
+    def traverse(self, start_nodes, hops, per_source = False, ssid = None):
+        """
+        Traverse the graph from multiple start nodes, following a plan of hops.
+
+        Each hop is a tuple (edge_type, direction), where direction is Graph.FWD to follow forward
+        edges (successors) or Graph.REV to follow reverse edges (predecessors). A hop can have a
+        third item, a function that takes a node name and returns True if the node should be kept. 
+        The nodes reached by the last hop are returned, in order, without duplicates.
+
+        If `per_source` is False, the union of the nodes reached from all start nodes is returned,
+        and the traversal is done one hop at a time, for all the start nodes together. 
+
+        If `per_source` is True, the traversal is done separately for each start node, and a tuple
+        with two lists is returned, (nodes, offsets). The nodes reached from start_nodes[i] are
+        nodes[offsets[i]:offsets[i + 1]].
+
+        :param start_nodes: (str[]) A list of names of the start nodes.
+        :param hops: (list) A list of (edge_type, direction) or (edge_type, direction, filter) tuples.
+        :param per_source: (bool) If True, get the nodes reached from each start node.
+        :return: (str[]) A list of node names, or a tuple (str[], int[]) if `per_source` is True.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        # get the rows for each hop
+        edge_types_map = self._edges[ssid]
+        hops_rows = []
+        for hop in hops:
+            edge_type, direction = hop[0], hop[1]
+            if not edge_type in self._edges_reversed:
+                raise Exception('Edge type does not exist.')
+            if direction == Graph.REV and not self._edges_reversed[edge_type]:
+                raise Exception('Edge types "' + edge_type + '" does not have reverse edges.')
+            edges = edge_types_map.get(edge_type)
+            rows = _EMPTY if edges is None else edges[direction]
+            hops_rows.append((rows.get, hop[2] if len(hop) > 2 else None))
+        # get the start node ids
+        node_ids = self._node_ids
+        try:
+            start_ids = [node_ids[node] for node in start_nodes]
+        except KeyError:
+            raise Exception('Node does not exist.')
+        names = self._node_names
+        # traverse
+        if not per_source:
+            return [names[node_id] for node_id in _traverse_ids(start_ids, hops_rows, names)]
+        nodes = []
+        offsets = [0]
+        for start_id in start_ids:
+            nodes.extend(names[node_id] for node_id in _traverse_ids([start_id], hops_rows, names))
+            offsets.append(len(nodes))
+        return nodes, offsets
     # ----------------------------------------------------------------------------------------------
     def new_snapshot(self, ssid = None):
         """
         Start a new snapshot of the edges .
         If `ssid` is None, the the new snapshot will be empty.
 
+        If `ssid` is an existing snapshot, the new snapshot shares the edges of that snapshot. The
+        edges are only copied when they are first modified, in either snapshot. 
+
         :param: (int | None) The ID of an existing snapshot, or None.
         :return:(int) The ssid of the current snapshot.
         """
-        self._curr_ssid += 1
-        if ssid is None:
-            # create a new empty snapshot
-            self._edges[self._curr_ssid] =  OrderedDict()
-        else:
-            # create a deep copy of the edge in an existing snapshot
-            self._edges[self._curr_ssid] = copy.deepcopy(self._edges.get(ssid))
+        if ssid is not None and not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        new_ssid = self._create_snapshot(ssid)
+        self._curr_ssid = new_ssid
+        if self._journal is not None:
+            self._journal.snapshot(_J_SET_ACTIVE, new_ssid)
+        # delete or spill old snapshots, if there is a policy
+        if self._ss_policy is not None or self._spill_max is not None:
+            self.apply_snapshot_policy()
         return self._curr_ssid
     # ----------------------------------------------------------------------------------------------
     def get_active_snapshot(self):
@@ -485,6 +1223,14 @@ class Graph(object):
         """
         return self._curr_ssid
     # ----------------------------------------------------------------------------------------------
+    def get_snapshots(self):
+        """
+        Get the IDs of all the snapshots, in the order they were created.
+
+        :return: (int[]) A list of ssids.
+        """
+        return sorted(self._edges.keys())
+    # ----------------------------------------------------------------------------------------------
     def set_active_snapshot(self, ssid):
         """
         Set the ID of the current active snapshot.
@@ -496,25 +1242,791 @@ class Graph(object):
         if not ssid in self._edges:
             raise Exception('Snapshot ID does not exist.');
         self._curr_ssid = ssid
+        if self._journal is not None:
+            self._journal.snapshot(_J_SET_ACTIVE, ssid)
+        # move to the end, the most recently used
+        del self._ss_used[ssid]
+        self._ss_used[ssid] = None
+        # reload the snapshot if it was spilled
+        if type(self._edges[ssid]) is _SpilledSnapshot:
+            self._edges[ssid].reload()
+            if self._spill_max is not None:
+                self.apply_snapshot_policy()
     # ----------------------------------------------------------------------------------------------
     def clear_snapshot(self, ssid = None):
         """
-        Clear all edges in the current active snapshot.
+        Clear all edges in a snapshot. If `ssid` is None, the current active snapshot is cleared.
 
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
         :return: No value.
         """
         # get ssid
         if ssid is None: ssid = self._curr_ssid
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        if ssid in self._frozen:
+            raise Exception('Snapshot is frozen.')
+        if ssid in self._pinned:
+            raise Exception('Snapshot is pinned by a view.')
+        if type(self._edges[ssid]) is _SpilledSnapshot:
+            self._edges[ssid].discard()
         # create a new dict
-        self._edges[self._curr_ssid] = OrderedDict()
-        
+        self._edges[ssid] = OrderedDict()
+        self._tables[ssid] = dict()
+        if self._journal is not None:
+            self._journal.snapshot(_J_CLEAR_SNAPSHOT, ssid)
     # ----------------------------------------------------------------------------------------------
-    def to_string(self):
+    def delete_snapshot(self, ssid):
         """
-        Creates a human-readable string representation of the graph, for debugging.
+        Delete a snapshot. The edges of the snapshot are deleted, unless they are shared with other
+        snapshots. The current active snapshot cannot be deleted.
 
-        :return: A string representation of the graph.
-        """
+        :param ssid: (int) The ssid of an existing snapshot.
+        :return: No value.
+        """
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        if ssid == self._curr_ssid:
+            raise Exception('The active snapshot cannot be deleted.')
+        if ssid in self._pinned:
+            raise Exception('Snapshot is pinned by a view.')
+        if type(self._edges[ssid]) is _SpilledSnapshot:
+            self._edges[ssid].discard()
+        del self._edges[ssid]
+        del self._tables[ssid]
+        del self._ss_used[ssid]
+        self._frozen.discard(ssid)
+        if self._journal is not None:
+            self._journal.snapshot(_J_DELETE_SNAPSHOT, ssid)
+    # ----------------------------------------------------------------------------------------------
+    def diff_snapshots(self, ssid_a, ssid_b):
+        """
+        Get the edges that differ between two snapshots. 
+
+        The result is a dict, where the key is the edge type and the value is a tuple with two
+        lists, the edges that were added and the edges that were removed, going from snapshot
+        `ssid_a` to snapshot `ssid_b`. Each edge is a tuple of two node names. Edge types without any
+        changes are not included.
+
+        Edges that are still shared between the two snapshots are skipped, so if one snapshot was
+        created from the other, the cost depends on the number of changes, not the size of the
+        snapshots.
+
+        :param ssid_a: (int) The ssid of the first snapshot.
+        :param ssid_b: (int) The ssid of the second snapshot.
+        :return: (dict) A dict of edge types, each with a tuple of added and removed edges.
+        """
+        if not ssid_a in self._edges or not ssid_b in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        names = self._node_names
+        edge_types_map_a = self._edges[ssid_a]
+        edge_types_map_b = self._edges[ssid_b]
+        result = OrderedDict()
+        for edge_type in self._edges_reversed:
+            edges_a = edge_types_map_a.get(edge_type)
+            edges_b = edge_types_map_b.get(edge_type)
+            if edges_a is edges_b:
+                continue
+            rows_a = _EMPTY if edges_a is None else edges_a[Graph.FWD]
+            rows_b = _EMPTY if edges_b is None else edges_b[Graph.FWD]
+            # get the ids of the rows that may differ
+            row_ids = _changed_row_ids(edges_a, edges_b)
+            if row_ids is None:
+                row_ids = list(rows_a) + [node_id for node_id in rows_b if node_id not in rows_a]
+            # compare the rows
+            added = []
+            removed = []
+            for node0_id in row_ids:
+                row_a = rows_a.get(node0_id, _EMPTY)
+                row_b = rows_b.get(node0_id, _EMPTY)
+                if row_a is row_b:
+                    continue
+                node0 = names[node0_id]
+                added.extend((node0, names[node1_id]) for node1_id in row_b if node1_id not in row_a)
+                removed.extend((node0, names[node1_id]) for node1_id in row_a if node1_id not in row_b)
+            if added or removed:
+                result[edge_type] = (added, removed)
+        return result
+    # ----------------------------------------------------------------------------------------------
+    def get_snapshot_size(self, ssid = None, shared = True):
+        """
+        Estimate the memory used by the edges and tables of a snapshot, in bytes. If `ssid` is None,
+        the current active snapshot is used.
+
+        If `shared` is True, all the edges in the snapshot are included. If `shared` is False, edges
+        that are shared with other snapshots are excluded, so the result is an estimate of the
+        memory that would be freed by deleting the snapshot.
+
+        The estimate includes the dicts and rows of the edges, or the arrays of frozen edges, and 
+        the arrays of the tables. It does not include the nodes, which are shared by all snapshots. 
+        Spilled snapshots use almost no memory, see spill_snapshot(), but their tables are kept in
+        memory.
+
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :param shared: (bool) If True, include the edges shared with other snapshots.
+        :return: (int) The estimated number of bytes.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        seen = set()
+        if not shared:
+            for other_ssid in self._edges:
+                if other_ssid != ssid:
+                    _snapshot_size(self._edges[other_ssid], seen)
+                    _tables_size(self._tables[other_ssid], seen)
+        return _snapshot_size(self._edges[ssid], seen) + _tables_size(self._tables[ssid], seen)
+    # ----------------------------------------------------------------------------------------------
+    def get_snapshots_size(self):
+        """
+        Estimate the memory used by the edges and tables of all snapshots, in bytes. Edges and 
+        tables that are shared by multiple snapshots are only counted once.
+
+        :return: (int) The estimated number of bytes.
+        """
+        seen = set()
+        return sum(_snapshot_size(self._edges[ssid], seen) + _tables_size(self._tables[ssid], seen)
+            for ssid in self._edges)
+    # ----------------------------------------------------------------------------------------------
+    def set_snapshot_policy(self, max_snapshots = None, max_bytes = None, lru = False):
+        """
+        Set a retention policy for snapshots. When the policy is exceeded, old snapshots are
+        deleted. The policy is applied each time a new snapshot is created, and when
+        apply_snapshot_policy() is called.
+
+        If `lru` is False, the oldest snapshots are deleted first. If `lru` is True, the least
+        recently used snapshots are deleted first, where a snapshot is used when it is created or
+        set as the active snapshot. The active snapshot is never deleted.
+
+        Checking `max_bytes` requires estimating the size of all snapshots, see
+        get_snapshots_size(), which takes time proportional to the number of edges.
+
+        :param max_snapshots: (int | None) The maximum number of snapshots to keep, or None.
+        :param max_bytes: (int | None) The maximum memory for the edges of all snapshots, or None.
+        :param lru: (bool) If True, delete the least recently used snapshots first.
+        :return: No value.
+        """
+        if max_snapshots is None and max_bytes is None:
+            self._ss_policy = None
+            return
+        if max_snapshots is not None and max_snapshots < 1:
+            raise Exception('The maximum number of snapshots must be at least 1.')
+        self._ss_policy = (max_snapshots, max_bytes, lru)
+        self.apply_snapshot_policy()
+    # ----------------------------------------------------------------------------------------------
+    def set_spill_policy(self, max_resident = None, dirpath = None):
+        """
+        Set a policy for spilling snapshots to disk, see spill_snapshot(). When there are more than
+        `max_resident` snapshots in memory, the least recently used snapshots are spilled, where a
+        snapshot is used when it is created or set as the active snapshot. The policy is applied each
+        time a new snapshot is created or a spilled snapshot is set as the active snapshot, and when
+        apply_snapshot_policy() is called. 
+
+        The files are saved in `dirpath`. If `dirpath` is None, a temporary folder is used, which is
+        deleted when Python exits.
+
+        :param max_resident: (int | None) The maximum number of snapshots in memory, or None.
+        :param dirpath: (str | None) The folder for the files of spilled snapshots, or None.
+        :return: No value.
+        """
+        if max_resident is not None and max_resident < 1:
+            raise Exception('The maximum number of snapshots in memory must be at least 1.')
+        self._spill_max = max_resident
+        if dirpath is not None:
+            self._spill_dirpath = dirpath
+        if max_resident is not None:
+            self.apply_snapshot_policy()
+    # ----------------------------------------------------------------------------------------------
+    def apply_snapshot_policy(self):
+        """
+        Delete old snapshots until the retention policy is met, see set_snapshot_policy(). Then
+        spill snapshots to disk until the spill policy is met, see set_spill_policy().
+
+        :return: (int[]) A list of the ssids of the deleted snapshots.
+        """
+        deleted = []
+        if self._ss_policy is not None:
+            deleted = self._apply_retention_policy()
+        if self._spill_max is not None:
+            ssids = [ssid for ssid in self._ss_used if ssid != self._curr_ssid and 
+                ssid not in self._pinned and type(self._edges[ssid]) is not _SpilledSnapshot]
+            num_resident = len(ssids) + 1
+            for ssid in ssids:
+                if num_resident <= self._spill_max:
+                    break
+                self.spill_snapshot(ssid)
+                num_resident -= 1
+        return deleted
+    # ----------------------------------------------------------------------------------------------
+    def spill_snapshot(self, ssid):
+        """
+        Spill a snapshot to disk. The edges of the snapshot are saved to a file, and removed from
+        memory. The snapshot is reloaded when it is set as the active snapshot, or when it is
+        first read. The active snapshot cannot be spilled.
+
+        Edges that are shared with other snapshots stay in memory for those snapshots, and after
+        the snapshot is reloaded, they are no longer shared.
+
+        :param ssid: (int) The ssid of an existing snapshot.
+        :return: No value.
+        """
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        if ssid == self._curr_ssid:
+            raise Exception('The active snapshot cannot be spilled.')
+        if ssid in self._pinned:
+            raise Exception('Snapshot is pinned by a view.')
+        edge_types_map = self._edges[ssid]
+        if type(edge_types_map) is _SpilledSnapshot:
+            return
+        # get the edges, as frozen edges
+        num_nodes = len(self._node_names)
+        blocks = []
+        edge_types = []
+        for edge_type, edges in edge_types_map.items():
+            if type(edges) is not _FrozenEdges:
+                edges = _FrozenEdges.compile(edges, num_nodes)
+            edge_types.append([edge_type, len(blocks)])
+            blocks.append(edges)
+        # write the file
+        if self._spill_dirpath is None:
+            self._spill_dirpath = tempfile.mkdtemp(prefix = 'sim_graph_')
+            atexit.register(shutil.rmtree, self._spill_dirpath, True)
+        elif not os.path.isdir(self._spill_dirpath):
+            os.makedirs(self._spill_dirpath)
+        fd, filepath = tempfile.mkstemp(suffix = '.simgraph', dir = self._spill_dirpath)
+        os.close(fd)
+        _write_graph_file(filepath, {'edge_types': edge_types}, blocks)
+        self._edges[ssid] = _SpilledSnapshot(self, ssid, filepath)
+    # ----------------------------------------------------------------------------------------------
+    def is_spilled(self, ssid):
+        """
+        Return True if a snapshot is spilled to disk, see spill_snapshot().
+
+        :param ssid: (int) The ssid of an existing snapshot.
+        :return: (bool) True if the snapshot is spilled, false otherwise.
+        """
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        return type(self._edges[ssid]) is _SpilledSnapshot
+    # ----------------------------------------------------------------------------------------------
+    def freeze(self, ssid = None):
+        """
+        Freeze a snapshot. If `ssid` is None, the current active snapshot is frozen.
+
+        The edges of every edge type in the snapshot are compiled into compressed sparse row arrays,
+        which use much less memory than the dicts. All read methods work as before. Any method that
+        modifies the edges of a frozen snapshot will throw an error, and no nodes can be added while
+        the active snapshot is frozen. New snapshots can be created from a frozen snapshot and then
+        modified.
+
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        num_nodes = len(self._node_names)
+        edge_types_map = self._edges[ssid]
+        for edge_type, edges in edge_types_map.items():
+            if type(edges) is not _FrozenEdges:
+                edge_types_map[edge_type] = _FrozenEdges.compile(edges, num_nodes)
+        self._frozen.add(ssid)
+        if self._journal is not None:
+            self._journal.snapshot(_J_FREEZE, ssid)
+    # ----------------------------------------------------------------------------------------------
+    def thaw(self, ssid = None):
+        """
+        Thaw a frozen snapshot. If `ssid` is None, the current active snapshot is thawed.
+        The edges are converted back to dicts, so that they can be modified again.
+        If the snapshot is not frozen, nothing happens.
+
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: No value.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        edge_types_map = self._edges[ssid]
+        for edge_type, edges in edge_types_map.items():
+            if type(edges) is _FrozenEdges:
+                edge_types_map[edge_type] = edges.copy(ssid)
+        self._frozen.discard(ssid)
+        if self._journal is not None:
+            self._journal.snapshot(_J_THAW, ssid)
+    # ----------------------------------------------------------------------------------------------
+    def is_frozen(self, ssid = None):
+        """
+        Return True if a snapshot is frozen. If `ssid` is None, the current active snapshot is
+        checked.
+
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (bool) True if the snapshot is frozen, false otherwise.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        return ssid in self._frozen
+    # ----------------------------------------------------------------------------------------------
+    def compact(self, keep = None, renames = None):
+        """
+        Remove the nodes that have no edges in any snapshot, and renumber the remaining nodes so
+        that the node ids are dense. Nodes in `keep` are never removed. The edges, tables and node
+        properties of all snapshots are rebuilt with the new ids, so the memory used by deleted
+        nodes is reclaimed, see del_nodes(). Rows in tables do not keep a node.
+
+        If `renames` is given, the nodes are also renamed. It is a dict, where the key is the old
+        name and the value is the new name. The node names must still be unique.
+
+        Frozen snapshots stay frozen, and spilled snapshots are reloaded. The graph cannot be
+        compacted while it has views or a journal, since they refer to the old node ids.
+
+        :param keep: (str[]) A list of node names to keep, or None.
+        :param renames: (dict) A dict of old and new node names, or None.
+        :return: (int[]) A list with the new node id of each old node id, or -1 if removed.
+        """
+        if self._pinned:
+            raise Exception('The graph cannot be compacted while it has views.')
+        if self._journal is not None:
+            raise Exception('The graph cannot be compacted while it has a journal.')
+        # find the nodes that are used in any snapshot
+        num_nodes = len(self._node_names)
+        used = bytearray(num_nodes)
+        for node in keep or []:
+            used[self.get_node_id(node)] = 1
+        for ssid in list(self._edges.keys()):
+            if type(self._edges[ssid]) is _SpilledSnapshot:
+                self._edges[ssid].reload()
+            for edges in self._edges[ssid].values():
+                _mark_used(edges[Graph.FWD], used)
+        # the new ids, in the same order as the old ids
+        new_ids = [-1] * num_nodes
+        names = []
+        for node_id in range(num_nodes):
+            if used[node_id]:
+                new_ids[node_id] = len(names)
+                names.append(self._node_names[node_id])
+        if renames:
+            names = [renames.get(node, node) for node in names]
+        node_ids = dict(zip(names, range(len(names))))
+        if len(node_ids) != len(names):
+            raise Exception('Node names must be unique.')
+        # node properties
+        for prop_name, col in self._node_props.items():
+            self._node_props[prop_name] = dict((new_ids[node_id], value) 
+                for node_id, value in col.items() if new_ids[node_id] != -1)
+        # edges, edges shared by multiple snapshots stay shared
+        remapped = dict() # key is id(edges), value is the remapped edges
+        for ssid, edge_types_map in self._edges.items():
+            for edge_type, edges in list(edge_types_map.items()):
+                new_edges = remapped.get(id(edges))
+                if new_edges is None:
+                    rev = None if edges[Graph.REV] is None else _remap_rows(edges[Graph.REV], new_ids)
+                    new_edges = _Edges(_remap_rows(edges[Graph.FWD], new_ids), rev, edges.owner)
+                    if type(edges) is _FrozenEdges:
+                        new_edges = _FrozenEdges.compile(new_edges, len(names))
+                        new_edges.base = None
+                        new_edges.dirty = None
+                    remapped[id(edges)] = new_edges
+                edge_types_map[edge_type] = new_edges
+        # tables, tables shared by multiple snapshots stay shared
+        for tables_map in self._tables.values():
+            for table, table_rows in list(tables_map.items()):
+                new_table_rows = remapped.get(id(table_rows))
+                if new_table_rows is None:
+                    new_table_rows = table_rows.remap(new_ids)
+                    remapped[id(table_rows)] = new_table_rows
+                tables_map[table] = new_table_rows
+        self._node_ids = node_ids
+        self._node_names = names
+        return new_ids
+    # ----------------------------------------------------------------------------------------------
+    def save(self, filepath):
+        """
+        Save the whole graph to a binary file, including all snapshots.
+
+        The file has a small JSON header, with the node names, the node properties, the edge types
+        and the snapshots, followed by the edges as arrays of compressed sparse rows, and then the
+        arrays of the tables. Edges and tables that are shared by multiple snapshots are only saved
+        once.
+
+        :param filepath: (str) The path of the file.
+        :return: No value.
+        """
+        num_nodes = len(self._node_names)
+        # get the unique edges, as frozen edges
+        blocks = []
+        block_ids = dict() # key is id(edges), value is the index in blocks
+        snapshots = []
+        for ssid, edge_types_map in self._edges.items():
+            if type(edge_types_map) is _SpilledSnapshot:
+                edge_types_map = edge_types_map.read()
+            edge_types = []
+            for edge_type, edges in edge_types_map.items():
+                block_i = block_ids.get(id(edges))
+                if block_i is None:
+                    block_i = len(blocks)
+                    block_ids[id(edges)] = block_i
+                    if type(edges) is not _FrozenEdges:
+                        edges = _FrozenEdges.compile(edges, num_nodes)
+                    blocks.append(edges)
+                edge_types.append([edge_type, block_i])
+            snapshots.append([ssid, edge_types])
+        # get the unique tables, and the unique pages of the tables
+        pages = []
+        page_ids = dict() # key is id(page), value is the index in pages
+        table_pages = [] # the indexes of the pages of each table, -1 if the page is None
+        table_ids = dict() # key is id(table_rows), value is the index in table_pages
+        snapshot_tables = []
+        for ssid, tables_map in self._tables.items():
+            table_names = []
+            for table, table_rows in tables_map.items():
+                table_i = table_ids.get(id(table_rows))
+                if table_i is None:
+                    table_i = len(table_pages)
+                    table_ids[id(table_rows)] = table_i
+                    pages_i = []
+                    for page in table_rows.pages:
+                        if page is None:
+                            pages_i.append(-1)
+                            continue
+                        page_i = page_ids.get(id(page))
+                        if page_i is None:
+                            page_i = len(pages)
+                            page_ids[id(page)] = page_i
+                            pages.append(page)
+                        pages_i.append(page_i)
+                    table_pages.append(pages_i)
+                table_names.append([table, table_i])
+            snapshot_tables.append([ssid, table_names])
+        # create the header
+        header = {
+            'node_names': self._node_names,
+            'node_props': [[prop_name, list(col.keys()), list(col.values())] 
+                for prop_name, col in self._node_props.items()],
+            'edge_types': [[edge_type, rev] for edge_type, rev in self._edges_reversed.items()],
+            'snapshots': snapshots,
+            'curr_ssid': self._curr_ssid,
+            'next_ssid': self._next_ssid,
+            'frozen': sorted(self._frozen),
+            'counters': self._counters,
+            'table_types': [[table, width, typecode] 
+                for table, (width, typecode) in self._table_types.items()],
+            'snapshot_tables': snapshot_tables,
+            'table_pages': table_pages,
+            'table_page_rows': _TABLE_PAGE_ROWS
+        }
+        _write_graph_file(filepath, header, blocks, pages)
+    # ----------------------------------------------------------------------------------------------
+    def load(self, filepath, use_mmap = False):
+        """
+        Load a graph from a binary file created by save(). All the nodes, edges and snapshots in this
+        graph are replaced.
+
+        The edges are loaded as compressed sparse rows, see freeze(). Snapshots that were not frozen
+        when saved can be modified, the edges of each edge type are converted back to dicts when
+        they are first modified. The tables are always read into memory.
+
+        If `use_mmap` is True, the file is memory-mapped, and the edges are read from the file only
+        when they are needed. Memory-mapping requires Python 3, otherwise the file is read.
+
+        :param filepath: (str) The path of the file.
+        :param use_mmap: (bool) If True, memory-map the file.
+        :return: No value.
+        """
+        if self._pinned:
+            raise Exception('The graph cannot be loaded while it has views.')
+        if self._journal is not None:
+            raise Exception('The graph cannot be loaded while it has a journal.')
+        header, blocks, tables = _read_graph_file(filepath, use_mmap)
+        # delete the files of spilled snapshots
+        for edge_types_map in self._edges.values():
+            if type(edge_types_map) is _SpilledSnapshot:
+                edge_types_map.discard()
+        # nodes
+        names = header['node_names']
+        self._node_ids = dict(zip(names, range(len(names))))
+        self._node_names = names
+        self._node_props = OrderedDict()
+        for prop_name, node_ids, values in header['node_props']:
+            self._node_props[prop_name] = dict(zip(node_ids, values))
+        # edges
+        self._edges_reversed = dict()
+        for edge_type, rev in header['edge_types']:
+            self._edges_reversed[edge_type] = rev
+        self._edges = dict()
+        for ssid, edge_types in header['snapshots']:
+            self._edges[ssid] = OrderedDict(
+                [(edge_type, blocks[block_i]) for edge_type, block_i in edge_types])
+        # snapshots
+        self._curr_ssid = header['curr_ssid']
+        self._next_ssid = header['next_ssid']
+        self._frozen = set(header['frozen'])
+        self._ss_used = OrderedDict([(ssid, None) for ssid, _ in header['snapshots']])
+        del self._ss_used[self._curr_ssid]
+        self._ss_used[self._curr_ssid] = None
+        # counters, files saved before counters existed have none
+        self._counters = dict(header.get('counters', {}))
+        # tables, files saved before tables existed have none
+        self._table_types = OrderedDict()
+        for table, width, typecode in header.get('table_types', []):
+            self._table_types[table] = (width, typecode)
+        self._tables = dict([(ssid, dict()) for ssid in self._edges])
+        table_blocks = dict() # key is the index of the table in the file, value is a _Table
+        for ssid, table_names in header.get('snapshot_tables', []):
+            for table, table_i in table_names:
+                if not table_i in table_blocks:
+                    table_blocks[table_i] = _read_table(header, tables, table_i, 
+                        self._table_types[table])
+                self._tables[ssid][table] = table_blocks[table_i]
+    # ----------------------------------------------------------------------------------------------
+    def set_concurrent(self, concurrent):
+        """
+        Turn the concurrent mode on or off. In concurrent mode, the graph can be read by multiple
+        threads using views, see new_view(), while one thread modifies the graph.
+
+        In concurrent mode, all the methods that modify the graph, and the methods that create and
+        release views, are serialized with a lock. Reading a view does not use the lock. Reading
+        the graph directly is only safe when no other thread is modifying it.
+
+        The concurrent mode should be turned on before starting the threads. When it is off, there
+        is no locking overhead.
+
+        :param concurrent: (bool) True to turn on the concurrent mode, False to turn it off.
+        :return: No value.
+        """
+        if concurrent == (self._lock is not None):
+            return
+        if concurrent:
+            lock = threading.RLock()
+            for name in _LOCKED_METHODS:
+                setattr(self, name, _locked(getattr(self, name), lock))
+            self._lock = lock
+        else:
+            for name in _LOCKED_METHODS:
+                delattr(self, name)
+            self._lock = None
+    # ----------------------------------------------------------------------------------------------
+    def is_concurrent(self):
+        """
+        Return True if the concurrent mode is on, see set_concurrent().
+
+        :return: (bool) True if the concurrent mode is on, false otherwise.
+        """
+        return self._lock is not None
+    # ----------------------------------------------------------------------------------------------
+    def new_view(self, ssid = None):
+        """
+        Create a read-only view of a snapshot. If `ssid` is None, the current active snapshot is
+        used.
+
+        The view is pinned to a new snapshot that shares the edges of the existing snapshot, so no
+        edges are copied. Changes made to the graph after the view is created are not seen by the
+        view, except for changes to node properties. The pinned snapshot cannot be modified,
+        deleted or spilled until the view is released, see release_view().
+
+        A view has the same read methods as a graph, and can be read by other threads without
+        locking, see set_concurrent().
+
+        :param ssid: (int | None) The ssid of an existing snapshot, or None.
+        :return: (GraphView) The view.
+        """
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        if not ssid in self._edges:
+            raise Exception('Snapshot ID does not exist.')
+        view_ssid = self._create_snapshot(ssid)
+        self._pinned.add(view_ssid)
+        if ssid in self._frozen:
+            self._frozen.add(view_ssid)
+        return GraphView(self, view_ssid)
+    # ----------------------------------------------------------------------------------------------
+    def release_view(self, view):
+        """
+        Release a view created by new_view(), and delete the snapshot that it is pinned to. The view
+        can no longer be read.
+
+        :param view: (GraphView) The view.
+        :return: No value.
+        """
+        if not view.ssid in self._pinned:
+            raise Exception('The view has already been released.')
+        self._pinned.discard(view.ssid)
+        self.delete_snapshot(view.ssid)
+    # ----------------------------------------------------------------------------------------------
+    def start_journal(self, filepath):
+        """
+        Start recording all changes to the graph in a journal file. If the file exists, it is
+        overwritten. 
+
+        Every change to the nodes, the node properties, the edges, the tables and the snapshots is 
+        appended to
+        the journal as a small binary record. The journal can then be replayed onto a copy of the
+        graph as it was when the journal was started, see replay_journal(). So a graph can be
+        recovered by loading the last checkpoint and replaying the journal, see checkpoint().
+
+        Records are buffered, see flush_journal(). Spilling snapshots and retention policies are
+        not recorded, but the snapshots that they delete are.
+
+        :param filepath: (str) The path of the journal file.
+        :return: No value.
+        """
+        if self._journal is not None:
+            self.stop_journal()
+        self._journal = _Journal(filepath, {
+            'num_nodes': len(self._node_names),
+            'next_ssid': self._next_ssid
+        })
+    # ----------------------------------------------------------------------------------------------
+    def stop_journal(self):
+        """
+        Stop recording changes, and close the journal file. If there is no journal, nothing happens.
+
+        :return: No value.
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+    # ----------------------------------------------------------------------------------------------
+    def flush_journal(self, sync = False):
+        """
+        Write the buffered records to the journal file. If `sync` is True, also wait until the file
+        is written to disk.
+
+        :param sync: (bool) If True, sync the file to disk.
+        :return: No value.
+        """
+        if self._journal is None:
+            raise Exception('The graph does not have a journal.')
+        self._journal.flush(sync)
+    # ----------------------------------------------------------------------------------------------
+    def is_journaling(self):
+        """
+        Return True if changes are being recorded in a journal, see start_journal().
+
+        :return: (bool) True if there is a journal, false otherwise.
+        """
+        return self._journal is not None
+    # ----------------------------------------------------------------------------------------------
+    def replay_journal(self, filepath, offset = 0):
+        """
+        Replay the changes recorded in a journal file. The graph must be in the same state as the
+        graph was when the journal was started, otherwise an error is thrown.
+
+        If `offset` is not 0, only the records from that position in the file onwards are replayed.
+        This allows another process to follow a journal while it is being written, by passing the
+        offset returned by the previous call. An incomplete record at the end of the file, for
+        example after a crash, is ignored.
+
+        :param filepath: (str) The path of the journal file.
+        :param offset: (int) The position in the file of the first record to replay, or 0.
+        :return: (int) The position in the file after the last record that was replayed.
+        """
+        header, records = _read_journal(filepath)
+        if offset == 0 and (header['num_nodes'] != len(self._node_names) or 
+                header['next_ssid'] != self._next_ssid):
+            raise Exception('The journal does not match the graph.')
+        names = self._node_names
+        edge_types = [] # the edge types and counters in the journal, the index is the code
+        end = offset
+        for op, payload, start, end_record in records:
+            if op == _J_EDGE_TYPE:
+                edge_types.append(json.loads(payload.decode('utf-8')))
+            if start < offset:
+                continue
+            end = end_record
+            if op == _J_ADD_NODE:
+                self.add_node(payload.decode('utf-8'))
+            elif op == _J_ADD_NODES:
+                nodes, props = json.loads(payload.decode('utf-8'))
+                self.add_nodes(nodes, props)
+            elif op == _J_SET_NODE_PROP:
+                node_id, prop_name, prop_value = json.loads(payload.decode('utf-8'))
+                self.set_node_prop(names[node_id], prop_name, prop_value)
+            elif op == _J_ADD_EDGE_TYPE:
+                edge_type, rev = json.loads(payload.decode('utf-8'))
+                self.add_edge_type(edge_type, rev)
+            elif op == _J_ADD_EDGE:
+                code, ssid, node0_id, node1_id = _J_EDGE.unpack(payload)
+                self.add_edge_id(node0_id, node1_id, edge_types[code], ssid)
+            elif op == _J_ADD_EDGES:
+                code, ssid = _J_EDGES.unpack_from(payload)
+                ids = _unpack_ids(payload, _J_EDGES.size)
+                self.add_edges_id(list(zip(ids[0::2], ids[1::2])), edge_types[code], ssid)
+            elif op == _J_DEL_EDGE:
+                code, ssid, node0_id, node1_id = _J_DEL.unpack(payload)
+                self.del_edge(None if node0_id == -1 else names[node0_id], 
+                    None if node1_id == -1 else names[node1_id], edge_types[code], ssid)
+            elif op == _J_SET_ROW:
+                code, ssid, direction, node_id = _J_ROW.unpack_from(payload)
+                row = [names[row_id] for row_id in _unpack_ids(payload, _J_ROW.size)]
+                if direction == Graph.FWD:
+                    self.set_successors(names[node_id], row, edge_types[code], ssid)
+                else:
+                    self.set_predecessors(names[node_id], row, edge_types[code], ssid)
+            elif op == _J_SET_COUNTER:
+                code, value = _J_COUNTER.unpack(payload)
+                self.set_counter(edge_types[code], value)
+            elif op == _J_ADD_TABLE:
+                table, width, typecode = json.loads(payload.decode('utf-8'))
+                self.add_table(table, width, typecode)
+            elif op == _J_SET_TABLE_ROWS:
+                code, ssid, num_rows = _J_TABLE.unpack_from(payload)
+                pos = _J_TABLE.size + num_rows * 4
+                node_ids = list(struct.unpack_from('<' + str(num_rows) + 'i', payload, _J_TABLE.size))
+                values = struct.unpack_from('<' + str((len(payload) - pos) // 8) + 'd', payload, pos)
+                width = self._table_types[edge_types[code]][0]
+                rows = [values[i:i + width] for i in range(0, len(values), width)]
+                self.set_table_rows(node_ids, rows, edge_types[code], ssid)
+            elif op == _J_DEL_NODES:
+                ssid, _ = _J_SNAPSHOT.unpack_from(payload)
+                self.del_nodes([names[node_id] for node_id in _unpack_ids(payload, _J_SNAPSHOT.size)],
+                    ssid)
+            elif op == _J_NEW_SNAPSHOT:
+                new_ssid, ssid = _J_SNAPSHOT.unpack(payload)
+                self._next_ssid = new_ssid
+                self._create_snapshot(None if ssid == -1 else ssid)
+            elif op != _J_EDGE_TYPE:
+                ssid, _ = _J_SNAPSHOT.unpack(payload)
+                if op == _J_SET_ACTIVE:
+                    self.set_active_snapshot(ssid)
+                elif op == _J_CLEAR_SNAPSHOT:
+                    self.clear_snapshot(ssid)
+                elif op == _J_DELETE_SNAPSHOT:
+                    self.delete_snapshot(ssid)
+                elif op == _J_FREEZE:
+                    self.freeze(ssid)
+                elif op == _J_THAW:
+                    self.thaw(ssid)
+                else:
+                    raise Exception('Journal record type does not exist.')
+        return end
+    # ----------------------------------------------------------------------------------------------
+    def checkpoint(self, filepath):
+        """
+        Save the whole graph to a binary file, see save(), and restart the journal, so that it only
+        records the changes made after the checkpoint. If there is no journal, the graph is just
+        saved. 
+
+        To recover the graph, load the checkpoint, see load(), and then replay the journal, see
+        replay_journal().
+
+        :param filepath: (str) The path of the checkpoint file.
+        :return: No value.
+        """
+        self.save(filepath)
+        if self._journal is not None:
+            self.start_journal(self._journal.filepath)
+    # ----------------------------------------------------------------------------------------------
+    def to_string(self):
+        """
+        Creates a human-readable string representation of the graph, for debugging.
+
+        :return: A string representation of the graph.
+        """
+        names = self._node_names
         info = '\n\n=GRAPH=\n'
         info += 'NODES = ' + str(self.get_nodes()) + '\n'
         for ssid, edge_types_map in self._edges.items():
@@ -522,27 +2034,1258 @@ class Graph(object):
             for edge_type, fr_edges_map in edge_types_map.items():
                 info += '    EDGE TYPE = ' + edge_type + ', reverse = ' + \
                     str(self._edges_reversed[edge_type]) + '\n'
-                if Graph.FWD in fr_edges_map:
-                    # fwd edges
-                    for start, end in fr_edges_map[Graph.FWD].items():
-                        info += '      FWD EDGE: ' + start + ' -> '
-                        type_end = type(end)
-                        if type_end is set or type_end is OrderedDict:
-                            info += str(list(end)) + '\n'
-                        else:
-                            info += str(end) + '\n'
-                    # rev edges
-                    if self._edges_reversed[edge_type]:
-                        for start, end in fr_edges_map[Graph.REV].items():
-                            info += '      REV EDGE: '
-                            type_end = type(end)
-                            if type_end is set or type_end is OrderedDict:
-                                info += str(list(end))
-                            else:
-                                info += end
-                            info += ' <- ' + start + '\n'
+                # fwd edges
+                for start, end in fr_edges_map[Graph.FWD].items():
+                    info += '      FWD EDGE: ' + str(names[start]) + ' -> '
+                    info += str([names[node_id] for node_id in end]) + '\n'
+                # rev edges
+                if self._edges_reversed[edge_type]:
+                    for start, end in fr_edges_map[Graph.REV].items():
+                        info += '      REV EDGE: '
+                        info += str([names[node_id] for node_id in end])
+                        info += ' <- ' + str(names[start]) + '\n'
         return info
+    # ==============================================================================================
+    # PRIVATE METHODS
+    # ==============================================================================================
+    def _get_prop_col(self, prop_name):
+        """
+        Get the column for property prop_name. If the column does not exist yet, it is created.
+        """
+        col = self._node_props.get(prop_name)
+        if col is None:
+            col = dict()
+            self._node_props[prop_name] = col
+        return col
+    # ----------------------------------------------------------------------------------------------
+    def _create_snapshot(self, ssid):
+        """
+        Create a new snapshot, and return the new ssid. If ssid is None, the new snapshot is empty,
+        otherwise it shares the edges of snapshot ssid. The new snapshot is not set as the active
+        snapshot.
+        """
+        new_ssid = self._next_ssid
+        self._next_ssid += 1
+        if ssid is None:
+            self._edges[new_ssid] = OrderedDict()
+        else:
+            # from now on, the edges can no longer be modified in place by either snapshot
+            edge_types_map = self._edges[ssid]
+            for edges in edge_types_map.values():
+                edges.owner = None
+            self._edges[new_ssid] = OrderedDict(edge_types_map)
+        # tables are shared in the same way
+        self._tables[new_ssid] = dict()
+        if ssid is not None:
+            for table_rows in self._tables[ssid].values():
+                table_rows.owner = None
+            self._tables[new_ssid].update(self._tables[ssid])
+        self._ss_used[new_ssid] = None
+        if self._journal is not None:
+            self._journal.snapshot(_J_NEW_SNAPSHOT, new_ssid, -1 if ssid is None else ssid)
+        return new_ssid
+    # ----------------------------------------------------------------------------------------------
+    def _get_rows(self, edge_type, direction, ssid):
+        """
+        Get the forward or reverse rows of edges of type edge_type in snapshot ssid, for reading.
+        If ssid is None, the current active snapshot is used. If there are no edges, None is
+        returned. If the edge type does not exist, or has no reverse edges, an error is thrown.
+        """
+        if not edge_type in self._edges_reversed :
+            raise Exception('Edge type does not exist.')
+        if direction == Graph.REV and not self._edges_reversed[edge_type]:
+            raise Exception('Edge types "' + edge_type + '" does not have reverse edges.')
+        # get ssid
+        if ssid is None: ssid = self._curr_ssid
+        edges = self._edges[ssid].get(edge_type)
+        if edges is None:
+            return None
+        return edges[direction]
+    # ----------------------------------------------------------------------------------------------
+    def _get_edges_for_write(self, edge_type, ssid):
+        """
+        Get the forward and reverse edges of type edge_type in snapshot ssid, so that they can be
+        modified. If the edges do not exist yet, they are created. If the edges are shared with other
+        snapshots, they are first copied. If the snapshot is frozen, an error is thrown.
+        """
+        if ssid in self._frozen:
+            raise Exception('Snapshot is frozen.')
+        if ssid in self._pinned:
+            raise Exception('Snapshot is pinned by a view.')
+        edges = self._edges[ssid].get(edge_type)
+        if edges is None:
+            edges = _Edges(_odict(), _odict() if self._edges_reversed[edge_type] else None, ssid)
+            self._edges[ssid][edge_type] = edges
+        elif edges.owner != ssid:
+            edges = edges.copy(ssid)
+            self._edges[ssid][edge_type] = edges
+        return edges
+    # ----------------------------------------------------------------------------------------------
+    def _get_table_for_write(self, table, ssid):
+        """
+        Get the rows of a table in snapshot ssid, so that they can be modified, in the same way as
+        _get_edges_for_write().
+        """
+        if ssid in self._frozen:
+            raise Exception('Snapshot is frozen.')
+        if ssid in self._pinned:
+            raise Exception('Snapshot is pinned by a view.')
+        table_rows = self._tables[ssid].get(table)
+        if table_rows is None:
+            if not table in self._table_types:
+                raise Exception('Table does not exist.')
+            width, typecode = self._table_types[table]
+            table_rows = _Table(typecode, width, ssid)
+            self._tables[ssid][table] = table_rows
+        elif table_rows.owner != ssid:
+            table_rows = table_rows.copy(ssid)
+            self._tables[ssid][table] = table_rows
+        return table_rows
+    # ----------------------------------------------------------------------------------------------
+    def _apply_retention_policy(self):
+        """
+        Delete old snapshots until the retention policy is met, see set_snapshot_policy().
+        Returns a list of the ssids of the deleted snapshots.
+        """
+        max_snapshots, max_bytes, lru = self._ss_policy
+        # get the snapshots that can be deleted, in the order they should be deleted
+        ssids = list(self._ss_used.keys()) if lru else sorted(self._edges.keys())
+        ssids = [ssid for ssid in ssids if ssid != self._curr_ssid and ssid not in self._pinned]
+        ssids.reverse()
+        deleted = []
+        # delete by number
+        if max_snapshots is not None:
+            while ssids and len(self._edges) > max_snapshots:
+                deleted.append(ssids.pop())
+                self.delete_snapshot(deleted[-1])
+        # delete by size
+        if max_bytes is not None:
+            while ssids and self.get_snapshots_size() > max_bytes:
+                deleted.append(ssids.pop())
+                self.delete_snapshot(deleted[-1])
+        return deleted
 # ==================================================================================================
 # END GRAPH CLASS
 # ==================================================================================================
 
+
+# ==================================================================================================
+# GRAPH VIEW CLASS
+# ==================================================================================================
+# the graph methods that are serialized in concurrent mode, see Graph.set_concurrent()
+_LOCKED_METHODS = (
+    'add_node', 'add_nodes', 'set_node_prop', 'add_edge', 'add_edge_id', 'add_edges', 
+    'add_edges_id', 'del_edge', 'add_edge_type', 'set_successors', 'set_predecessors', 
+    'redirect_edges_id', 'del_node', 'del_nodes', 'compact', 'reserve_ids', 'set_counter', 
+    'add_table', 'set_table_row', 'set_table_rows', 'del_table_row', 
+    'new_snapshot', 'set_active_snapshot', 'clear_snapshot', 'delete_snapshot', 
+    'set_snapshot_policy', 'set_spill_policy', 'apply_snapshot_policy', 'spill_snapshot', 
+    'freeze', 'thaw', 'load', 'new_view', 'release_view', 'start_journal', 'stop_journal', 
+    'flush_journal', 'replay_journal', 'checkpoint'
+)
+# the graph methods of a view that read the snapshot of the view
+_VIEW_SNAPSHOT_METHODS = (
+    'get_nodes_with_out_edge', 'get_nodes_with_in_edge', 'has_edge', 'successors', 
+    'successors_id', 'predecessors', 'predecessors_id', 'degree_in', 'degree_out', 'degree', 
+    'traverse', 'is_frozen', 'nodes_with_out_edge_view', 'nodes_with_in_edge_view', 
+    'count_nodes_with_out_edge', 'count_nodes_with_in_edge', 'has_out_edge', 'has_in_edge', 
+    'successors_view', 'predecessors_view', 'get_table_row', 'get_table_rows', 
+    'get_table_node_ids'
+)
+# the graph methods of a view that read the nodes, which are shared by all snapshots
+_VIEW_NODE_METHODS = (
+    'get_node_id', 'get_node_name', 'get_node_prop', 'get_node_prop_names', 'get_nodes', 
+    'has_node', 'has_edge_type', 'nodes_view', 'num_nodes', 'get_counter', 'has_table'
+)
+# --------------------------------------------------------------------------------------------------
+class GraphView(object):
+    # a read-only view of a graph, pinned to a snapshot, see Graph.new_view()
+    # 
+    # the read methods are bound to the graph when the view is created, with the ssid of the
+    # snapshot, so calling them has almost no overhead
+    FWD = Graph.FWD
+    REV = Graph.REV
+    def __init__(self, graph, ssid):
+        self.graph = graph
+        self.ssid = ssid
+        for name in _VIEW_SNAPSHOT_METHODS:
+            setattr(self, name, partial(getattr(Graph, name), graph, ssid = ssid))
+        for name in _VIEW_NODE_METHODS:
+            setattr(self, name, getattr(Graph, name).__get__(graph))
+    # ----------------------------------------------------------------------------------------------
+    def get_active_snapshot(self):
+        """
+        Get the ID of the snapshot that the view is pinned to.
+
+        :return: (int) The ssid of the snapshot.
+        """
+        return self.ssid
+    # ----------------------------------------------------------------------------------------------
+    def __getattr__(self, name):
+        # only called for methods that are not read methods
+        raise AttributeError('Graph views are read-only, "' + name + '" is not available.')
+# --------------------------------------------------------------------------------------------------
+def _locked(method, lock):
+    """
+    Wrap a method so that it is called while holding the lock.
+    """
+    @wraps(method)
+    def locked_method(*args, **kwargs):
+        with lock:
+            return method(*args, **kwargs)
+    return locked_method
+# ==================================================================================================
+# END GRAPH VIEW CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# NODES VIEW CLASS
+# ==================================================================================================
+class NodesView(object):
+    # a read-only view of a collection of node names, backed by the node ids in the graph
+    # see Graph.successors_view(), Graph.nodes_view(), ...
+    # 
+    # the names are only looked up when the view is iterated or indexed, so creating a view, 
+    # counting the nodes, or checking if a node is in the view does not copy anything
+    # indexing is fast, except for rows in a dict, which are iterated up to the index without 
+    # copying them, to index such a view many times, first copy it into a list
+    # the view should not be used after the graph has been modified
+    __slots__ = ('ids', 'names', 'node_ids')
+    def __init__(self, ids, names, node_ids):
+        # a row, the rows of an edge type, or None for all nodes
+        self.ids = ids
+        self.names = names
+        self.node_ids = node_ids
+    # ----------------------------------------------------------------------------------------------
+    def __len__(self):
+        if self.ids is None:
+            return len(self.names)
+        return len(self.ids)
+    # ----------------------------------------------------------------------------------------------
+    def __iter__(self):
+        if self.ids is None:
+            return iter(self.names)
+        return _map(self.names.__getitem__, self.ids)
+    # ----------------------------------------------------------------------------------------------
+    def __contains__(self, node):
+        node_id = self.node_ids.get(node)
+        if node_id is None:
+            return False
+        return self.ids is None or node_id in self.ids
+    # ----------------------------------------------------------------------------------------------
+    def __getitem__(self, index):
+        # only a single index, not a slice
+        ids = self.ids
+        if ids is None:
+            return self.names[index]
+        if type(ids) is _CSRRows:
+            # the nodes with rows, in the order of iteration
+            ids = ids.keys
+        elif isinstance(ids, dict):
+            i = index + len(ids) if index < 0 else index
+            if not 0 <= i < len(ids):
+                raise IndexError('NodesView index out of range.')
+            return self.names[next(islice(ids, i, None))]
+        return self.names[ids[index]]
+    # ----------------------------------------------------------------------------------------------
+    def __repr__(self):
+        return 'NodesView(' + repr(list(self)) + ')'
+# ==================================================================================================
+# END NODES VIEW CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# EDGES CLASS
+# ==================================================================================================
+class _Edges(list):
+    # the forward and reverse edges of one edge type
+    # 
+    # the list has two items, the dict of forward rows and the dict of reverse rows (or None)
+    # 
+    # the edges can be shared by multiple snapshots, in which case the owner is None
+    # shared edges are never modified, a snapshot that needs to modify them first makes a copy
+    # the copy shares the rows with the base, and each row is only copied when first modified
+    # the ids of the rows that have been modified since the copy was made are kept in dirty
+    __slots__ = ('owner', 'base', 'dirty', '__weakref__')
+    def __init__(self, fwd, rev, owner, base = None):
+        list.__init__(self, [fwd, rev])
+        # the ssid of the snapshot that can modify these edges, or None if shared
+        self.owner = owner
+        # a weak reference to the edges that were copied, or None
+        self.base = None if base is None else weakref.ref(base)
+        # the ids of the modified fwd and rev rows, or None if all rows are new
+        self.dirty = None if base is None else [set(), set()]
+    # ----------------------------------------------------------------------------------------------
+    def copy(self, owner):
+        """
+        Make a copy of these edges. The rows are not copied.
+        """
+        rev = None if self[Graph.REV] is None else _odict(self[Graph.REV])
+        return _Edges(_odict(self[Graph.FWD]), rev, owner, self)
+    # ----------------------------------------------------------------------------------------------
+    def _row_for_write(self, direction, node0_id):
+        """
+        Get a row so that it can be modified, copying the row if it is shared with the base.
+        """
+        row = self[direction].get(node0_id)
+        if self.dirty is not None and node0_id not in self.dirty[direction]:
+            self.dirty[direction].add(node0_id)
+            if row is not None:
+                row = list(row) if type(row) is list else _odict(row)
+                self[direction][node0_id] = row
+        return row
+    # ----------------------------------------------------------------------------------------------
+    def add(self, direction, node0_id, node1_id):
+        """
+        Add node1_id to the row of node0_id. If the row becomes too large, it is converted to a dict.
+        """
+        rows = self[direction]
+        row = rows.get(node0_id)
+        if row is not None and node1_id in row:
+            return
+        if self.dirty is not None:
+            row = self._row_for_write(direction, node0_id)
+        if row is None:
+            rows[node0_id] = [node1_id]
+        elif type(row) is list:
+            row.append(node1_id)
+            if len(row) > _ROW_LIST_MAX:
+                rows[node0_id] = _odict.fromkeys(row)
+        else:
+            row[node1_id] = None # ADD TO ORDERED SET
+    # ----------------------------------------------------------------------------------------------
+    def add_pairs(self, direction, pairs):
+        """
+        Add multiple (node0_id, node1_id) pairs, same as calling add() for each pair.
+        """
+        rows = self[direction]
+        dirty = self.dirty
+        for node0_id, node1_id in pairs:
+            row = rows.get(node0_id)
+            if row is None:
+                rows[node0_id] = [node1_id]
+                if dirty is not None:
+                    dirty[direction].add(node0_id)
+                continue
+            if node1_id in row:
+                continue
+            if dirty is not None:
+                row = self._row_for_write(direction, node0_id)
+            if row is None:
+                rows[node0_id] = [node1_id]
+            elif type(row) is list:
+                row.append(node1_id)
+                if len(row) > _ROW_LIST_MAX:
+                    rows[node0_id] = _odict.fromkeys(row)
+            else:
+                row[node1_id] = None # ADD TO ORDERED SET
+    # ----------------------------------------------------------------------------------------------
+    def remove(self, direction, node0_id, node1_id):
+        """
+        Remove node1_id from the row of node0_id. Empty rows are removed.
+        """
+        row = self._row_for_write(direction, node0_id)
+        if type(row) is list:
+            row.remove(node1_id)
+        else:
+            row.pop(node1_id)
+        if not row:
+            del self[direction][node0_id]
+    # ----------------------------------------------------------------------------------------------
+    def pop_row(self, direction, node0_id):
+        """
+        Remove the row of node0_id and return it.
+        """
+        if self.dirty is not None:
+            self.dirty[direction].add(node0_id)
+        return self[direction].pop(node0_id)
+    # ----------------------------------------------------------------------------------------------
+    def set_row(self, direction, node0_id, node_ids):
+        """
+        Replace the row of node0_id. Duplicates are removed.
+        """
+        if self.dirty is not None:
+            self.dirty[direction].add(node0_id)
+        row = _odict.fromkeys(node_ids)
+        if not row:
+            self[direction].pop(node0_id, None)
+            return
+        if len(row) <= _ROW_LIST_MAX:
+            row = list(row)
+        self[direction][node0_id] = row
+# ==================================================================================================
+# END EDGES CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# FROZEN EDGES CLASS
+# ==================================================================================================
+class _FrozenEdges(list):
+    # the forward and reverse edges of one edge type, in a frozen snapshot
+    # 
+    # the list has two items, the forward rows and the reverse rows (or None), as _CSRRows
+    # the rows are read in the same way as the dicts of rows in _Edges
+    # 
+    # frozen edges are never modified, they are always shared, so the owner is None
+    # a snapshot that needs to modify them first makes a copy, which is an _Edges
+    __slots__ = ('owner', 'base', 'dirty', '__weakref__')
+    def __init__(self, fwd, rev, base = None):
+        list.__init__(self, [fwd, rev])
+        self.owner = None
+        # a weak reference to the edges that were compiled, or None
+        self.base = None if base is None else weakref.ref(base)
+        # no rows are modified, the rows are the same as the base
+        self.dirty = None if base is None else [set(), set()]
+    # ----------------------------------------------------------------------------------------------
+    @staticmethod
+    def compile(edges, num_nodes):
+        """
+        Compile the dicts of rows in an _Edges into compressed sparse rows.
+        """
+        rev = None if edges[Graph.REV] is None else _CSRRows.compile(edges[Graph.REV], num_nodes)
+        return _FrozenEdges(_CSRRows.compile(edges[Graph.FWD], num_nodes), rev, edges)
+    # ----------------------------------------------------------------------------------------------
+    def copy(self, owner):
+        """
+        Make a copy of these edges, as an _Edges with dicts of rows.
+        """
+        rev = None if self[Graph.REV] is None else self[Graph.REV].to_dict()
+        return _Edges(self[Graph.FWD].to_dict(), rev, owner, self)
+# --------------------------------------------------------------------------------------------------
+class _CSRRows(object):
+    # the rows of one direction of one edge type, as compressed sparse rows
+    # 
+    # if most nodes have a row, the offsets are dense, indexed by node id
+    # the row of node_id is targets[offsets[node_id]:offsets[node_id + 1]]
+    # 
+    # otherwise, the offsets are sparse, and index maps each node id to a position in the offsets
+    # the row of node_id is targets[offsets[i]:offsets[i + 1]], where i = index[node_id]
+    # 
+    # keys are the ids of the nodes with non-empty rows, in the order of the dict they came from
+    __slots__ = ('keys', 'index', 'offsets', 'targets')
+    def __init__(self, keys, offsets, targets, dense):
+        self.keys = keys
+        self.index = None if dense else dict(zip(keys, range(len(keys))))
+        self.offsets = offsets
+        self.targets = targets
+    # ----------------------------------------------------------------------------------------------
+    @staticmethod
+    def compile(rows, num_nodes):
+        """
+        Compile a dict of rows into compressed sparse rows.
+        """
+        keys = array(_ID_TYPECODE, rows)
+        dense = len(rows) * _CSR_SPARSE_RATIO >= num_nodes
+        if dense:
+            # count the nodes in each row, then convert the counts to offsets
+            counts = [0] * (num_nodes + 1)
+            for node_id, row in rows.items():
+                counts[node_id + 1] = len(row)
+            offsets = array(_ID_TYPECODE, _accumulate(counts))
+            targets = array(_ID_TYPECODE, chain.from_iterable(map(rows.__getitem__, sorted(rows))))
+        else:
+            # the rows are stored in the order of the keys
+            offsets = array(_ID_TYPECODE, _accumulate([0] + [len(row) for row in rows.values()]))
+            targets = array(_ID_TYPECODE, chain.from_iterable(rows.values()))
+        return _CSRRows(keys, offsets, targets, dense)
+    # ----------------------------------------------------------------------------------------------
+    def get(self, node_id, default = None):
+        offsets = self.offsets
+        if self.index is None:
+            try:
+                start = offsets[node_id]
+                end = offsets[node_id + 1]
+            except (IndexError, TypeError):
+                return default
+            if start == end:
+                return default
+        else:
+            i = self.index.get(node_id)
+            if i is None:
+                return default
+            start = offsets[i]
+            end = offsets[i + 1]
+        return self.targets[start:end]
+    # ----------------------------------------------------------------------------------------------
+    def __contains__(self, node_id):
+        return self.get(node_id) is not None
+    # ----------------------------------------------------------------------------------------------
+    def __getitem__(self, node_id):
+        row = self.get(node_id)
+        if row is None:
+            raise KeyError(node_id)
+        return row
+    # ----------------------------------------------------------------------------------------------
+    def __iter__(self):
+        return iter(self.keys)
+    # ----------------------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.keys)
+    # ----------------------------------------------------------------------------------------------
+    def items(self):
+        for node_id in self.keys:
+            yield node_id, self.get(node_id)
+    # ----------------------------------------------------------------------------------------------
+    def to_dict(self):
+        """
+        Convert the rows back to a dict of rows, the same as in _Edges.
+        """
+        rows = _odict()
+        for node_id, row in self.items():
+            row = row.tolist()
+            rows[node_id] = row if len(row) <= _ROW_LIST_MAX else _odict.fromkeys(row)
+        return rows
+# ==================================================================================================
+# END FROZEN EDGES CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# TABLE CLASS
+# ==================================================================================================
+class _Table(object):
+    # the rows of a table in a snapshot, see Graph.add_table()
+    # 
+    # the rows are stored in pages, each a flat array with _TABLE_PAGE_ROWS rows, and the row of 
+    # node_id starts at (node_id % _TABLE_PAGE_ROWS) * width in page node_id // _TABLE_PAGE_ROWS
+    # rows that are not set are filled with NaN, and pages with no rows that were set are None
+    # owner is the ssid of the snapshot that can modify the table, or None if it is shared
+    # pages can be shared by copies of the table, owned is the set of the indexes of the pages that
+    # this table can modify in place, the other pages are copied when they are first modified
+    __slots__ = ('pages', 'owned', 'typecode', 'width', 'owner')
+    def __init__(self, typecode, width, owner, pages = None):
+        self.pages = [] if pages is None else pages
+        self.owned = set()
+        self.typecode = typecode
+        self.width = width
+        self.owner = owner
+    # ----------------------------------------------------------------------------------------------
+    @staticmethod
+    def from_array(values, width, owner):
+        """
+        Create a table from a flat array of rows.
+        """
+        table_rows = _Table(values.typecode, width, owner)
+        size = _TABLE_PAGE_ROWS * width
+        for start in range(0, len(values), size):
+            page = values[start:start + size]
+            if len(page) < size:
+                page.extend(repeat(_NAN, size - len(page)))
+            is_set = any(value == value for value in page[::width])
+            table_rows.pages.append(page if is_set else None)
+        return table_rows
+    # ----------------------------------------------------------------------------------------------
+    def copy(self, owner):
+        """
+        Create a copy of the table, for a snapshot. The pages are shared, and are copied when they 
+        are first modified.
+        """
+        return _Table(self.typecode, self.width, owner, list(self.pages))
+    # ----------------------------------------------------------------------------------------------
+    def get(self, node_id, default = None):
+        """
+        Get the row of a node as a list, or the default if the row is not set.
+        """
+        page_i = node_id // _TABLE_PAGE_ROWS
+        if page_i >= len(self.pages):
+            return default
+        page = self.pages[page_i]
+        if page is None:
+            return default
+        start = (node_id - page_i * _TABLE_PAGE_ROWS) * self.width
+        row = page[start:start + self.width].tolist()
+        if row[0] != row[0]:
+            return default
+        return row
+    # ----------------------------------------------------------------------------------------------
+    def get_rows(self, node_ids):
+        """
+        Get the rows of multiple nodes as lists, or None for the rows that are not set.
+        """
+        pages = self.pages
+        num_pages = len(pages)
+        width = self.width
+        rows = []
+        append = rows.append
+        for node_id in node_ids:
+            page_i = node_id // _TABLE_PAGE_ROWS
+            page = pages[page_i] if page_i < num_pages else None
+            if page is None:
+                append(None)
+                continue
+            start = (node_id - page_i * _TABLE_PAGE_ROWS) * width
+            row = page[start:start + width].tolist()
+            append(row if row[0] == row[0] else None)
+        return rows
+    # ----------------------------------------------------------------------------------------------
+    def node_ids(self):
+        """
+        Get the ids of the nodes that have a row.
+        """
+        return list(chain.from_iterable(self._page_node_ids(page_i) 
+            for page_i in range(len(self.pages))))
+    # ----------------------------------------------------------------------------------------------
+    def diff_node_ids(self, other):
+        """
+        Get the ids of the nodes with rows that differ from the rows in another table, including 
+        rows that are only set in one of the tables. Pages that are shared are skipped.
+        """
+        node_ids = []
+        for page_i in range(max(len(self.pages), len(other.pages))):
+            page_a = self.pages[page_i] if page_i < len(self.pages) else None
+            page_b = other.pages[page_i] if page_i < len(other.pages) else None
+            if page_a is page_b:
+                continue
+            page_ids = set(self._page_node_ids(page_i))
+            page_ids.update(other._page_node_ids(page_i))
+            node_ids.extend(node_id for node_id in sorted(page_ids) 
+                if self.get(node_id) != other.get(node_id))
+        return node_ids
+    # ----------------------------------------------------------------------------------------------
+    def set_row(self, node_id, row):
+        """
+        Set the row of a node.
+        """
+        page_i = node_id // _TABLE_PAGE_ROWS
+        start = (node_id - page_i * _TABLE_PAGE_ROWS) * self.width
+        self._page_for_write(page_i)[start:start + self.width] = array(self.typecode, row)
+    # ----------------------------------------------------------------------------------------------
+    def set_rows(self, node_ids, rows):
+        """
+        Set the rows of multiple nodes. Rows for a range of consecutive nodes are set in one step
+        for each page.
+        """
+        if not node_ids:
+            return
+        width = self.width
+        first = node_ids[0]
+        last = node_ids[-1]
+        if last - first == len(node_ids) - 1 and node_ids == list(range(first, last + 1)):
+            values = array(self.typecode, chain.from_iterable(rows))
+            node_id = first
+            while node_id <= last:
+                page_i = node_id // _TABLE_PAGE_ROWS
+                page_start = page_i * _TABLE_PAGE_ROWS
+                end = min(last + 1, page_start + _TABLE_PAGE_ROWS)
+                self._page_for_write(page_i)[(node_id - page_start) * width:(end - page_start) * 
+                    width] = values[(node_id - first) * width:(end - first) * width]
+                node_id = end
+            return
+        page_i = -1
+        page = None
+        for node_id, row in zip(node_ids, rows):
+            if node_id // _TABLE_PAGE_ROWS != page_i:
+                page_i = node_id // _TABLE_PAGE_ROWS
+                page = self._page_for_write(page_i)
+            start = (node_id - page_i * _TABLE_PAGE_ROWS) * width
+            for i in range(width):
+                page[start + i] = row[i]
+    # ----------------------------------------------------------------------------------------------
+    def clear_rows(self, node_ids):
+        """
+        Set the rows of multiple nodes to NaN.
+        """
+        self.set_rows(node_ids, [[_NAN] * self.width] * len(node_ids))
+    # ----------------------------------------------------------------------------------------------
+    def to_array(self):
+        """
+        Get all the rows as one flat array, up to the last page that has rows.
+        """
+        pages = list(self.pages)
+        while pages and pages[-1] is None:
+            pages.pop()
+        values = array(self.typecode)
+        empty = None
+        for page in pages:
+            if page is None:
+                if empty is None:
+                    empty = array(self.typecode, repeat(_NAN, _TABLE_PAGE_ROWS * self.width))
+                page = empty
+            values.extend(page)
+        return values
+    # ----------------------------------------------------------------------------------------------
+    def remap(self, new_ids):
+        """
+        Create a new table, with the rows moved from node_id to new_ids[node_id], see 
+        Graph.compact().
+        """
+        table_rows = _Table(self.typecode, self.width, self.owner)
+        node_ids = [node_id for node_id in self.node_ids() if new_ids[node_id] != -1]
+        table_rows.set_rows([new_ids[node_id] for node_id in node_ids], 
+            [self.get(node_id) for node_id in node_ids])
+        return table_rows
+    # ----------------------------------------------------------------------------------------------
+    def _page_node_ids(self, page_i):
+        """
+        Get the ids of the nodes that have a row in a page.
+        """
+        page = self.pages[page_i] if page_i < len(self.pages) else None
+        if page is None:
+            return []
+        page_start = page_i * _TABLE_PAGE_ROWS
+        return [page_start + i for i, value in enumerate(page[::self.width]) if value == value]
+    # ----------------------------------------------------------------------------------------------
+    def _page_for_write(self, page_i):
+        """
+        Get a page so that it can be modified. If the page does not exist yet, it is created. If 
+        the page is shared with other tables, it is first copied.
+        """
+        pages = self.pages
+        if page_i >= len(pages):
+            pages.extend(repeat(None, page_i + 1 - len(pages)))
+        page = pages[page_i]
+        if page is None:
+            page = array(self.typecode, repeat(_NAN, _TABLE_PAGE_ROWS * self.width))
+        elif page_i in self.owned:
+            return page
+        else:
+            page = page[:]
+        pages[page_i] = page
+        self.owned.add(page_i)
+        return page
+# --------------------------------------------------------------------------------------------------
+# an empty table, used when comparing snapshots
+_EMPTY_TABLE = _Table('d', 1, None)
+# ==================================================================================================
+# END TABLE CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# SPILLED SNAPSHOT CLASS
+# ==================================================================================================
+class _SpilledSnapshot(object):
+    # a snapshot that has been spilled to a file, see Graph.spill_snapshot()
+    # 
+    # it takes the place of the OrderedDict of edges of the snapshot, and can be read in the same way
+    # when it is first read, the edges are reloaded from the file and put back in the graph
+    __slots__ = ('graph', 'ssid', 'filepath', 'edge_types_map')
+    def __init__(self, graph, ssid, filepath):
+        self.graph = weakref.ref(graph)
+        self.ssid = ssid
+        self.filepath = filepath
+        # the reloaded edges, or None
+        self.edge_types_map = None
+    # ----------------------------------------------------------------------------------------------
+    def read(self):
+        """
+        Read the edges from the file, as an OrderedDict of frozen edges.
+        """
+        if self.edge_types_map is not None:
+            return self.edge_types_map
+        header, blocks, _ = _read_graph_file(self.filepath, False)
+        return OrderedDict([(edge_type, blocks[block_i]) 
+            for edge_type, block_i in header['edge_types']])
+    # ----------------------------------------------------------------------------------------------
+    def reload(self):
+        """
+        Read the edges from the file, put them back in the graph, and delete the file.
+        """
+        if self.edge_types_map is None:
+            self.edge_types_map = self.read()
+            graph = self.graph()
+            if graph is not None and graph._edges.get(self.ssid) is self:
+                graph._edges[self.ssid] = self.edge_types_map
+            self.discard()
+        return self.edge_types_map
+    # ----------------------------------------------------------------------------------------------
+    def discard(self):
+        """
+        Delete the file.
+        """
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+    # ----------------------------------------------------------------------------------------------
+    def __contains__(self, edge_type):
+        return edge_type in self.reload()
+    # ----------------------------------------------------------------------------------------------
+    def __getitem__(self, edge_type):
+        return self.reload()[edge_type]
+    # ----------------------------------------------------------------------------------------------
+    def __setitem__(self, edge_type, edges):
+        self.reload()[edge_type] = edges
+    # ----------------------------------------------------------------------------------------------
+    def __iter__(self):
+        return iter(self.reload())
+    # ----------------------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.reload())
+    # ----------------------------------------------------------------------------------------------
+    def get(self, edge_type, default = None):
+        return self.reload().get(edge_type, default)
+    # ----------------------------------------------------------------------------------------------
+    def keys(self):
+        return self.reload().keys()
+    # ----------------------------------------------------------------------------------------------
+    def values(self):
+        return self.reload().values()
+    # ----------------------------------------------------------------------------------------------
+    def items(self):
+        return self.reload().items()
+# ==================================================================================================
+# END SPILLED SNAPSHOT CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# JOURNAL CLASS
+# ==================================================================================================
+# the journal file starts with the magic bytes and the length of a JSON header
+# each record has a type, the length of the data, and the data
+_JOURNAL_MAGIC = b'SIMJRNL\x01'
+_J_RECORD = struct.Struct('<BI')
+# record types
+_J_EDGE_TYPE = 1 # the next edge type code, JSON edge type
+_J_ADD_NODES = 2 # JSON [nodes, props]
+_J_SET_NODE_PROP = 3 # JSON [node_id, prop_name, prop_value]
+_J_ADD_EDGE_TYPE = 4 # JSON [edge_type, rev]
+_J_ADD_EDGES = 5 # _J_EDGES, then the pairs of node ids
+_J_DEL_EDGE = 6 # _J_DEL, with -1 for a missing node
+_J_SET_ROW = 7 # _J_ROW, then the node ids
+_J_NEW_SNAPSHOT = 8 # _J_SNAPSHOT, new ssid and ssid or -1
+_J_SET_ACTIVE = 9 # _J_SNAPSHOT, ssid and 0
+_J_CLEAR_SNAPSHOT = 10 # _J_SNAPSHOT, ssid and 0
+_J_DELETE_SNAPSHOT = 11 # _J_SNAPSHOT, ssid and 0
+_J_FREEZE = 12 # _J_SNAPSHOT, ssid and 0
+_J_THAW = 13 # _J_SNAPSHOT, ssid and 0
+_J_ADD_NODE = 14 # utf-8 node name
+_J_ADD_EDGE = 15 # _J_EDGE
+_J_DEL_NODES = 16 # _J_SNAPSHOT, ssid and 0, then the node ids
+_J_SET_COUNTER = 17 # _J_COUNTER
+_J_ADD_TABLE = 18 # JSON [table, width, typecode]
+_J_SET_TABLE_ROWS = 19 # _J_TABLE, then the node ids, then the values as doubles
+# the fixed parts of the binary records, edge type code, ssid, ...
+_J_EDGES = struct.Struct('<HI')
+_J_EDGE = struct.Struct('<HIii')
+_J_DEL = struct.Struct('<HIii')
+_J_ROW = struct.Struct('<HIBi')
+_J_SNAPSHOT = struct.Struct('<Ii')
+_J_COUNTER = struct.Struct('<HI')
+_J_TABLE = struct.Struct('<HII')
+# --------------------------------------------------------------------------------------------------
+class _Journal(object):
+    # an append-only file of binary records, one record for each change to a graph
+    # see Graph.start_journal()
+    # 
+    # edge types, counter names and table names are recorded as integer codes, each code is defined 
+    # by a record when first used
+    __slots__ = ('filepath', 'file', 'edge_types')
+    def __init__(self, filepath, header):
+        self.filepath = filepath
+        self.file = open(filepath, 'wb')
+        self.edge_types = dict() # key is edge type, value is code
+        header = json.dumps(header).encode('utf-8')
+        self.file.write(_JOURNAL_MAGIC + struct.pack('<I', len(header)) + header)
+    # ----------------------------------------------------------------------------------------------
+    def write(self, record_type, data):
+        self.file.write(_J_RECORD.pack(record_type, len(data)) + data)
+    # ----------------------------------------------------------------------------------------------
+    def write_json(self, record_type, value):
+        self.write(record_type, json.dumps(value).encode('utf-8'))
+    # ----------------------------------------------------------------------------------------------
+    def code(self, edge_type):
+        code = self.edge_types.get(edge_type)
+        if code is None:
+            code = len(self.edge_types)
+            self.edge_types[edge_type] = code
+            self.write_json(_J_EDGE_TYPE, edge_type)
+        return code
+    # ----------------------------------------------------------------------------------------------
+    def add_node(self, node):
+        if type(node) is str:
+            self.write(_J_ADD_NODE, node.encode('utf-8'))
+        else:
+            self.add_nodes([node], None)
+    # ----------------------------------------------------------------------------------------------
+    def add_nodes(self, nodes, props):
+        self.write_json(_J_ADD_NODES, [nodes, props])
+    # ----------------------------------------------------------------------------------------------
+    def set_node_prop(self, node_id, prop_name, prop_value):
+        self.write_json(_J_SET_NODE_PROP, [node_id, prop_name, prop_value])
+    # ----------------------------------------------------------------------------------------------
+    def add_edge_type(self, edge_type, rev):
+        self.write_json(_J_ADD_EDGE_TYPE, [edge_type, rev])
+    # ----------------------------------------------------------------------------------------------
+    def add_edge(self, edge_type, ssid, node0_id, node1_id):
+        self.write(_J_ADD_EDGE, _J_EDGE.pack(self.code(edge_type), ssid, node0_id, node1_id))
+    # ----------------------------------------------------------------------------------------------
+    def add_edges(self, edge_type, ssid, pairs):
+        ids = list(chain.from_iterable(pairs))
+        self.write(_J_ADD_EDGES, _J_EDGES.pack(self.code(edge_type), ssid) + 
+            struct.pack('<' + str(len(ids)) + 'i', *ids))
+    # ----------------------------------------------------------------------------------------------
+    def del_edge(self, edge_type, ssid, node0_id, node1_id):
+        self.write(_J_DEL_EDGE, _J_DEL.pack(self.code(edge_type), ssid, node0_id, node1_id))
+    # ----------------------------------------------------------------------------------------------
+    def set_row(self, edge_type, ssid, direction, node_id, ids):
+        self.write(_J_SET_ROW, _J_ROW.pack(self.code(edge_type), ssid, direction, node_id) + 
+            struct.pack('<' + str(len(ids)) + 'i', *ids))
+    # ----------------------------------------------------------------------------------------------
+    def set_counter(self, counter, value):
+        self.write(_J_SET_COUNTER, _J_COUNTER.pack(self.code(counter), value))
+    # ----------------------------------------------------------------------------------------------
+    def add_table(self, table, width, typecode):
+        self.write_json(_J_ADD_TABLE, [table, width, typecode])
+    # ----------------------------------------------------------------------------------------------
+    def set_table_rows(self, table, ssid, node_ids, rows):
+        values = list(chain.from_iterable(rows))
+        self.write(_J_SET_TABLE_ROWS, _J_TABLE.pack(self.code(table), ssid, len(node_ids)) + 
+            struct.pack('<' + str(len(node_ids)) + 'i', *node_ids) + 
+            struct.pack('<' + str(len(values)) + 'd', *values))
+    # ----------------------------------------------------------------------------------------------
+    def del_nodes(self, ssid, ids):
+        ids = list(ids)
+        self.write(_J_DEL_NODES, _J_SNAPSHOT.pack(ssid, 0) + 
+            struct.pack('<' + str(len(ids)) + 'i', *ids))
+    # ----------------------------------------------------------------------------------------------
+    def snapshot(self, record_type, ssid, other = 0):
+        self.write(record_type, _J_SNAPSHOT.pack(ssid, other))
+    # ----------------------------------------------------------------------------------------------
+    def flush(self, sync):
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+    # ----------------------------------------------------------------------------------------------
+    def close(self):
+        self.file.close()
+# --------------------------------------------------------------------------------------------------
+def _read_journal(filepath):
+    """
+    Read a journal file. Returns a tuple, (header, records), where records is a list of tuples,
+    (record_type, data, start, end), and start and end are the positions of the record in the file.
+    An incomplete record at the end of the file is ignored.
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    if data[:len(_JOURNAL_MAGIC)] != _JOURNAL_MAGIC:
+        raise Exception('The file is not a graph journal.')
+    pos = len(_JOURNAL_MAGIC)
+    (header_len,) = struct.unpack_from('<I', data, pos)
+    pos += 4
+    header = json.loads(data[pos:pos + header_len].decode('utf-8'))
+    pos += header_len
+    records = []
+    while pos + _J_RECORD.size <= len(data):
+        record_type, size = _J_RECORD.unpack_from(data, pos)
+        end = pos + _J_RECORD.size + size
+        if end > len(data):
+            break
+        records.append((record_type, data[pos + _J_RECORD.size:end], pos, end))
+        pos = end
+    return header, records
+# --------------------------------------------------------------------------------------------------
+def _unpack_ids(data, pos):
+    """
+    Unpack a list of node ids from the data of a journal record, starting at pos.
+    """
+    return list(struct.unpack_from('<' + str((len(data) - pos) // 4) + 'i', data, pos))
+# ==================================================================================================
+# END JOURNAL CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# SNAPSHOT FUNCTIONS
+# ==================================================================================================
+# an empty row, used when comparing snapshots
+_EMPTY = _odict()
+# --------------------------------------------------------------------------------------------------
+def _changed_row_ids(edges_a, edges_b):
+    """
+    Get the ids of the fwd rows that may differ between two sets of edges, using the chain of
+    copies that link them. If the edges are not linked, None is returned.
+    """
+    if edges_a is None or edges_b is None:
+        return None
+    # walk from edges_a back through its bases, collecting the modified row ids
+    ancestors = dict() # key is id(edges), value is a tuple (edges, set of row ids)
+    row_ids = set()
+    edges = edges_a
+    while edges is not None:
+        ancestors[id(edges)] = (edges, row_ids)
+        if edges.dirty is None or edges.base is None:
+            break
+        row_ids = row_ids | edges.dirty[Graph.FWD]
+        edges = edges.base()
+    # walk from edges_b back through its bases, until a common ancestor is found
+    row_ids = set()
+    edges = edges_b
+    while edges is not None:
+        if id(edges) in ancestors:
+            row_ids = row_ids | ancestors[id(edges)][1]
+            return sorted(row_ids)
+        if edges.dirty is None or edges.base is None:
+            break
+        row_ids = row_ids | edges.dirty[Graph.FWD]
+        edges = edges.base()
+    return None
+# --------------------------------------------------------------------------------------------------
+def _snapshot_size(edge_types_map, seen):
+    """
+    Estimate the memory used by the edges of a snapshot, in bytes. Objects whose ids are in seen
+    are skipped, and the ids of the counted objects are added to seen.
+    """
+    size = sys.getsizeof(edge_types_map)
+    if type(edge_types_map) is _SpilledSnapshot:
+        return size
+    for edges in edge_types_map.values():
+        if id(edges) in seen:
+            continue
+        seen.add(id(edges))
+        size += sys.getsizeof(edges)
+        for rows in edges:
+            if rows is None or id(rows) in seen:
+                continue
+            seen.add(id(rows))
+            if type(rows) is _CSRRows:
+                size += sys.getsizeof(rows) + sys.getsizeof(rows.keys) + \
+                    sys.getsizeof(rows.offsets) + sys.getsizeof(rows.targets)
+                if rows.index is not None:
+                    size += sys.getsizeof(rows.index)
+                continue
+            size += sys.getsizeof(rows)
+            for row in rows.values():
+                if id(row) not in seen:
+                    seen.add(id(row))
+                    size += sys.getsizeof(row)
+    return size
+# --------------------------------------------------------------------------------------------------
+def _tables_size(tables_map, seen):
+    """
+    Estimate the memory used by the tables of a snapshot, in bytes, in the same way as
+    _snapshot_size().
+    """
+    size = sys.getsizeof(tables_map)
+    for table_rows in tables_map.values():
+        if id(table_rows) in seen:
+            continue
+        seen.add(id(table_rows))
+        size += sys.getsizeof(table_rows) + sys.getsizeof(table_rows.pages)
+        for page in table_rows.pages:
+            if page is not None and id(page) not in seen:
+                seen.add(id(page))
+                size += sys.getsizeof(page)
+    return size
+# ==================================================================================================
+
+
+# ==================================================================================================
+# COMPACT FUNCTIONS
+# ==================================================================================================
+def _mark_used(rows, used):
+    """
+    Set the flags in the bytearray used, for all the node ids in a dict of rows, or in compressed
+    sparse rows. The node ids are both the keys and the values of the rows.
+    """
+    if type(rows) is _CSRRows:
+        ids = chain(rows.keys, rows.targets)
+    else:
+        ids = chain(rows, chain.from_iterable(rows.values()))
+    for node_id in ids:
+        used[node_id] = 1
+# --------------------------------------------------------------------------------------------------
+def _remap_rows(rows, new_ids):
+    """
+    Create a new dict of rows, with all the node ids replaced by new_ids[node_id].
+    """
+    new_rows = _odict()
+    for node_id, row in rows.items():
+        row = [new_ids[row_id] for row_id in row]
+        new_rows[new_ids[node_id]] = row if len(row) <= _ROW_LIST_MAX else _odict.fromkeys(row)
+    return new_rows
+# ==================================================================================================
+
+
+# ==================================================================================================
+# TRAVERSAL FUNCTIONS
+# ==================================================================================================
+def _traverse_ids(node_ids, hops_rows, names):
+    """
+    Follow the hops from a list of node ids, and return the list of node ids reached by the last hop.
+    Each hop is a tuple (get, filter), where get is the get method of the rows, and filter is a
+    function of the node name, or None.
+    """
+    node_ids = list(_odict.fromkeys(node_ids))
+    for get, node_filter in hops_rows:
+        rows = map(get, node_ids, repeat((), len(node_ids)))
+        node_ids = list(_odict.fromkeys(chain.from_iterable(rows)))
+        if node_filter is not None:
+            node_ids = [node_id for node_id in node_ids if node_filter(names[node_id])]
+    return node_ids
+# ==================================================================================================
+
+
+# ==================================================================================================
+# FILE FUNCTIONS
+# ==================================================================================================
+# the first bytes of a graph file, followed by the file format version
+_FILE_MAGIC = b'SIMGRAPH\x01'
+# --------------------------------------------------------------------------------------------------
+def _file_padding(pos):
+    """
+    Get the number of bytes needed to align a position in a file to 8 bytes.
+    """
+    return -pos % 8
+# --------------------------------------------------------------------------------------------------
+def _write_graph_file(filepath, header, blocks, tables = ()):
+    """
+    Write a graph file, with a JSON header followed by the arrays of a list of frozen edges, and
+    then a list of arrays of numbers. The info needed to read the arrays is added to the header.
+    """
+    header['itemsize'] = array(_ID_TYPECODE).itemsize
+    header['byteorder'] = sys.byteorder
+    header['blocks'] = [[_csr_info(rows) for rows in edges] for edges in blocks]
+    header['tables'] = [[values.typecode, len(values)] for values in tables]
+    header = json.dumps(header).encode('utf-8')
+    # the blocks can be memory-mapped from the file that is being written, so a new file is 
+    # written next to it, and then replaces it
+    fd, temp_filepath = tempfile.mkstemp(suffix = '.tmp', 
+        dir = os.path.dirname(os.path.abspath(filepath)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_FILE_MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            f.write(b'\0' * _file_padding(f.tell()))
+            for edges in blocks:
+                for rows in edges:
+                    if rows is not None:
+                        for ids in (rows.keys, rows.offsets, rows.targets):
+                            _write_ids(f, ids)
+            for values in tables:
+                values.tofile(f)
+        _replace_file(temp_filepath, filepath)
+    except:
+        os.remove(temp_filepath)
+        raise
+# --------------------------------------------------------------------------------------------------
+def _replace_file(temp_filepath, filepath):
+    """
+    Replace a file with a new file in the same directory. The new file gets the permissions of 
+    the file it replaces, or the default permissions of new files.
+    """
+    if os.path.exists(filepath):
+        shutil.copymode(filepath, temp_filepath)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_filepath, 0o666 & ~umask)
+    if hasattr(os, 'replace'):
+        os.replace(temp_filepath, filepath)
+        return
+    # Python 2 and IronPython, on Windows rename does not replace an existing file
+    if os.name == 'nt' and os.path.exists(filepath):
+        os.remove(filepath)
+    os.rename(temp_filepath, filepath)
+# --------------------------------------------------------------------------------------------------
+def _read_graph_file(filepath, use_mmap):
+    """
+    Read a graph file written by _write_graph_file(). 
+    Returns a tuple with the header, the list of frozen edges, and the list of arrays of numbers.
+    """
+    with open(filepath, 'rb') as f:
+        # read the header
+        if f.read(len(_FILE_MAGIC)) != _FILE_MAGIC:
+            raise Exception('File is not a graph file.')
+        size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(size).decode('utf-8'))
+        if header['itemsize'] != array(_ID_TYPECODE).itemsize:
+            raise Exception('Graph file has an incompatible integer size.')
+        f.seek(_file_padding(f.tell()), 1)
+        # read the edges
+        swap = header['byteorder'] != sys.byteorder
+        view = None
+        if use_mmap and not swap and hasattr(memoryview, 'cast'):
+            view = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+        reader = _IdsReader(f, view, swap)
+        blocks = []
+        for block_info in header['blocks']:
+            rows = [None, None]
+            for direction, info in enumerate(block_info):
+                if info is not None:
+                    dense, num_keys, num_offsets, num_targets = info
+                    rows[direction] = _CSRRows(reader.read(num_keys), 
+                        reader.read(num_offsets), reader.read(num_targets), dense)
+            blocks.append(_FrozenEdges(rows[Graph.FWD], rows[Graph.REV]))
+        # read the tables, files written before tables existed have none
+        tables = [reader.read_values(typecode, count) 
+            for typecode, count in header.get('tables', [])]
+    return header, blocks, tables
+# --------------------------------------------------------------------------------------------------
+def _read_table(header, arrays, table_i, table_type):
+    """
+    Create a table from the arrays read from a graph file. The pages that are shared by tables in
+    the file are also shared by the tables that are created. Files written before tables had pages
+    have one array for each table.
+    """
+    width, typecode = table_type
+    if not 'table_pages' in header:
+        return _Table.from_array(arrays[table_i], width, None)
+    pages = [None if page_i == -1 else arrays[page_i] for page_i in header['table_pages'][table_i]]
+    if header['table_page_rows'] == _TABLE_PAGE_ROWS:
+        return _Table(typecode, width, None, pages)
+    values = array(typecode)
+    for page in pages:
+        values.extend(array(typecode, repeat(_NAN, header['table_page_rows'] * width)) 
+            if page is None else page)
+    return _Table.from_array(values, width, None)
+# --------------------------------------------------------------------------------------------------
+def _csr_info(rows):
+    """
+    Get the info needed to read a _CSRRows from a file, or None.
+    """
+    if rows is None:
+        return None
+    return [rows.index is None, len(rows.keys), len(rows.offsets), len(rows.targets)]
+# --------------------------------------------------------------------------------------------------
+def _write_ids(f, ids):
+    """
+    Write an array of node ids to a file. The ids can also be a memoryview of a file.
+    """
+    if type(ids) is array:
+        ids.tofile(f)
+    else:
+        f.write(ids)
+# --------------------------------------------------------------------------------------------------
+class _IdsReader(object):
+    # reads arrays of node ids from a file, one after the other
+    # if view is not None, it is a memoryview of the whole file, and the arrays are not copied
+    def __init__(self, f, view, swap):
+        self.f = f
+        self.view = view
+        self.swap = swap
+        self.pos = f.tell()
+    # ----------------------------------------------------------------------------------------------
+    def read(self, count):
+        """
+        Read an array with count node ids.
+        """
+        if self.view is not None:
+            end = self.pos + count * array(_ID_TYPECODE).itemsize
+            ids = self.view[self.pos:end].cast(_ID_TYPECODE)
+            self.pos = end
+            return ids
+        ids = array(_ID_TYPECODE)
+        ids.fromfile(self.f, count)
+        if self.swap:
+            ids.byteswap()
+        return ids
+    # ----------------------------------------------------------------------------------------------
+    def read_values(self, typecode, count):
+        """
+        Read an array with count numbers. The array is always copied, so that it can be modified.
+        """
+        values = array(typecode)
+        if self.view is not None:
+            end = self.pos + count * values.itemsize
+            values.frombytes(self.view[self.pos:end])
+            self.pos = end
+            return values
+        values.fromfile(self.f, count)
+        if self.swap:
+            values.byteswap()
+        return values
+# ==================================================================================================
@@ -9,6 +9,7 @@ print("PYTHON Version: ", sys.version_info)
 if sys.version_info[0] >= 3:
     unicode = str
 from collections import OrderedDict
+from itertools import count
 import json
 from sim_model.sim import ENT_TYPE, DATA_TYPE, SIM
 # ==================================================================================================
@@ -22,24 +23,15 @@ def export_sim_data(sim_model):
     
     :return: JSON data.
     """
-    # get entities from graph
-    posi_ents = sim_model.get_ents(ENT_TYPE.POSI)
-    vert_ents = sim_model.get_ents(ENT_TYPE.VERT)
-    edge_ents = sim_model.get_ents(ENT_TYPE.EDGE)
-    wire_ents = sim_model.get_ents(ENT_TYPE.WIRE)
-    point_ents = sim_model.get_ents(ENT_TYPE.POINT)
-    pline_ents = sim_model.get_ents(ENT_TYPE.PLINE)
-    pgon_ents = sim_model.get_ents(ENT_TYPE.PGON)
-    coll_ents = sim_model.get_ents(ENT_TYPE.COLL)
-    # create maps for entity name -> entity index
-    posis_dict = dict( zip(posi_ents, range(len(posi_ents))) )
-    verts_dict = dict( zip(vert_ents, range(len(vert_ents))) )
-    edges_dict = dict( zip(edge_ents, range(len(edge_ents))) )
-    wires_dict = dict( zip(wire_ents, range(len(wire_ents))) )
-    points_dict = dict( zip(point_ents, range(len(point_ents))) )
-    plines_dict = dict( zip(pline_ents, range(len(pline_ents))) )
-    pgons_dict = dict( zip(pgon_ents, range(len(pgon_ents))) )
-    colls_dict = dict( zip(coll_ents, range(len(coll_ents))) )
+    # create maps for entity name -> entity index, iterating over the entities in the graph
+    posis_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.POSI), count()) )
+    verts_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.VERT), count()) )
+    edges_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.EDGE), count()) )
+    wires_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.WIRE), count()) )
+    points_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.POINT), count()) )
+    plines_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.PLINE), count()) )
+    pgons_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.PGON), count()) )
+    colls_dict = dict( zip(sim_model.iter_ents(ENT_TYPE.COLL), count()) )
     # create the geometry data
     geometry = {
         'num_posis': sim_model.num_ents(ENT_TYPE.POSI),
@@ -51,16 +43,16 @@ def export_sim_data(sim_model):
         'coll_pgons':  [],
         'coll_colls': []
     }
-    for point_ent in point_ents:
+    for point_ent in sim_model.iter_ents(ENT_TYPE.POINT):
         posi_i = sim_model.get_ent_posis(point_ent)
         geometry['points'].append(posis_dict[posi_i])
-    for pline_ent in pline_ents:
+    for pline_ent in sim_model.iter_ents(ENT_TYPE.PLINE):
         posis_i = sim_model.get_ent_posis(pline_ent)
         geometry['plines'].append([posis_dict[posi_i] for posi_i in posis_i])
-    for pgon_ent in pgon_ents:
+    for pgon_ent in sim_model.iter_ents(ENT_TYPE.PGON):
         wires_posis_i = sim_model.get_ent_posis(pgon_ent)
         geometry['pgons'].append([[posis_dict[posi_i] for posi_i in posis_i] for posis_i in wires_posis_i])
-    for coll_ent in coll_ents:
+    for coll_ent in sim_model.iter_ents(ENT_TYPE.COLL):
         # points
         coll_points = sim_model.get_ents(ENT_TYPE.POINT, coll_ent)
         geometry['coll_points'].append([points_dict[point] for point in coll_points])
@@ -82,6 +74,18 @@ def export_sim_data(sim_model):
             data['data_type'] = sim_model.get_attrib_datatype(ent_type, att_name)
             data['values'] = []
             data['entities'] = []
+            if ent_type == ENT_TYPE.POSI and att_name == 'xyz':
+                # group the posis by their coords, in one pass
+                posis = list(sim_model.iter_ents(ENT_TYPE.POSI))
+                coords = OrderedDict()
+                for posi, xyz in zip(posis, sim_model.get_posis_coords(posis)):
+                    if xyz is not None:
+                        coords.setdefault(tuple(xyz), []).append(ent_dict[posi])
+                for xyz, ents_i in coords.items():
+                    data['values'].append(list(xyz))
+                    data['entities'].append(ents_i)
+                attribs_data.append(data)
+                continue
             for att_val in sim_model.get_attrib_vals(ent_type, att_name):
                 data['values'].append(att_val)
                 ents = sim_model.query(ent_type, att_name, '==', att_val)
@@ -134,62 +138,78 @@ def import_sim_data(sim_model, json_data):
     
     :return: No value.
     """
-    # positions
-    posis = []
-    for i in range(json_data['geometry']['num_posis']):
-        posis.append(sim_model.add_posi([0,0,0]))
+    geometry = json_data['geometry']
+    # positions, with the coordinates from the xyz attribute
+    coords = [None] * geometry['num_posis']
+    for attrib in json_data['attributes']['posis']:
+        if attrib['name'] == 'xyz':
+            for xyz, ents_i in zip(attrib['values'], attrib['entities']):
+                for ent_i in ents_i:
+                    coords[ent_i] = xyz
+    posis = sim_model.add_posis(coords)
     # points
-    for posi_i in json_data['geometry']['points']:
-        sim_model.add_point(posis[posi_i])
-    # polylines
-    for posis_i in json_data['geometry']['plines']:
+    points = [sim_model.add_point(posis[posi_i]) for posi_i in geometry['points']]
+    # polylines, for closed polylines the last position is the same as the first
+    pline_posis = []
+    pline_closed = []
+    for posis_i in geometry['plines']:
         closed = posis_i[0] == posis_i[-1]
-        sim_model.add_pline(map(lambda posi_i: posis[posi_i], posis_i), closed)
-    # polygons
-    for posi_lists_i in json_data['geometry']['pgons']:
-        boundary = map(lambda posi_i: posis[posi_i], posi_lists_i[0])
-        pgon = sim_model.add_pgon(boundary)
-        for hole_posis_i in posi_lists_i[1:]:
-            sim_model.add_pgon_hole(pgon, map(lambda posi_i: posis[posi_i], hole_posis_i))
-
+        pline_posis.append([posis[posi_i] for posi_i in (posis_i[:-1] if closed else posis_i)])
+        pline_closed.append(closed)
+    plines = sim_model.add_plines(pline_posis, pline_closed)
+    # polygons, the first list of positions is the boundary, the rest are holes
+    pgons = sim_model.add_pgons(
+        [[posis[posi_i] for posi_i in posi_lists_i[0]] for posi_lists_i in geometry['pgons']],
+        [[[posis[posi_i] for posi_i in posis_i] for posis_i in posi_lists_i[1:]] 
+            for posi_lists_i in geometry['pgons']])
     # collections
-    num_colls = len(json_data['geometry']['coll_points'])
+    num_colls = len(geometry['coll_points'])
+    colls = [sim_model.add_coll() for _ in range(num_colls)]
     for i in range(num_colls):
-        coll = sim_model.add_coll()
-        for point_i in json_data['geometry']['coll_points'][i]:
-            sim_model.add_coll_ent(coll, 'pt' + str(point_i))
-        for pline_i in json_data['geometry']['coll_plines'][i]:
-            sim_model.add_coll_ent(coll, 'pl' + str(pline_i))
-        for pgon_i in json_data['geometry']['coll_pgons'][i]:
-            sim_model.add_coll_ent(coll, 'pg' + str(pgon_i))
-        for child_coll_i in json_data['geometry']['coll_colls'][i]:
-            sim_model.add_coll_ent(coll, 'co' + str(child_coll_i))
+        coll = colls[i]
+        for point_i in geometry['coll_points'][i]:
+            sim_model.add_coll_ent(coll, points[point_i])
+        for pline_i in geometry['coll_plines'][i]:
+            sim_model.add_coll_ent(coll, plines[pline_i])
+        for pgon_i in geometry['coll_pgons'][i]:
+            sim_model.add_coll_ent(coll, pgons[pgon_i])
+        for child_coll_i in geometry['coll_colls'][i]:
+            sim_model.add_coll_ent(coll, colls[child_coll_i])
+    # the imported verts, edges and wires, in the same order as export_sim_data()
+    # they are only needed if there are attributes for them
+    def _sub_ents(sim_ent_type, ent_type, objs):
+        if not json_data['attributes'][sim_ent_type]:
+            return []
+        sub_ents = set(sim_model.get_ents(ent_type, objs))
+        return [ent for ent in sim_model.iter_ents(ent_type) if ent in sub_ents]
     # entity attribs
     ent_type_strs = [
-        ['posis', ENT_TYPE.POSI],
-        ['verts', ENT_TYPE.VERT],
-        ['edges', ENT_TYPE.EDGE],
-        ['wires', ENT_TYPE.WIRE],
-        ['points', ENT_TYPE.POINT],
-        ['plines', ENT_TYPE.PLINE],
-        ['pgons', ENT_TYPE.PGON],
-        ['colls', ENT_TYPE.COLL]
+        ['posis', ENT_TYPE.POSI, posis],
+        ['verts', ENT_TYPE.VERT, _sub_ents('verts', ENT_TYPE.VERT, points + plines + pgons)],
+        ['edges', ENT_TYPE.EDGE, _sub_ents('edges', ENT_TYPE.EDGE, plines + pgons)],
+        ['wires', ENT_TYPE.WIRE, _sub_ents('wires', ENT_TYPE.WIRE, plines + pgons)],
+        ['points', ENT_TYPE.POINT, points],
+        ['plines', ENT_TYPE.PLINE, plines],
+        ['pgons', ENT_TYPE.PGON, pgons],
+        ['colls', ENT_TYPE.COLL, colls]
     ]
-    
-    for sim_ent_type, ent_type in ent_type_strs:
+    for sim_ent_type, ent_type, ents in ent_type_strs:
         for attrib in json_data['attributes'][sim_ent_type]:
             att_name = attrib['name']
             if sim_model.has_attrib(ent_type, att_name): 
                 if (attrib['data_type'] != sim_model.get_attrib_datatype(ent_type, att_name)):
                     # if attrib already exists but with different datatype, then rename attrib
                     att_name = att_name + '_' + attrib['data_type']
+                    sim_model.add_attrib(ent_type, att_name, attrib['data_type'])
             else:
                 sim_model.add_attrib(ent_type, att_name, attrib['data_type'])
+            if ent_type == ENT_TYPE.POSI and att_name == 'xyz':
+                # the coords were set by add_posis()
+                continue
             for i in range(len(attrib['values'])):
                 att_value = attrib['values'][i]
                 for ent_i in attrib['entities'][i]:
-                    ent = ent_type + str(ent_i)
-                    sim_model.set_attrib_val(ent, att_name, att_value)
+                    sim_model.set_attrib_val(ents[ent_i], att_name, att_value)
     # model attributes
     for [attrib_name, attrib_val] in json_data['attributes']['model']:
         sim_model.set_model_attrib_val(attrib_name, attrib_val)
@@ -9,8 +9,16 @@ print("PYTHON Version: ", sys.version_info)
 if sys.version_info[0] >= 3:
     unicode = str
 from collections import OrderedDict
+from itertools import groupby, chain
+from array import array
+import copy
 import json
+import math
+import numbers
+import operator
 from sim_model.graph import Graph
+from sim_model.triangulate import triangulate, triangulate_flat_parallel
+from sim_model.spatial import Grid, NEIGHBOUR_OFFSETS
 # ==================================================================================================
 # ENUMS
 # ==================================================================================================
@@ -178,6 +186,14 @@ _ALL_ENT_TYPES = {
     ENT_TYPE.PGON, 
     ENT_TYPE.COLL
 }
+# --------------------------------------------------------------------------------------------------
+# COMPARATORS FOR NUMBERS
+_COMPARATORS = {
+    COMPARATOR.IS_GREATER_OR_EQUAL: operator.ge,
+    COMPARATOR.IS_LESS_OR_EQUAL: operator.le,
+    COMPARATOR.IS_GREATER: operator.gt,
+    COMPARATOR.IS_LESS: operator.lt
+}
 # ==================================================================================================
 # SIM CLASS
 # ==================================================================================================
@@ -207,7 +223,7 @@ class SIM(object):
     
     - entity nodes
       - e.g. 'ps01', '_v123'
-      - have a property, 'ent_type', e.g. 'ps', '_v'
+      - the entity type is the two character prefix of the name, e.g. 'ps', '_v'
       - vertices have an additional property, 'vert_type', can be 'pl', 'pg', 'pgh'
 
     - entity type nodes 
@@ -267,15 +283,53 @@ class SIM(object):
 
     For each attribute specific forward edge, there is an equivalent reverse edge.
 
-    """
+    === TABLES ===
+
+    The XYZ coordinates of positions are not stored as attribute values, they are stored in a
+    graph table with three numbers for each position, named after the xyz attribute node,
+    '_att_ps_xyz'. The xyz attribute node still exists, so that 'xyz' is listed as an attribute.
+
+    === TRIANGLES ===
+
+    Polygons are triangulated on demand. The triangles of a polygon are cached by the SIM, not 
+    stored in the graph, as a flat tuple of indexes into the positions of the polygon, boundary 
+    first and then the holes, with three indexes for each triangle. No nodes are created for 
+    triangles. If a polygon has no cached triangles, then it is triangulated when its triangles 
+    are needed.
+
+    The triangles are cached until the polygon changes. Each snapshot has its own cache, and an 
+    index from positions to the polygons with cached triangles that use them. When the coordinates
+    of positions are set or transformed, only the polygons that use those positions are cleared. 
+    A new snapshot shares the cache of the snapshot it was created from, and the cache is copied 
+    when it is first modified, so changing the active snapshot does not clear any triangles.
 
-    # Triangulation is not yet implemented.
+    === SPATIAL INDEX ===
+
+    Spatial queries use a grid of the positions in the active snapshot, see spatial.Grid. The grid
+    is not stored in the graph. It is created when it is first used, and the positions that are
+    added, moved or deleted are updated before the next query. If the active snapshot changes or 
+    the model is compacted, the grid is created again. Objects and collections are found by their
+    cached bounding boxes, see below.
+
+    === BOUNDING BOXES ===
+
+    The bounding boxes of objects and collections are cached, and are not stored in the graph. The
+    bounding box of an object is cleared when any of its positions is moved, and the bounding box 
+    of a collection is cleared when any of its entities changes, or when entities are added or 
+    removed. The bounding box of a collection is combined from the bounding boxes of its entities,
+    so only the bounding boxes that were cleared are computed again. If the active snapshot changes 
+    or the model is compacted, all the bounding boxes are cleared.
+
+    """
 
     # ==============================================================================================
     # CONSTRUCTOR FOR SIM CLASS
     # ==============================================================================================
-    def __init__(self):
+    def __init__(self, float32 = False):
         """Constructor for creating a new empty model
+
+        :param float32: If True, the XYZ coordinates of positions are stored as 32 bit floats, 
+            which uses half the memory. Otherwise they are stored as 64 bit floats.
         """
         # graph
         self.graph = Graph()
@@ -296,8 +350,29 @@ class SIM(object):
                 ENT_TYPE.POINT, ENT_TYPE.PLINE, ENT_TYPE.PGON, ENT_TYPE.COLL]:
             self.graph.add_node( _GR_ATTRIBS_NODE[ent_type] )
 
-        # add xyz attrib
+        # add xyz attrib, and the table for the coordinates
         self._graph_add_attrib(ENT_TYPE.POSI, 'xyz', DATA_TYPE.LIST)
+        self._xyz_typecode = 'f' if float32 else 'd'
+        self.graph.add_table(_GR_XYZ_NODE, 3, self._xyz_typecode)
+
+        # the cached triangles of the pgons, by ssid, each a dict, key is the pgon id, see 
+        # _graph_tris_cache()
+        self._tris = dict()
+        # the ids of the pgons with cached triangles that use each posi, by ssid, each a dict, key 
+        # is the posi id, if None, the index has to be rebuilt, see _graph_tris_deps()
+        self._tris_deps = dict()
+        # the ssids of the snapshots that share their cached triangles with other snapshots
+        self._tris_shared = set()
+        # views do not use or store cached triangles
+        self._tris_cached = True
+        # the spatial index of the posis, created when it is first used, see _graph_grid()
+        # and the ids of the posis that were changed since the index was updated
+        self._grid = None
+        self._grid_dirty = set()
+        # the cached bboxes of objects and colls, by node id, see _graph_bboxes()
+        # and the ids of the posis that were changed since the bboxes were cached
+        self._bboxes = dict()
+        self._bbox_dirty = set()
 
         # add empty model attrbutes
         self.model_attribs = dict()
@@ -316,6 +391,27 @@ class SIM(object):
             self.set_posi_coords(posi, xyz)
         return posi
     # ----------------------------------------------------------------------------------------------
+    def add_posis(self, coords):
+        """Add multiple positions to the model in one step, specifying the XYZ coordinates of each
+        position. 
+
+        :param coords: A list of XYZ coordinates, each a list of three numbers, or None for a 
+            position with no coordinates. This can also be a NumPy array with shape (N, 3).
+        :return: A list of IDs of the new positions.
+        """
+        if hasattr(coords, 'tolist'):
+            coords = coords.tolist() # NumPy array
+        coords = list(coords)
+        posis, posi_ids = self._graph_add_ents(ENT_TYPE.POSI, len(coords))
+        if any(xyz is None for xyz in coords):
+            # only the positions with coordinates get a row in the table
+            posi_ids = [posi_id for posi_id, xyz in zip(posi_ids, coords) if xyz is not None]
+            coords = [xyz for xyz in coords if xyz is not None]
+        self.graph.set_table_rows(posi_ids, coords, _GR_XYZ_NODE)
+        if self._grid is not None:
+            self._grid_dirty.update(posi_ids)
+        return posis
+    # ----------------------------------------------------------------------------------------------
     def add_point(self, posi):
         """Add a point object to the model, specifying a single position.
 
@@ -336,6 +432,7 @@ class SIM(object):
         :param closed: A boolean indicating if the polyline is closed or open.
         :return: The ID of the new polyline.
         """
+        posis = list(posis)
         if len(posis) < 2:
             raise Exception('Too few positions for polyline.');
         # TODO removed wire
@@ -348,12 +445,45 @@ class SIM(object):
         # return
         return pline
     # ----------------------------------------------------------------------------------------------
+    def add_plines(self, index_lists, closed_flags, offsets = None):
+        """Add multiple polyline objects to the model in one step, specifying a list of positions
+        for each polyline. All the topology is created in bulk.
+
+        Positions can be position IDs, or integer indexes into the list of positions in the model,
+        as returned by get_ents('ps'). Deleted positions are not in this list.
+        If offsets is None, index_lists is a list of lists of positions, one for each polyline. 
+        Otherwise, index_lists is a flat list of positions, and offsets is the start of the 
+        positions of each polyline in the flat list. Both can also be NumPy arrays.
+
+        :param index_lists: A list of lists of positions, or a flat list of positions.
+        :param closed_flags: A list of booleans, or a single boolean for all the polylines.
+        :param offsets: None, or a list of offsets into the flat list of positions.
+        :return: A list of IDs of the new polylines.
+        """
+        posi_id_lists = self._graph_posi_id_lists(index_lists, offsets)
+        if not type(closed_flags) is list:
+            closed_flags = closed_flags.tolist() if hasattr(closed_flags, 'tolist') else \
+                [closed_flags] * len(posi_id_lists)
+        if any(len(posi_ids) < 2 for posi_ids in posi_id_lists):
+            raise Exception('Too few positions for polyline.');
+        # plines and wires
+        plines, pline_ids = self._graph_add_ents(ENT_TYPE.PLINE, len(posi_id_lists))
+        wires, wire_ids = self._graph_add_ents(ENT_TYPE.WIRE, len(posi_id_lists))
+        self.graph.add_edges_id(list(zip(pline_ids, wire_ids)), _GR_EDGE_TYPE.ENT)
+        # verts and edges
+        self._add_edge_seqs(posi_id_lists, closed_flags, VERT_TYPE.PLINE, wire_ids)
+        # return
+        return plines
+    # ----------------------------------------------------------------------------------------------
     def add_pgon(self, posis):
         """Add a polygon object to the model, specifying a list of positions.
 
         :param posis: A list of position IDs.
         :return: The ID of the new polygon.
         """
+        posis = list(posis)
+        if not posis:
+            raise Exception('Too few positions for polygon.')
         posis = posis if type(posis[0]) is list else [posis]
         if len(posis[0]) < 3:
             raise Exception('Too few positions for polygon.')
@@ -366,8 +496,6 @@ class SIM(object):
         # make holes
         for i in range(1, len(posis)):
             self.add_pgon_hole(pgon, posis[i])
-        # triangulate
-        # self.tri.triangulatePgon(pgon) TODO
         # return
         return pgon
     # ----------------------------------------------------------------------------------------------
@@ -378,6 +506,7 @@ class SIM(object):
         :param posis: A list of position IDs for the hole.
         :return: The ID of the new hole wire.
         """
+        posis = list(posis)
         if len(posis) < 3:
             raise Exception('Too few positions for polygon hole.')
         # wire
@@ -385,75 +514,511 @@ class SIM(object):
         self.graph.add_edge(pgon, wire, _GR_EDGE_TYPE.ENT)
         # verts and edges
         self._add_edge_seq(posis, True, VERT_TYPE.PGON_HOLE, wire)
-        # triangulate
-        # self.tri.triangulatePgon(pgon) TODO
+        # the triangles and the bbox are no longer valid
+        self._graph_dirty_tris([], [self.graph.get_node_id(pgon)])
+        self._graph_dirty_bboxes([self.graph.get_node_id(pgon)])
         # return
         return wire
     # ----------------------------------------------------------------------------------------------
+    def add_pgons(self, boundaries, holes = None, offsets = None):
+        """Add multiple polygon objects to the model in one step, specifying a list of positions
+        for the boundary of each polygon, and optionally the holes. All the topology is created in
+        bulk.
+
+        Positions can be position IDs, or integer indexes into the list of positions in the model,
+        as returned by get_ents('ps'). Deleted positions are not in this list.
+        If offsets is None, boundaries is a list of lists of positions, one for each polygon. 
+        Otherwise, boundaries is a flat list of positions, and offsets is the start of the 
+        positions of each polygon in the flat list. Both can also be NumPy arrays.
+
+        :param boundaries: A list of lists of positions, or a flat list of positions.
+        :param holes: None, or a list with a list of holes for each polygon, where each hole is
+            a list of positions.
+        :param offsets: None, or a list of offsets into the flat list of positions.
+        :return: A list of IDs of the new polygons.
+        """
+        posi_id_lists = self._graph_posi_id_lists(boundaries, offsets)
+        if any(len(posi_ids) < 3 for posi_ids in posi_id_lists):
+            raise Exception('Too few positions for polygon.')
+        num_pgons = len(posi_id_lists)
+        # holes, each hole has the index of its pgon
+        hole_pgons_i = []
+        hole_id_lists = []
+        if holes is not None:
+            hole_lists = []
+            for pgon_i, pgon_holes in enumerate(holes):
+                for hole in pgon_holes if pgon_holes is not None else []:
+                    hole_pgons_i.append(pgon_i)
+                    hole_lists.append(hole)
+            hole_id_lists = self._graph_posi_id_lists(hole_lists)
+            if any(len(posi_ids) < 3 for posi_ids in hole_id_lists):
+                raise Exception('Too few positions for polygon hole.')
+        # pgons and wires, the boundary wire of each pgon is followed by its hole wires
+        pgons, pgon_ids = self._graph_add_ents(ENT_TYPE.PGON, num_pgons)
+        wires, wire_ids = self._graph_add_ents(ENT_TYPE.WIRE, num_pgons + len(hole_id_lists))
+        wires_pgons_i = sorted(chain(range(num_pgons), hole_pgons_i))
+        self.graph.add_edges_id([(pgon_ids[pgon_i], wire_id) 
+            for pgon_i, wire_id in zip(wires_pgons_i, wire_ids)], _GR_EDGE_TYPE.ENT)
+        # the boundary wire is the first wire of each pgon
+        is_boundary = [True] + [wires_pgons_i[i] != wires_pgons_i[i - 1] 
+            for i in range(1, len(wires_pgons_i))]
+        # verts and edges
+        self._add_edge_seqs(posi_id_lists, [True] * num_pgons, VERT_TYPE.PGON, 
+            [wire_id for wire_id, boundary in zip(wire_ids, is_boundary) if boundary])
+        if hole_id_lists:
+            self._add_edge_seqs(hole_id_lists, [True] * len(hole_id_lists), VERT_TYPE.PGON_HOLE, 
+                [wire_id for wire_id, boundary in zip(wire_ids, is_boundary) if not boundary])
+        # return
+        return pgons
+    # ----------------------------------------------------------------------------------------------
     def _add_edge_seq(self, posis, closed, vert_type, parent):
         """Add a sequnce of edges. Use by add_pgon(), add_pgon_hole(), add_pline().
+        All the verts and edges are created in bulk, and all the edges are added to the graph in one
+        step.
 
         :param posis: The list of posis.
         :param closed: If true, then the last edge loops back to the first vertex.
         :param vert_type: The vertex type, see VERT_TYPE
         :param parent: The parent of the new edges. Wither a wire or a pline.
         """
-        edges = []
-        v0 = None
-        v1 = None
-        # v0
-        v_start = self._graph_add_ent(ENT_TYPE.VERT)
-        self.graph.set_node_prop(v_start, 'vert_type', vert_type)
-        self.graph.add_edge(v_start, posis[0], _GR_EDGE_TYPE.ENT)
-        v0 = v_start
-        for i in range(1, len(posis)):
-            # v1
-            v1 = self._graph_add_ent(ENT_TYPE.VERT)
-            self.graph.set_node_prop(v1, 'vert_type', vert_type)
-            self.graph.add_edge(v1, posis[i], _GR_EDGE_TYPE.ENT)
-            # edge
-            edge = self._graph_add_ent(ENT_TYPE.EDGE)
-            self.graph.add_edge(parent, edge, _GR_EDGE_TYPE.ENT)
-            self.graph.add_edge(edge, v0, _GR_EDGE_TYPE.ENT)
-            self.graph.add_edge(edge, v1, _GR_EDGE_TYPE.ENT)
-            v0 = v1
-            edges.append(edge)
-        # last edge
-        if closed:
-            last_edge = self._graph_add_ent(ENT_TYPE.EDGE)
-            self.graph.add_edge(parent, last_edge, _GR_EDGE_TYPE.ENT)
-            self.graph.add_edge(last_edge, v1, _GR_EDGE_TYPE.ENT)
-            self.graph.add_edge(last_edge, v_start, _GR_EDGE_TYPE.ENT)
+        node_id = self.graph.get_node_id
+        self._add_edge_seqs([[node_id(posi) for posi in posis]], [closed], vert_type, 
+            [node_id(parent)])
+    # ----------------------------------------------------------------------------------------------
+    def _add_edge_seqs(self, posi_id_lists, closed_flags, vert_type, parent_ids):
+        """Add multiple sequnces of edges. Used by _add_edge_seq(), add_plines(), add_pgons().
+        All the verts and edges of all the sequences are created in bulk, and all the edges are 
+        added to the graph in one step.
+
+        :param posi_id_lists: A list of lists of posi node ids, one list for each sequence.
+        :param closed_flags: A list of booleans, one for each sequence.
+        :param vert_type: The vertex type, see VERT_TYPE
+        :param parent_ids: A list of node ids of the parents of the new edges, wires.
+        """
+        nums_edges = [len(posi_ids) if closed else len(posi_ids) - 1 
+            for posi_ids, closed in zip(posi_id_lists, closed_flags)]
+        # create the verts and edges
+        verts, vert_ids = self._graph_add_ents(ENT_TYPE.VERT, sum(map(len, posi_id_lists)), 
+            {'vert_type': vert_type})
+        edges, edge_ids = self._graph_add_ents(ENT_TYPE.EDGE, sum(nums_edges))
+        # vert -> posi
+        pairs = list(zip(vert_ids, chain.from_iterable(posi_id_lists)))
+        # parent -> edge, edge -> [v0, v1]
+        start_verts = []
+        vert_i = 0
+        edge_i = 0
+        for posi_ids, num_edges, parent_id in zip(posi_id_lists, nums_edges, parent_ids):
+            num_verts = len(posi_ids)
+            for i in range(num_edges):
+                edge_id = edge_ids[edge_i + i]
+                pairs.append((parent_id, edge_id))
+                pairs.append((edge_id, vert_ids[vert_i + i]))
+                pairs.append((edge_id, vert_ids[vert_i + (i + 1) % num_verts]))
+            if num_edges == num_verts:
+                start_verts.append((verts[vert_i], [edges[edge_i + num_edges - 1], edges[edge_i]]))
+            vert_i += num_verts
+            edge_i += num_edges
+        self.graph.add_edges_id(pairs, _GR_EDGE_TYPE.ENT)
+        # last edges
+        for vert, vert_edges in start_verts:
             # re-order the predecessors of the start vertex
             # the order should be [last_edge, first_edge]
-            self.graph.set_predecessors(v_start, [last_edge, edges[0]], _GR_EDGE_TYPE.ENT)
+            self.graph.set_predecessors(vert, vert_edges, _GR_EDGE_TYPE.ENT)
     # ----------------------------------------------------------------------------------------------
     def triangulate_pgon(self, pgon):
-        """Triangulate a polygon.
+        """Triangulate a polygon, including its holes. The triangles are stored with the 
+        polygon, see get_pgon_tris().
+
+        The triangles are cached, and are cleared when the positions of the polygon are moved or
+        the polygon gets a new hole.
 
         :param pgon: The polygon ID.
         :return: No value.
         """
-        raise Exception('Not implements.')
+        pgon_id = self.graph.get_node_id(pgon)
+        self._graph_triangulate_pgon(pgon_id, self._graph_pgon_posi_ids(pgon_id))
+    # ----------------------------------------------------------------------------------------------
+    def triangulate_pgons(self, pgons = None, workers = None):
+        """Triangulate a list of polygons, see triangulate_pgon(). Polygons that still have 
+        cached triangles are skipped, so only the polygons that changed are triangulated again.
+
+        If workers is more than 1, then the polygons are triangulated in parallel by a pool of
+        processes. The coordinates of all the polygons are sent to the processes as one flat array,
+        in shared memory if it is available, and the triangles are then stored in the model.
+        Starting the processes takes time, so this is only faster for large numbers of polygons.
+
+        :param pgons: A list of polygon IDs, or None to triangulate all polygons.
+        :param workers: None, or the number of processes to use.
+        :return: The number of polygons that were triangulated.
+        """
+        graph = self.graph
+        if pgons is None:
+            pgon_ids = graph.successors_id(
+                graph.get_node_id(_GR_ENTS_NODE[ENT_TYPE.PGON]), _GR_EDGE_TYPE.META)
+        else:
+            pgon_ids = map(graph.get_node_id, pgons)
+        if self._tris_cached:
+            cache = self._graph_tris_cache()
+            pgon_ids = [pgon_id for pgon_id in pgon_ids if pgon_id not in cache]
+        else:
+            pgon_ids = list(pgon_ids)
+        pgons_rings_ids = [self._graph_pgon_posi_ids(pgon_id) for pgon_id in pgon_ids]
+        if workers is None or workers < 2:
+            for pgon_id, rings_ids in zip(pgon_ids, pgons_rings_ids):
+                self._graph_triangulate_pgon(pgon_id, rings_ids)
+            return len(pgon_ids)
+        # the flat coords of all the rings, and the start of each ring and pgon
+        posi_ids = []
+        ring_starts = [0]
+        pgon_starts = [0]
+        for rings_ids in pgons_rings_ids:
+            for ring_ids in rings_ids:
+                posi_ids.extend(ring_ids)
+                ring_starts.append(len(posi_ids))
+            pgon_starts.append(len(ring_starts) - 1)
+        coords = graph.get_table_rows(posi_ids, _GR_XYZ_NODE)
+        if None in coords:
+            raise Exception('Polygon has positions without coordinates.')
+        coords = array('d', chain.from_iterable(coords))
+        pgons_tris = triangulate_flat_parallel(coords, ring_starts, pgon_starts, workers)
+        for pgon_id, rings_ids, tris in zip(pgon_ids, pgons_rings_ids, pgons_tris):
+            self._graph_set_tris(pgon_id, rings_ids, tris)
+        return len(pgon_ids)
     # ----------------------------------------------------------------------------------------------
     def copy_ents(self, ents, vec = None):
         """Make a copy of an list of entities. For objects, the object positions are also copied. For 
         collections, the contents of the collection is also copied. 
-        TODO Raise error for deleted ents ???
+        
+        All the entities are copied in one step, including their vertices, edges and wires, and
+        the attribute values of all the copied entities. Positions and collections that are shared
+        by the entities are only copied once, so the copies are linked in the same way as the 
+        original entities.
 
-        :param ents: A list of entity IDs.
+        :param ents: A single entity ID or a list of entity IDs.
         :param vec: Optional vector specifying the transplation of the positions.
-        :return: A list of IDs of the copied entities.
+        :return: A list of IDs of the copied entities, in the same order as `ents`.
         """
-        raise Exception('Not implements.')
+        return self._graph_copy_ents(ents if type(ents) is list else [ents], vec)[0]
     # ----------------------------------------------------------------------------------------------
     def clone_ents(self, ents):
-        """Triangulate a polygon.l.
+        """Make a copy of a list of entities, and delete the original entities. For objects, the
+        object positions are also copied, and the original positions are deleted if they are not
+        used by other objects. For collections, the contents of the collection is also cloned. 
 
-        :param ents: A list of entity IDs.
-        :return: A list of IDs of the cloned entities.
+        Cloning gives the entities new IDs, see copy_ents() and del_ents().
+
+        :param ents: A single entity ID or a list of entity IDs.
+        :return: A list of IDs of the cloned entities, in the same order as `ents`.
         """
-        raise Exception('Not implements.')
+        clones, copied_ids = self._graph_copy_ents(ents if type(ents) is list else [ents], None)
+        copied = map(self.graph.get_node_name, copied_ids)
+        self.del_ents([ent for ent in copied if ent[:2] not in _TOPO_ENT_TYPES], del_posis = True)
+        return clones
+    # ==============================================================================================
+    # DELETE ENTITIES
+    # ==============================================================================================
+    def del_ents(self, ents, del_posis = False):
+        """Delete entities from the model. All the entities are deleted in one step.
+        
+        For objects, the vertices, edges and wires of the objects are also deleted. If del_posis is
+        True, then the positions of the objects are also deleted, unless they are still used by 
+        other objects. For collections, only the collection is deleted, not the contents of the 
+        collection. Positions can also be deleted directly, but only if they are not used by any
+        object, otherwise they are not deleted. Vertices, edges and wires cannot be deleted
+        directly.
+
+        Attribute values of the deleted entities are also deleted. Entity IDs are not reused, see
+        compact().
+
+        :param ents: A single entity ID or a list of entity IDs.
+        :param del_posis: If true, then the unused positions of the objects are also deleted.
+        :return: No value.
+        """
+        ents = ents if type(ents) is list else [ents]
+        dead = OrderedDict() # ordered set
+        posis = []
+        points = []
+        objs = []
+        for ent in ents:
+            ent_type = self._graph_ent_type(ent)
+            if ent_type in _TOPO_ENT_TYPES:
+                raise Exception('Vertices, edges and wires cannot be deleted directly.')
+            if ent_type == ENT_TYPE.POSI:
+                posis.append(ent)
+                continue
+            dead[ent] = None
+            if ent_type == ENT_TYPE.POINT:
+                points.append(ent)
+            elif ent_type != ENT_TYPE.COLL:
+                objs.append(ent)
+        # topology of the objects
+        if points:
+            for vert in self.get_ents(ENT_TYPE.VERT, points):
+                dead[vert] = None
+        if objs:
+            for ent_type in [ENT_TYPE.WIRE, ENT_TYPE.EDGE, ENT_TYPE.VERT]:
+                for ent in self.get_ents(ent_type, objs):
+                    dead[ent] = None
+        # posis, that are only used by verts that are deleted
+        if del_posis and (points or objs):
+            posis.extend(self.get_ents(ENT_TYPE.POSI, points + objs))
+        for posi in posis:
+            if all(vert in dead for vert in self.graph.predecessors_view(posi, _GR_EDGE_TYPE.ENT)):
+                dead[posi] = None
+        self.graph.del_nodes(list(dead.keys()))
+        node_id = self.graph.get_node_id
+        if self._grid is not None:
+            self._grid_dirty.update(node_id(ent) for ent in dead if ent[:2] == ENT_TYPE.POSI)
+        # the bboxes of colls are combined from their ents, so they are all cleared
+        if self._bboxes:
+            bboxes = self._bboxes
+            for ent in dead:
+                bboxes.pop(node_id(ent), None)
+            names = self.graph.get_node_name
+            for ent_id in [ent_id for ent_id in bboxes if names(ent_id)[:2] == ENT_TYPE.COLL]:
+                del bboxes[ent_id]
+    # ----------------------------------------------------------------------------------------------
+    def weld_posis(self, posis = None, tolerance = 1e-6):
+        """Merge positions that have the same coordinates, within a tolerance. Each position is 
+        merged into the first position in the list that is within the tolerance distance, and 
+        then it is deleted. The vertices that used a merged position are linked to the position 
+        it was merged into, so the objects become connected. Positions without coordinates are 
+        skipped. 
+
+        The coordinates are put in the cells of a grid, with a cell size equal to the tolerance, 
+        so only the positions in the same cell and the neighbouring cells are compared. All the 
+        vertices are relinked in one step. Attribute values of the merged positions are deleted. 
+
+        :param posis: A list of position IDs, or None to weld all positions.
+        :param tolerance: The maximum distance between positions that are merged. If 0, only
+            positions with exactly the same coordinates are merged.
+        :return: The number of positions that were merged.
+        """
+        graph = self.graph
+        if posis is None:
+            posi_ids = graph.successors_id(
+                graph.get_node_id(_GR_ENTS_NODE[ENT_TYPE.POSI]), _GR_EDGE_TYPE.META)
+        else:
+            node_id = graph.get_node_id
+            posi_ids = [node_id(posi) for posi in posis]
+        coords = graph.get_table_rows(posi_ids, _GR_XYZ_NODE)
+        # the merged posi ids, and the posi id they are merged into
+        welds = OrderedDict()
+        if tolerance <= 0:
+            kept = dict()
+            for posi_id, xyz in zip(posi_ids, coords):
+                if xyz is None:
+                    continue
+                key = tuple(xyz)
+                kept_id = kept.get(key)
+                if kept_id is None:
+                    kept[key] = posi_id
+                elif kept_id != posi_id:
+                    welds[posi_id] = kept_id
+        else:
+            floor = math.floor
+            tol2 = tolerance * tolerance
+            cells = dict()
+            for posi_id, xyz in zip(posi_ids, coords):
+                if xyz is None:
+                    continue
+                x, y, z = xyz
+                i = int(floor(x / tolerance))
+                j = int(floor(y / tolerance))
+                k = int(floor(z / tolerance))
+                kept_id = None
+                for di, dj, dk in NEIGHBOUR_OFFSETS:
+                    cell = cells.get((i + di, j + dj, k + dk))
+                    if cell is None:
+                        continue
+                    for cell_posi_id, (x1, y1, z1) in cell:
+                        if (x - x1) * (x - x1) + (y - y1) * (y - y1) + (z - z1) * (z - z1) <= tol2:
+                            kept_id = cell_posi_id
+                            break
+                    if kept_id is not None:
+                        break
+                if kept_id is None:
+                    cell = cells.get((i, j, k))
+                    if cell is None:
+                        cells[(i, j, k)] = [(posi_id, xyz)]
+                    else:
+                        cell.append((posi_id, xyz))
+                elif kept_id != posi_id:
+                    welds[posi_id] = kept_id
+        if not welds:
+            return 0
+        # the pgons that use the merged posis have to be triangulated again
+        self._graph_posis_changed(list(welds.keys()))
+        # the objects that use the merged posis will use the kept posis
+        if self._bboxes:
+            self._bbox_dirty.update(welds.values())
+        # relink the verts, and delete the merged posis
+        graph.redirect_edges_id(welds, _GR_EDGE_TYPE.ENT)
+        names = graph.get_node_name
+        graph.del_nodes([names(posi_id) for posi_id in welds])
+        return len(welds)
+    # ----------------------------------------------------------------------------------------------
+    def compact(self):
+        """Compact the model, to reclaim the memory used by deleted entities and by attribute
+        values that are no longer used. The entities are renamed, so that the entity IDs of each
+        type are numbered from 0 without gaps, in the same order as get_ents(). 
+        
+        All the snapshots are compacted. Entity IDs held by the caller are no longer valid, use the
+        returned dict to update them. The model cannot be compacted while it has views.
+
+        :return: A dict, where the key is the old entity ID and the value is the new entity ID,
+            for entities that were renamed.
+        """
+        graph = self.graph
+        ssids = graph.get_snapshots()
+        # delete the attrib value nodes that are no longer used
+        atts = [att for att_types_n in _GR_ATTRIBS_NODE.values() 
+            for att in graph.successors(att_types_n, _GR_EDGE_TYPE.META)]
+        for ssid in ssids:
+            if graph.is_frozen(ssid):
+                continue
+            # attrib values can be shared by attribs, so check all attribs
+            used = set()
+            for att in atts:
+                used.update(graph.nodes_with_in_edge_view(att, ssid))
+            unused = [att_val for att in atts 
+                for att_val in graph.predecessors_view(att, _GR_EDGE_TYPE.ATT, ssid)
+                if att_val not in used]
+            if unused:
+                graph.del_nodes(unused, ssid)
+        # rename the ents, the ents in the active snapshot come first
+        ssids.remove(graph.get_active_snapshot())
+        ssids.insert(0, graph.get_active_snapshot())
+        renames = dict()
+        for ent_type, ent_types_n in _GR_ENTS_NODE.items():
+            ents = OrderedDict() # ordered set
+            for ssid in ssids:
+                for ent in graph.successors_view(ent_types_n, _GR_EDGE_TYPE.META, ssid):
+                    ents[ent] = None
+            for ent_i, ent in enumerate(ents):
+                new_ent = ent_type + str(ent_i)
+                if new_ent != ent:
+                    renames[ent] = new_ent
+            graph.set_counter(ent_types_n, len(ents))
+        # remove the nodes without edges, and renumber the nodes
+        keep = list(_GR_ENTS_NODE.values()) + list(_GR_ATTRIBS_NODE.values())
+        new_ids = graph.compact(keep, renames)
+        # the node ids have changed, caches that are shared by snapshots stay shared
+        new_caches = dict() # key is id(cache), value is the new cache
+        for ssid, cache in list(self._tris.items()):
+            if id(cache) not in new_caches:
+                new_caches[id(cache)] = dict((new_ids[pgon_id], tris) 
+                    for pgon_id, tris in cache.items() if new_ids[pgon_id] != -1)
+            self._tris[ssid] = new_caches[id(cache)]
+            self._tris_deps[ssid] = None
+        self._grid = None
+        self._bboxes = dict()
+        self._bbox_dirty = set()
+        return renames
+    # ==============================================================================================
+    # TRANSFORM ENTITIES
+    # ==============================================================================================
+    def xform_posis(self, ents, matrix):
+        """Transform the positions of entities with a 4x4 transformation matrix. The positions are
+        found in one step, see get_ents(), and all their coordinates are transformed in one step.
+        Positions that are shared by multiple entities are only transformed once. Positions without
+        coordinates are skipped.
+
+        The matrix is applied to the XYZ coordinates as a column vector [x, y, z, 1], so the 
+        translation is in the last column. 
+
+        :param ents: A single entity ID or a list of entity IDs. 
+        :param matrix: A 4x4 matrix, a list of four rows, each a list of four numbers. This can
+            also be a NumPy array with shape (4, 4).
+        :return: No value.
+        """
+        if hasattr(matrix, 'tolist'):
+            matrix = matrix.tolist() # NumPy array
+        if len(matrix) != 4 or any(len(row) != 4 for row in matrix):
+            raise Exception('The matrix must be a 4x4 matrix.')
+        posis = self.get_ents(ENT_TYPE.POSI, ents if type(ents) is list else [ents])
+        node_id = self.graph.get_node_id
+        posi_ids = [node_id(posi) for posi in posis]
+        posis_xyz = [(posi_id, xyz) for posi_id, xyz in 
+            zip(posi_ids, self.graph.get_table_rows(posi_ids, _GR_XYZ_NODE)) if xyz is not None]
+        (m00, m01, m02, m03), (m10, m11, m12, m13), (m20, m21, m22, m23), row3 = matrix
+        if list(row3) == [0, 0, 0, 1]:
+            coords = [[m00 * x + m01 * y + m02 * z + m03, m10 * x + m11 * y + m12 * z + m13, 
+                m20 * x + m21 * y + m22 * z + m23] for _, (x, y, z) in posis_xyz]
+        else:
+            # projective transformation
+            m30, m31, m32, m33 = row3
+            coords = []
+            for _, (x, y, z) in posis_xyz:
+                w = m30 * x + m31 * y + m32 * z + m33
+                coords.append([(m00 * x + m01 * y + m02 * z + m03) / w, 
+                    (m10 * x + m11 * y + m12 * z + m13) / w, (m20 * x + m21 * y + m22 * z + m23) / w])
+        posi_ids = [posi_id for posi_id, _ in posis_xyz]
+        self.graph.set_table_rows(posi_ids, coords, _GR_XYZ_NODE)
+        self._graph_posis_changed(posi_ids)
+    # ----------------------------------------------------------------------------------------------
+    def move(self, ents, vec):
+        """Move the positions of entities by a vector, see xform_posis().
+
+        :param ents: A single entity ID or a list of entity IDs. 
+        :param vec: The vector, a list of three numbers.
+        :return: No value.
+        """
+        self.xform_posis(ents, [
+            [1, 0, 0, vec[0]], 
+            [0, 1, 0, vec[1]], 
+            [0, 0, 1, vec[2]], 
+            [0, 0, 0, 1]
+        ])
+    # ----------------------------------------------------------------------------------------------
+    def rotate(self, ents, origin, axis, angle):
+        """Rotate the positions of entities around an axis, see xform_posis(). The rotation
+        follows the right-hand rule.
+
+        :param ents: A single entity ID or a list of entity IDs. 
+        :param origin: A point on the axis, a list of three numbers.
+        :param axis: The direction of the axis, a list of three numbers.
+        :param angle: The angle of rotation, in radians.
+        :return: No value.
+        """
+        x, y, z = self._unit_vec(axis)
+        c = math.cos(angle)
+        s = math.sin(angle)
+        t = 1 - c
+        rot = [
+            [t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+            [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+            [t * x * z - s * y, t * y * z + s * x, t * z * z + c]
+        ]
+        self.xform_posis(ents, self._linear_xform(rot, origin))
+    # ----------------------------------------------------------------------------------------------
+    def scale(self, ents, origin, factor):
+        """Scale the positions of entities relative to an origin, see xform_posis().
+
+        :param ents: A single entity ID or a list of entity IDs. 
+        :param origin: The origin of the scaling, a list of three numbers.
+        :param factor: The scale factor, a number, or a list of three numbers for the X, Y and Z
+            scale factors.
+        :return: No value.
+        """
+        fx, fy, fz = factor if type(factor) in (list, tuple) else (factor, factor, factor)
+        self.xform_posis(ents, self._linear_xform([[fx, 0, 0], [0, fy, 0], [0, 0, fz]], origin))
+    # ----------------------------------------------------------------------------------------------
+    def mirror(self, ents, origin, normal):
+        """Mirror the positions of entities in a plane, see xform_posis().
+
+        :param ents: A single entity ID or a list of entity IDs. 
+        :param origin: A point on the plane, a list of three numbers.
+        :param normal: The normal of the plane, a list of three numbers.
+        :return: No value.
+        """
+        x, y, z = self._unit_vec(normal)
+        ref = [
+            [1 - 2 * x * x, -2 * x * y, -2 * x * z],
+            [-2 * x * y, 1 - 2 * y * y, -2 * y * z],
+            [-2 * x * z, -2 * y * z, 1 - 2 * z * z]
+        ]
+        self.xform_posis(ents, self._linear_xform(ref, origin))
     # ==============================================================================================
     # COLLECTIONS 
     # ==============================================================================================
@@ -473,10 +1038,11 @@ class SIM(object):
         :param ent: The ID of the entity to be added to the collection.
         :return: No value.
         """
-        ent_type = self.graph.get_node_prop(ent, 'ent_type')
+        ent_type = self._graph_ent_type(ent)
         if ent_type not in _COLL_ENT_TYPES:
             raise Exception('Invalid entitiy for collections.')
         self.graph.add_edge(coll, ent, _GR_EDGE_TYPE.ENT)
+        self._graph_dirty_bboxes([self.graph.get_node_id(coll)])
     # ----------------------------------------------------------------------------------------------
     def rem_coll_ent(self, coll, ent):
         """Remove an entity from an existing collection in the model.
@@ -488,6 +1054,7 @@ class SIM(object):
         :return: No value.
         """
         self.graph.del_edge(coll, ent, _GR_EDGE_TYPE.ENT)
+        self._graph_dirty_bboxes([self.graph.get_node_id(coll)])
     # ==============================================================================================
     # ENTITY ATTRIBUTES
     # ==============================================================================================
@@ -543,7 +1110,7 @@ class SIM(object):
         :param att_value: The attribute value to set.
         :return: No value.
         """
-        ent_type = self.graph.get_node_prop(ent, 'ent_type')
+        ent_type = self._graph_ent_type(ent)
         att_node = self._graph_attrib_node_name(ent_type, att_name)
         if ent_type != self.graph.get_node_prop(att_node, 'ent_type'):
             raise Exception('Entity and attribute have different types.')
@@ -552,6 +1119,10 @@ class SIM(object):
             raise Exception('Attribute value has the wrong data type: ' + str(att_value) +
                 'The data type is a "' + data_type + '". ' + 
                 'The data type should be a "' + self.graph.get_node_prop(att_node, 'data_type') + '".' )
+        # xyz coordinates are stored in a table
+        if att_node == _GR_XYZ_NODE:
+            self.set_posi_coords(ent, att_value)
+            return
         # get the name of the attribute value node
         att_val_node = self._graph_attrib_val_node_name(att_value, att_node)
         # make the att_val_node exists
@@ -574,8 +1145,10 @@ class SIM(object):
         :param att_name: The name of the attribute.
         :return: The attribute value or None if no value.
         """
-        ent_type = self.graph.get_node_prop(ent, 'ent_type')
+        ent_type = self._graph_ent_type(ent)
         att_node = self._graph_attrib_node_name(ent_type, att_name)
+        if att_node == _GR_XYZ_NODE:
+            return self.get_posi_coords(ent)
         succs = self.graph.successors(ent, att_node)
         if len(succs) == 0:
             return None
@@ -589,8 +1162,13 @@ class SIM(object):
         :param att_name: The name of the attribute to delete.
         :return: No value.
         """
-        ent_type = self.graph.get_node_prop(ent, 'ent_type')
+        ent_type = self._graph_ent_type(ent)
         att_node = self._graph_attrib_node_name(ent_type, att_name)
+        if att_node == _GR_XYZ_NODE:
+            posi_id = self.graph.get_node_id(ent)
+            self.graph.del_table_row(posi_id, _GR_XYZ_NODE)
+            self._graph_posis_changed([posi_id])
+            return
         succs = self.graph.successors(ent, att_node)
         if len(succs) == 0:
             return
@@ -604,6 +1182,13 @@ class SIM(object):
         :return: A list of all attribute values.
         """
         att_node = self._graph_attrib_node_name(ent_type, att_name)
+        if att_node == _GR_XYZ_NODE:
+            # the distinct coordinates, in the order of the positions
+            coords = OrderedDict() # ordered set
+            for xyz in self.get_posis_coords(self.iter_ents(ENT_TYPE.POSI)):
+                if xyz is not None:
+                    coords[tuple(xyz)] = None
+            return [list(xyz) for xyz in coords]
         att_val_nodes = self.graph.predecessors(att_node, _GR_EDGE_TYPE.ATT)
         values = []
         for att_val_node in att_val_nodes:
@@ -628,6 +1213,8 @@ class SIM(object):
         :return: The attribute value or None if no value.
         """
         old_att_node = self._graph_attrib_node_name(ent_type, att_name)
+        if old_att_node == _GR_XYZ_NODE:
+            raise Exception('The xyz attribute cannot be renamed.')
         att_data_type = self.graph.get_node_prop(old_att_node, 'data_type')
         new_att_node = self._graph_add_attrib(ent_type, new_name, att_data_type)
         for pred in self.graph.predecessors(old_att_node, _GR_EDGE_TYPE.ATT):
@@ -695,6 +1282,18 @@ class SIM(object):
             _GR_EDGE_TYPE.META
         )
     # ----------------------------------------------------------------------------------------------
+    def iter_ents(self, ent_type):
+        """Iterate over all the entities in the model of a specific type, without creating a
+        list. The model should not be modified while iterating.
+
+        :param ent_type: The type of entity to iterate over.
+        :return: An iterator of entity IDs.
+        """
+        return iter(self.graph.successors_view(
+            _GR_ENTS_NODE[ent_type], 
+            _GR_EDGE_TYPE.META
+        ))
+    # ----------------------------------------------------------------------------------------------
     def get_ents(self, target_ent_type, source_ents = None):
         """Get entities of a specific type. A list of entity IDs is returned.
 
@@ -721,9 +1320,14 @@ class SIM(object):
         if not type(source_ents) is list:
             return self._nav(target_ent_type, source_ents)
         # a list with multiple items
+        # consecutive source ents of the same type are navigated together
+        ents_lists = [self._nav_ents(target_ent_type, source_ent_type, list(group)) 
+            for source_ent_type, group in groupby(source_ents, self._graph_ent_type)]
+        if len(ents_lists) == 1:
+            return ents_lists[0]
         ents_set = OrderedDict() # ordered set
-        for source_ent in source_ents:
-            for target_ent in self._nav(target_ent_type, source_ent):
+        for ents in ents_lists:
+            for target_ent in ents:
                 ents_set[target_ent] = None # ordered set
         return list(ents_set.keys())
     # ----------------------------------------------------------------------------------------------
@@ -738,9 +1342,48 @@ class SIM(object):
                 return _ENT_SEQ_CO_PG_PO
             return _ENT_SEQ
     # ----------------------------------------------------------------------------------------------
-    # TODO more tests needed
+    def _nav_hops(self, target_ent_type, source_ent_type):
+        """Get the plan of hops for Graph.traverse(), to navigate from entities of type 
+        source_ent_type to entities of type target_ent_type. 
+        If the source or the target are collections, None is returned.
+        """
+        if source_ent_type == ENT_TYPE.COLL or target_ent_type == ENT_TYPE.COLL:
+            return None
+        ent_seq = self._get_ent_seq(target_ent_type, source_ent_type)
+        dist = ent_seq[source_ent_type] - ent_seq[target_ent_type]
+        if dist > 0:
+            # going down, each hop reaches the next type of ent in the sequence
+            return [(_GR_EDGE_TYPE.ENT, Graph.FWD)] * dist
+        # going up, other types of ents can be reached, e.g. points from verts
+        # so only keep the ents of the target type after the last hop
+        hops = [(_GR_EDGE_TYPE.ENT, Graph.REV)] * (-dist - 1)
+        hops.append((_GR_EDGE_TYPE.ENT, Graph.REV, lambda ent: ent[:2] == target_ent_type))
+        return hops
+    # ----------------------------------------------------------------------------------------------
+    def _nav_ents(self, target_ent_type, source_ent_type, source_ents):
+        """Navigate from a list of entities, all of type source_ent_type, to entities of type
+        target_ent_type.
+        """
+        if source_ent_type == target_ent_type:
+            if source_ent_type == ENT_TYPE.COLL:
+                return [] # TODO nav colls of colls
+            return list(OrderedDict.fromkeys(source_ents))
+        hops = self._nav_hops(target_ent_type, source_ent_type)
+        if hops is not None:
+            return self.graph.traverse(source_ents, hops)
+        # collections, walk the graph from each source ent
+        ents_set = OrderedDict() # ordered set
+        for source_ent in source_ents:
+            for target_ent in self._nav_walk(target_ent_type, source_ent):
+                ents_set[target_ent] = None # ordered set
+        return list(ents_set.keys())
+    # ----------------------------------------------------------------------------------------------
     def _nav(self, target_ent_type, source_ent):
-        source_ent_type = self.graph.get_node_prop(source_ent, 'ent_type')
+        return self._nav_ents(target_ent_type, self._graph_ent_type(source_ent), [source_ent])
+    # ----------------------------------------------------------------------------------------------
+    # TODO more tests needed
+    def _nav_walk(self, target_ent_type, source_ent):
+        source_ent_type = self._graph_ent_type(source_ent)
         ent_seq = self._get_ent_seq(target_ent_type, source_ent_type)
         if source_ent_type == target_ent_type:
             if source_ent_type == ENT_TYPE.COLL:
@@ -751,15 +1394,17 @@ class SIM(object):
             return self.graph.successors(source_ent, _GR_EDGE_TYPE.ENT)
         if dist == -1:
             return self.graph.predecessors(source_ent, _GR_EDGE_TYPE.ENT)
-        # get the function to navigate
-        navigate = self.graph.successors if dist > 0 else self.graph.predecessors
-        ents = [source_ent]
+        # get the function to navigate, the graph is walked using node ids
+        navigate = self.graph.successors_id if dist > 0 else self.graph.predecessors_id
+        node_name = self.graph.get_node_name
+        ents = [self.graph.get_node_id(source_ent)]
         target_ents_set = OrderedDict() # to be used as an ordered set
         while ents:
             ent_set = OrderedDict() # to be used as an ordered set
             for ent in ents:
                 for target_ent in navigate(ent, _GR_EDGE_TYPE.ENT):
-                    this_ent_type = self.graph.get_node_prop(target_ent, 'ent_type')
+                    # the entity type is the prefix of the entity name, e.g. 'pg' for 'pg12'
+                    this_ent_type = node_name(target_ent)[:2]
                     if this_ent_type == target_ent_type:
                         target_ents_set[target_ent] = None # add to orderd set
                     elif this_ent_type in ent_seq:
@@ -768,7 +1413,7 @@ class SIM(object):
                         elif dist < 0 and ent_seq[this_ent_type] < ent_seq[target_ent_type]:
                             ent_set[target_ent] = None # add to orderd set
             ents = ent_set.keys()
-        return list(target_ents_set.keys())
+        return [node_name(target_ent) for target_ent in target_ents_set]
 
 
     # ----------------------------------------------------------------------------------------------
@@ -784,7 +1429,7 @@ class SIM(object):
         :param point: An entity ID from which to get the position.
         :return: A list of position IDs. 
         """
-        ent_type = self.graph.get_node_prop(ent, 'ent_type')
+        ent_type = self._graph_ent_type(ent)
         if ent_type == ENT_TYPE.POSI:
             return ent
         elif ent_type == ENT_TYPE.VERT:
@@ -824,45 +1469,212 @@ class SIM(object):
             raise Exception('Not implemented') # TODO
 
     # ----------------------------------------------------------------------------------------------
+    def get_pgon_tris(self, pgon):
+        """Get the triangles of a polygon. If the polygon has not been triangulated yet, then it 
+        is triangulated, see triangulate_pgon().
+
+        The triangles have the same orientation as the polygon boundary.
+
+        :param pgon: The polygon ID.
+        :return: A list of triangles, each a list of three position IDs.
+        """
+        if self._graph_ent_type(pgon) != ENT_TYPE.PGON:
+            raise Exception('Entity is not a polygon.')
+        pgon_id = self.graph.get_node_id(pgon)
+        rings_ids = self._graph_pgon_posi_ids(pgon_id)
+        tris = self._graph_tris_cache().get(pgon_id) if self._tris_cached else None
+        if tris is None:
+            tris = self._graph_triangulate_pgon(pgon_id, rings_ids)
+        names = self.graph.get_node_name
+        posis = [names(posi_id) for ring_ids in rings_ids for posi_id in ring_ids]
+        return [[posis[tris[i]], posis[tris[i + 1]], posis[tris[i + 2]]] 
+            for i in range(0, len(tris), 3)]
+    # ----------------------------------------------------------------------------------------------
     def get_vert_coords(self, vert):
         """Get the XYZ coordinates of a vertex.
 
         :param posi: A vertex ID.
         :return: A list of three numbers, the XYZ coordinates.
         """
-        posi = self.graph.successors(vert, _GR_EDGE_TYPE.ENT)[0]
-        att_val_node = self.graph.successors(posi, _GR_XYZ_NODE)[0]
-        return self.graph.get_node_prop(att_val_node, 'value')
+        posi_id = self.graph.successors_id(self.graph.get_node_id(vert), _GR_EDGE_TYPE.ENT)[0]
+        return self.graph.get_table_row(posi_id, _GR_XYZ_NODE)
     # ----------------------------------------------------------------------------------------------
     def get_posi_coords(self, posi):
-        """Get the XYZ coordinates of a position.
+        """Get the XYZ coordinates of a position. If the position has no coordinates, then `None`
+        is returned.
 
         :param posi: A position ID.
         :return: A list of three numbers, the XYZ coordinates.
         """
-        att_val_node = self.graph.successors(posi, _GR_XYZ_NODE)[0]
-        return self.graph.get_node_prop(att_val_node, 'value')
-# ----------------------------------------------------------------------------------------------
+        return self.graph.get_table_row(self.graph.get_node_id(posi), _GR_XYZ_NODE)
+    # ----------------------------------------------------------------------------------------------
+    def get_posis_coords(self, posis):
+        """Get the XYZ coordinates of multiple positions, in one step. For positions with no
+        coordinates, `None` is returned.
+
+        :param posis: A list of position IDs.
+        :return: A list of XYZ coordinates, each a list of three numbers. The list can be
+            converted to a NumPy array with shape (N, 3).
+        """
+        node_id = self.graph.get_node_id
+        return self.graph.get_table_rows([node_id(posi) for posi in posis], _GR_XYZ_NODE)
+    # ----------------------------------------------------------------------------------------------
     def set_posi_coords(self, posi, xyz):
         """Set the XYZ coordinates of a position.
 
         :param posi: A position ID.
-        :return: The ID of the attrib value node.
+        :param xyz: The XYZ coordinates, a list of three numbers.
+        :return: No value.
         """
-        # get the name of the attribute value node
-        att_val_node = self._graph_attrib_val_node_name(xyz, _GR_XYZ_NODE)
-        # make sure that no node with the name already exists
-        if (not self.graph.has_node(att_val_node)) :
-            # add the attrib value node
-            self.graph.add_node(att_val_node)
-            self.graph.set_node_prop(att_val_node, 'value', xyz)
-        # add an edge from the att_val_node to the attrib att_val -> att
-        self.graph.add_edge(att_val_node, _GR_XYZ_NODE, _GR_EDGE_TYPE.ATT)
-        # add and edge from the ent to the att_val_node: ent -> att_val, ent <- att_val
-        self.graph.del_edge(posi, None, _GR_XYZ_NODE)
-        self.graph.add_edge(posi, att_val_node, _GR_XYZ_NODE) 
-        # return att_val_node
-        return att_val_node
+        posi_id = self.graph.get_node_id(posi)
+        self.graph.set_table_row(posi_id, xyz, _GR_XYZ_NODE)
+        self._graph_posis_changed([posi_id])
+    # ----------------------------------------------------------------------------------------------
+    def set_posis_coords(self, posis, coords):
+        """Set the XYZ coordinates of multiple positions, in one step.
+
+        :param posis: A list of position IDs.
+        :param coords: A list of XYZ coordinates, each a list of three numbers. This can also be a
+            NumPy array with shape (N, 3).
+        :return: No value.
+        """
+        if hasattr(coords, 'tolist'):
+            coords = coords.tolist() # NumPy array
+        node_id = self.graph.get_node_id
+        posi_ids = [node_id(posi) for posi in posis]
+        self.graph.set_table_rows(posi_ids, coords, _GR_XYZ_NODE)
+        self._graph_posis_changed(posi_ids)
+    # ==============================================================================================
+    # SNAPSHOTS
+    # ==============================================================================================
+    def new_snapshot(self):
+        """Start a new snapshot of the model. The new snapshot starts as a copy of the current
+        active snapshot, and becomes the active snapshot. The two snapshots share their data, and
+        data is only copied when it is modified.
+
+        :return: The ID of the new snapshot.
+        """
+        ssid = self.graph.get_active_snapshot()
+        new_ssid = self.graph.new_snapshot(ssid)
+        # the cached triangles are shared
+        if ssid in self._tris:
+            self._tris[new_ssid] = self._tris[ssid]
+            self._tris_deps[new_ssid] = self._tris_deps[ssid]
+            self._tris_shared.update([ssid, new_ssid])
+        self._graph_prune_tris()
+        return new_ssid
+    # ----------------------------------------------------------------------------------------------
+    def get_active_snapshot(self):
+        """Get the ID of the current active snapshot.
+
+        :return: The ID of the current active snapshot.
+        """
+        return self.graph.get_active_snapshot()
+    # ----------------------------------------------------------------------------------------------
+    def set_active_snapshot(self, ssid):
+        """Set the current active snapshot.
+
+        :param ssid: The ID of an existing snapshot.
+        :return: No value.
+        """
+        prev_ssid = self.graph.get_active_snapshot()
+        self.graph.set_active_snapshot(ssid)
+        if ssid != prev_ssid:
+            self._grid = None
+            self._bboxes = dict()
+            self._bbox_dirty = set()
+    # ----------------------------------------------------------------------------------------------
+    def delete_snapshot(self, ssid):
+        """Delete a snapshot. The current active snapshot cannot be deleted.
+        Data that is shared with other snapshots is kept.
+
+        :param ssid: The ID of an existing snapshot.
+        :return: No value.
+        """
+        self.graph.delete_snapshot(ssid)
+        self._graph_prune_tris()
+    # ----------------------------------------------------------------------------------------------
+    def set_concurrent(self, concurrent):
+        """Turn the concurrent mode on or off. In concurrent mode, the model can be read by
+        multiple threads using views, see new_view(), while one thread modifies the model.
+        The concurrent mode should be turned on before starting the threads.
+
+        :param concurrent: True to turn on the concurrent mode, False to turn it off.
+        :return: No value.
+        """
+        self.graph.set_concurrent(concurrent)
+    # ----------------------------------------------------------------------------------------------
+    def new_view(self):
+        """Create a read-only view of the current active snapshot. The view is a model that can
+        be queried in the same way as this model, but cannot be modified. It does not see changes
+        made to this model after it was created, except for changes to model attributes.
+        Creating a view does not copy the data in the model.
+
+        In concurrent mode, views can be read by other threads while this model is modified,
+        see set_concurrent(). Release the view when it is no longer needed, see release_view().
+
+        :return: A read-only model.
+        """
+        view = copy.copy(self)
+        view.graph = self.graph.new_view()
+        view._tris = dict()
+        view._tris_deps = dict()
+        view._tris_shared = set()
+        view._tris_cached = False
+        view._grid = None
+        view._grid_dirty = set()
+        view._bboxes = dict()
+        view._bbox_dirty = set()
+        return view
+    # ----------------------------------------------------------------------------------------------
+    def release_view(self, view):
+        """Release a view created by new_view(). The view can no longer be queried.
+
+        :param view: A view created by new_view().
+        :return: No value.
+        """
+        self.graph.release_view(view.graph)
+    # ----------------------------------------------------------------------------------------------
+    def diff_snapshots(self, ssid_a, ssid_b):
+        """Compare two snapshots of the model. A dict is returned with three lists of entity IDs:
+
+        - 'created': entities in snapshot `ssid_b` that are not in snapshot `ssid_a`.
+        - 'deleted': entities in snapshot `ssid_a` that are not in snapshot `ssid_b`.
+        - 'reattributed': entities in both snapshots with attribute values that differ.
+
+        :param ssid_a: The ID of the first snapshot.
+        :param ssid_b: The ID of the second snapshot.
+        :return: A dict with the created, deleted and reattributed entity IDs.
+        """
+        diff = self.graph.diff_snapshots(ssid_a, ssid_b)
+        ents_nodes = set(_GR_ENTS_NODE.values())
+        created = OrderedDict() # ordered set
+        deleted = OrderedDict() # ordered set
+        reattributed = OrderedDict() # ordered set
+        # created and deleted entities, from the edges that link ent_type -> ent
+        if _GR_EDGE_TYPE.META in diff:
+            added, removed = diff[_GR_EDGE_TYPE.META]
+            for ent_type_n, ent in added:
+                if ent_type_n in ents_nodes:
+                    created[ent] = None
+            for ent_type_n, ent in removed:
+                if ent_type_n in ents_nodes:
+                    deleted[ent] = None
+        # reattributed entities, from the edges that link ent -> att_val
+        for edge_type, (added, removed) in diff.items():
+            if edge_type.startswith('_att_'):
+                for ent, _ in added + removed:
+                    if ent not in created and ent not in deleted:
+                        reattributed[ent] = None
+        # positions with coordinates that differ
+        for posi in self.graph.diff_table(_GR_XYZ_NODE, ssid_a, ssid_b):
+            if posi not in created and posi not in deleted:
+                reattributed[posi] = None
+        return {
+            'created': list(created.keys()),
+            'deleted': list(deleted.keys()),
+            'reattributed': list(reattributed.keys())
+        }
     # ==============================================================================================
     # QUERY
     # ==============================================================================================
@@ -891,11 +1703,13 @@ class SIM(object):
         att_node = self._graph_attrib_node_name(ent_type, att_name)
         if not self.graph.has_node(att_node):
             raise Exception("The attribute does not exist: '" + att_name + "'.")
+        # xyz coordinates are stored in a table
+        if att_node == _GR_XYZ_NODE:
+            return self._query_xyz(comparator, att_val)
         # val == None
         if comparator == '==' and att_val == None:
-            set_with_val = set(self.graph.get_nodes_with_out_edge(att_node))
-            set_all = set(self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META))
-            return list(set_all - set_with_val)
+            ents_with_val = self.graph.nodes_with_out_edge_view(att_node)
+            return [ent for ent in self.iter_ents(ent_type) if ent not in ents_with_val]
         # val != None
         if comparator == '!=' and att_val == None:
             return self.graph.get_nodes_with_out_edge(att_node)
@@ -909,50 +1723,150 @@ class SIM(object):
         if comparator == '!=':
             att_val_node = self._graph_attrib_val_node_name(att_val, att_node)
             if not self.graph.has_node(att_val_node):
-                return self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META)
-            ents_equal = self.graph.predecessors(att_val_node, att_node)
+                return self.get_ents(ent_type)
+            ents_equal = self.graph.predecessors_view(att_val_node, att_node)
             if len(ents_equal) == 0:
-                return self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META)
-            set_equal = set(ents_equal)
-            set_all = set(self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META))
-            return list(set_all - set_equal)
+                return self.get_ents(ent_type)
+            return [ent for ent in self.iter_ents(ent_type) if ent not in ents_equal]
         # other cases, data_type must be a number
         data_type = self.graph.get_node_prop(att_node, 'data_type')
         if data_type != DATA_TYPE.NUM:
             raise Exception("The '" + comparator +
                 "' comparator cannot be used with attributes of type '" + data_type + "'.")
         result = []
-        # val < att_val
-        if comparator == '<':
-            result = []
-            for ent in self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META):
-                succs = self.graph.successors(ent, att_node)
-                if len(succs) != 0 and self.graph.get_node_prop(succs[0], 'value') < att_val:
-                    result.append(ent)
-        # val <= att_val
-        if comparator == '<=':
-            result = []
-            for ent in self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META):
-                succs = self.graph.successors(ent, att_node)
-                if len(succs) != 0 and self.graph.get_node_prop(succs[0],'value') <= att_val:
-                    result.append(ent)
-        # val > att_val
-        if comparator == '>':
-            result = []
-            for ent in self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META):
-                succs = self.graph.successors(ent, att_node)
-                if len(succs) != 0 and self.graph.get_node_prop(succs[0], 'value') > att_val:
-                    result.append(ent)
-        # val >= att_val
-        if comparator == '>=':
-            result = []
-            for ent in self.graph.successors(_GR_ENTS_NODE[ent_type], _GR_EDGE_TYPE.META):
-                succs = self.graph.successors(ent, att_node)
-                if len(succs) != 0 and self.graph.get_node_prop(succs[0], 'value') >= att_val:
-                    result.append(ent)
+        if comparator in _COMPARATORS:
+            # compare each distinct value once, then get the entities with those values
+            compare = _COMPARATORS[comparator]
+            ents_matched = set()
+            for att_val_node in self.graph.predecessors_view(att_node, _GR_EDGE_TYPE.ATT):
+                if compare(self.graph.get_node_prop(att_val_node, 'value'), att_val):
+                    ents_matched.update(self.graph.predecessors_view(att_val_node, att_node))
+            if ents_matched:
+                result = [ent for ent in self.iter_ents(ent_type) if ent in ents_matched]
         # return list of entities
         # TODO handle queries sub-entities in lists and dicts
         return result
+    # ----------------------------------------------------------------------------------------------
+    def _query_xyz(self, comparator, att_val):
+        """Find positions by comparing their XYZ coordinates, see query().
+        Only the '==' and '!=' comparators can be used.
+        """
+        if comparator != '==' and comparator != '!=':
+            raise Exception("The '" + comparator +
+                "' comparator cannot be used with attributes of type '" + DATA_TYPE.LIST + "'.")
+        if att_val is not None:
+            # round the value in the same way as the table
+            att_val = array(self._xyz_typecode, att_val).tolist()
+        posis = list(self.iter_ents(ENT_TYPE.POSI))
+        equal = comparator == '=='
+        return [posi for posi, xyz in zip(posis, self.get_posis_coords(posis)) 
+            if (xyz == att_val) == equal]
+    # ----------------------------------------------------------------------------------------------
+    def query_bbox(self, ent_type, bbox):
+        """Find entities inside or overlapping a bounding box. 
+        
+        Points, polylines, polygons and collections are found if their bounding boxes overlap the 
+        box, including boxes that only touch, see get_bboxes(). So an object is found even if 
+        none of its positions are inside the box. Positions are found if they are inside the box,
+        including positions on the faces of the box, with the spatial index, see nearest_posis().
+        Vertices, edges and wires are found if they have positions inside the box.
+
+        :param ent_type: The type of entities to find. (See ENT_TYPE)
+        :param bbox: The bounding box, a list with two XYZ coordinates, the corners with the 
+            minimum and the maximum coordinates.
+        :return: A list of entity IDs.
+        """
+        min_xyz, max_xyz = bbox
+        if ent_type in _COLL_ENT_TYPES:
+            x0, y0, z0 = min_xyz
+            x1, y1, z1 = max_xyz
+            graph = self.graph
+            ent_ids = graph.successors_id(graph.get_node_id(_GR_ENTS_NODE[ent_type]), 
+                _GR_EDGE_TYPE.META)
+            names = graph.get_node_name
+            return [names(ent_id) for ent_id, ent_bbox in zip(ent_ids, self._graph_bboxes(ent_ids))
+                if ent_bbox is not None and ent_bbox[0] <= x1 and ent_bbox[3] >= x0 and 
+                ent_bbox[1] <= y1 and ent_bbox[4] >= y0 and ent_bbox[2] <= z1 and ent_bbox[5] >= z0]
+        posi_ids = self._graph_grid().query_box(min_xyz, max_xyz)
+        names = self.graph.get_node_name
+        posis = [names(posi_id) for posi_id in sorted(posi_ids)]
+        if ent_type == ENT_TYPE.POSI or not posis:
+            return posis
+        return self.get_ents(ent_type, posis)
+    # ----------------------------------------------------------------------------------------------
+    def nearest_posis(self, xyz, num_posis = 1):
+        """Find the positions nearest to a point. 
+        
+        The positions are found with a spatial index, a grid of cells that each contain a few
+        positions, so only the positions in the cells near the point are checked. The index is 
+        created the first time it is used, and after that it is updated with the positions that 
+        were added, moved or deleted.
+
+        :param xyz: The XYZ coordinates of the point.
+        :param num_posis: The maximum number of positions to find.
+        :return: A list of position IDs, sorted by the distance to the point.
+        """
+        names = self.graph.get_node_name
+        return [names(posi_id) for _, posi_id in self._graph_grid().nearest(xyz, num_posis)]
+    # ----------------------------------------------------------------------------------------------
+    def query_radius(self, xyz, radius):
+        """Find the positions within a distance of a point, including positions at that 
+        distance. The positions are found with the spatial index, see nearest_posis().
+
+        :param xyz: The XYZ coordinates of the point.
+        :param radius: The distance.
+        :return: A list of position IDs.
+        """
+        names = self.graph.get_node_name
+        return [names(posi_id) for posi_id in sorted(self._graph_grid().query_radius(xyz, radius))]
+    # ----------------------------------------------------------------------------------------------
+    def get_bbox(self, ents):
+        """Get the bounding box of one or more entities. The entities can be positions, points, 
+        polylines, polygons and collections.
+
+        The bounding boxes of objects and collections are cached, and are cleared when positions 
+        of the objects are moved. The bounding box of a collection is combined from the bounding 
+        boxes of the entities in the collection.
+
+        :param ents: A single entity ID or a list of entity IDs.
+        :return: A list with two XYZ coordinates, the minimum and the maximum coordinates, or None
+            if the entities have no positions with coordinates.
+        """
+        node_id = self.graph.get_node_id
+        posi_ids = []
+        ent_ids = []
+        for ent in (ents if type(ents) is list else [ents]):
+            ent_type = self._graph_ent_type(ent)
+            if ent_type == ENT_TYPE.POSI:
+                posi_ids.append(node_id(ent))
+            elif ent_type in _COLL_ENT_TYPES:
+                ent_ids.append(node_id(ent))
+            else:
+                raise Exception('Vertices, edges and wires do not have bounding boxes.')
+        bboxes = self._graph_bboxes(ent_ids)
+        bboxes.extend(self._bbox_of_coords([xyz]) 
+            for xyz in self.graph.get_table_rows(posi_ids, _GR_XYZ_NODE))
+        bbox = self._bbox_combine(bboxes)
+        return None if bbox is None else [list(bbox[:3]), list(bbox[3:])]
+    # ----------------------------------------------------------------------------------------------
+    def get_bboxes(self, ent_type):
+        """Get the bounding boxes of all the entities of a type, in one step, see get_bbox(). The
+        bounding boxes that are not cached are computed in bulk.
+
+        :param ent_type: The entity type, positions, points, polylines, polygons or collections.
+        :return: A list of bounding boxes, in the same order as get_ents(ent_type). Each bounding
+            box is a list with two XYZ coordinates, or None.
+        """
+        if ent_type != ENT_TYPE.POSI and ent_type not in _COLL_ENT_TYPES:
+            raise Exception('Vertices, edges and wires do not have bounding boxes.')
+        graph = self.graph
+        ent_ids = graph.successors_id(graph.get_node_id(_GR_ENTS_NODE[ent_type]), 
+            _GR_EDGE_TYPE.META)
+        if ent_type == ENT_TYPE.POSI:
+            return [None if xyz is None else [xyz, list(xyz)] 
+                for xyz in graph.get_table_rows(ent_ids, _GR_XYZ_NODE)]
+        return [None if bbox is None else [list(bbox[:3]), list(bbox[3:])] 
+            for bbox in self._graph_bboxes(ent_ids)]
     # ==============================================================================================
     # PRIVATE GRAPH METHODS
     # ==============================================================================================
@@ -975,6 +1889,17 @@ class SIM(object):
             return att_val
         return str(att_val)
     # ----------------------------------------------------------------------------------------------
+    def _graph_ent_type(self, ent):
+        """Get the entity type of an entity node, from the prefix of the name. 
+        Throws an error if the node does not exist or is not an entity node.
+        """
+        if not self.graph.has_node(ent):
+            raise Exception('Node does not exist.')
+        ent_type = str(ent)[:2]
+        if ent_type not in _ALL_ENT_TYPES:
+            raise Exception('Node is not an entity.')
+        return ent_type
+    # ----------------------------------------------------------------------------------------------
     def _graph_add_ent(self, ent_type):
         """Add an entity node to the graph. 
         The entity can be a posi, vert, edge, wire, point, pline, pgon, coll.
@@ -982,20 +1907,385 @@ class SIM(object):
         The entity_type node wil be connected to the entity node.
         """
         ent_type_n = _GR_ENTS_NODE[ent_type]
-        # create the node name, from prefix and then next count number
-        ent_i = self.graph.degree_out(ent_type_n, edge_type = _GR_EDGE_TYPE.META)
-        ent = ent_type + str(ent_i)
+        # create the node name, from prefix and then the next index from the counter
+        # the counter for each ent type is named after the entity type node
+        ent = ent_type + str(self.graph.reserve_ids(ent_type_n))
         # add a node with name `n`
-        self.graph.add_node(ent)
-        # set entity type, `posi`, `vert`, etc
-        self.graph.set_node_prop(ent, 'ent_type', ent_type)  
+        # the entity type, `posi`, `vert`, etc, is not stored, it is the prefix of the name
+        ent_id = self.graph.add_node(ent)
         # create an edge from the node `ent_type` to the new node
         # the new edge is given the attribute `meta`
         # this edge is so that later the node can be found
-        self.graph.add_edge(ent_type_n, ent, _GR_EDGE_TYPE.META)
+        self.graph.add_edge_id(self.graph.get_node_id(ent_type_n), ent_id, _GR_EDGE_TYPE.META)
         # return the name of the new entity node
         return ent
     # ----------------------------------------------------------------------------------------------
+    def _graph_add_ents(self, ent_type, num_ents, props = None):
+        """Add multiple entity nodes of the same type to the graph, in one step.
+        The entity nodes will have the properties in `props`.
+        The entity_type node wil be connected to all the new entity nodes.
+
+        :return: A tuple with two lists, the names of the new entities and their node ids.
+        """
+        ent_type_n = _GR_ENTS_NODE[ent_type]
+        # create the node names, from prefix and then a range of indexes from the counter
+        start = self.graph.reserve_ids(ent_type_n, num_ents)
+        ents = [ent_type + str(ent_i) for ent_i in range(start, start + num_ents)]
+        # add the nodes, with the properties
+        ent_ids = self.graph.add_nodes(ents, props)
+        # create meta edges from the node `ent_type` to the new nodes
+        ent_type_id = self.graph.get_node_id(ent_type_n)
+        self.graph.add_edges_id([(ent_type_id, ent_id) for ent_id in ent_ids], _GR_EDGE_TYPE.META)
+        # return the names and ids of the new entity nodes
+        return ents, ent_ids
+    # ----------------------------------------------------------------------------------------------
+    def _graph_copy_ents(self, ents, vec):
+        """Copy entities, and all the entities linked to them by 'entity' edges, down to the 
+        positions, in one step. The entity edges, attribute values and XYZ coordinates are copied.
+        If vec is not None, the coordinates of the copied positions are moved by vec.
+
+        :return: A tuple with two lists, the names of the copies of ents, and the node ids of all the
+            entities that were copied.
+        """
+        graph = self.graph
+        node_id = graph.get_node_id
+        names = graph.get_node_name
+        for ent in ents:
+            if self._graph_ent_type(ent) in _TOPO_ENT_TYPES:
+                raise Exception('Vertices, edges and wires cannot be copied directly.')
+        # find all the linked ents, going down from collections to positions
+        src_ids = OrderedDict.fromkeys(map(node_id, ents)) # key is node id, value is successors
+        frontier = list(src_ids.keys())
+        while frontier:
+            next_frontier = []
+            for src_id in frontier:
+                succ_ids = graph.successors_id(src_id, _GR_EDGE_TYPE.ENT)
+                src_ids[src_id] = succ_ids
+                for succ_id in succ_ids:
+                    if succ_id not in src_ids:
+                        src_ids[succ_id] = None
+                        next_frontier.append(succ_id)
+            frontier = next_frontier
+        # group by ent type, in the order of the node ids, and verts also by vert type
+        groups = OrderedDict() # key is (ent_type, vert_type), value is a list of node ids
+        for src_id in sorted(src_ids):
+            ent = names(src_id)
+            ent_type = ent[:2]
+            vert_type = None
+            if ent_type == ENT_TYPE.VERT:
+                vert_type = graph.get_node_prop(ent, 'vert_type', None)
+            groups.setdefault((ent_type, vert_type), []).append(src_id)
+        # create the new ents
+        id_map = dict() # key is the old node id, value is the new node id
+        for (ent_type, vert_type), group_ids in groups.items():
+            props = None if vert_type is None else {'vert_type': vert_type}
+            _, new_ids = self._graph_add_ents(ent_type, len(group_ids), props)
+            id_map.update(zip(group_ids, new_ids))
+        # entity edges, ent -> sub_ents
+        graph.add_edges_id([(id_map[src_id], id_map[succ_id]) for src_id in sorted(src_ids) 
+            for succ_id in src_ids[src_id]], _GR_EDGE_TYPE.ENT)
+        # the order of the predecessors matters for the start verts of closed wires, so it is 
+        # copied from the source verts
+        for (ent_type, _), group_ids in groups.items():
+            if ent_type != ENT_TYPE.VERT:
+                continue
+            for src_id in group_ids:
+                preds = graph.predecessors_id(src_id, _GR_EDGE_TYPE.ENT)
+                if len(preds) > 1:
+                    graph.set_predecessors(names(id_map[src_id]), 
+                        [names(id_map[pred]) for pred in preds], _GR_EDGE_TYPE.ENT)
+        # attribute values, ent -> att_val
+        for (ent_type, _), group_ids in groups.items():
+            for att_node in graph.successors(_GR_ATTRIBS_NODE[ent_type], _GR_EDGE_TYPE.META):
+                if att_node == _GR_XYZ_NODE:
+                    continue
+                pairs = []
+                for src_id in group_ids:
+                    att_val_ids = graph.successors_id(src_id, att_node)
+                    if att_val_ids:
+                        pairs.append((id_map[src_id], att_val_ids[0]))
+                if pairs:
+                    graph.add_edges_id(pairs, att_node)
+        # xyz coordinates
+        posi_ids = [src_id for (ent_type, _), group_ids in groups.items() 
+            if ent_type == ENT_TYPE.POSI for src_id in group_ids]
+        posi_ids_xyz = [(posi_id, xyz) for posi_id, xyz in 
+            zip(posi_ids, graph.get_table_rows(posi_ids, _GR_XYZ_NODE)) if xyz is not None]
+        if vec is not None:
+            posi_ids_xyz = [(posi_id, [x + vec[0], y + vec[1], z + vec[2]]) 
+                for posi_id, (x, y, z) in posi_ids_xyz]
+        copy_posi_ids = [id_map[posi_id] for posi_id, _ in posi_ids_xyz]
+        graph.set_table_rows(copy_posi_ids, [xyz for _, xyz in posi_ids_xyz], _GR_XYZ_NODE)
+        if self._grid is not None:
+            self._grid_dirty.update(copy_posi_ids)
+        return [names(id_map[node_id(ent)]) for ent in ents], list(src_ids)
+    # ----------------------------------------------------------------------------------------------
+    def _graph_pgon_posi_ids(self, pgon_id):
+        """Get the node ids of the posis of a pgon, as a list of lists, one list for each wire. 
+        The first wire is the boundary.
+        """
+        succs = self.graph.successors_id
+        ent = _GR_EDGE_TYPE.ENT
+        return [[succs(succs(edge_id, ent)[0], ent)[0] for edge_id in succs(wire_id, ent)]
+            for wire_id in succs(pgon_id, ent)]
+    # ----------------------------------------------------------------------------------------------
+    def _graph_triangulate_pgon(self, pgon_id, rings_ids):
+        """Triangulate a pgon, and store the triangles, see _graph_set_tris().
+
+        :param rings_ids: The posi ids of the pgon, see _graph_pgon_posi_ids().
+        :return: The flat tuple of indexes into the posis of the pgon.
+        """
+        get_rows = self.graph.get_table_rows
+        rings = [get_rows(ring_ids, _GR_XYZ_NODE) for ring_ids in rings_ids]
+        if any(xyz is None for ring in rings for xyz in ring):
+            raise Exception('Polygon has positions without coordinates.')
+        tris = tuple(triangulate(rings))
+        self._graph_set_tris(pgon_id, rings_ids, tris)
+        return tris
+    # ----------------------------------------------------------------------------------------------
+    def _graph_set_tris(self, pgon_id, rings_ids, tris):
+        """Store the triangles of a pgon in the cache of the active snapshot, and add the pgon
+        to the index of the posis. Views do not store the triangles.
+        """
+        if not self._tris_cached:
+            return
+        self._graph_tris_cache(True)[pgon_id] = tris
+        deps = self._tris_deps[self.graph.get_active_snapshot()]
+        if deps is not None:
+            for ring_ids in rings_ids:
+                for posi_id in ring_ids:
+                    pgon_ids = deps.get(posi_id)
+                    # the lists are not modified in place, they can be shared by snapshots
+                    if pgon_ids is None:
+                        deps[posi_id] = [pgon_id]
+                    elif pgon_id not in pgon_ids:
+                        deps[posi_id] = pgon_ids + [pgon_id]
+    # ----------------------------------------------------------------------------------------------
+    def _graph_tris_cache(self, for_write = False):
+        """Get the cached triangles of the pgons in the active snapshot, a dict where the key is a 
+        pgon id and the value is a flat tuple of indexes into the posis of the pgon. If for_write
+        is True and the cache is shared with other snapshots, the cache and the index of the posis
+        are first copied, see _graph_tris_deps().
+        """
+        ssid = self.graph.get_active_snapshot()
+        cache = self._tris.get(ssid)
+        if cache is None:
+            cache = self._tris[ssid] = dict()
+            self._tris_deps[ssid] = dict()
+        elif for_write and ssid in self._tris_shared:
+            cache = self._tris[ssid] = dict(cache)
+            deps = self._tris_deps[ssid]
+            self._tris_deps[ssid] = None if deps is None else dict(deps)
+            self._tris_shared.discard(ssid)
+        return cache
+    # ----------------------------------------------------------------------------------------------
+    def _graph_tris_deps(self):
+        """Get the index of the pgons with cached triangles that use each posi, in the active 
+        snapshot, a dict where the key is a posi id and the value is a list of pgon ids. If the 
+        index has to be rebuilt, it is rebuilt from the pgons in the cache. The cache has to be 
+        got for writing first, see _graph_tris_cache().
+        """
+        ssid = self.graph.get_active_snapshot()
+        deps = self._tris_deps[ssid]
+        if deps is None:
+            deps = dict()
+            for pgon_id in self._tris[ssid]:
+                for ring_ids in self._graph_pgon_posi_ids(pgon_id):
+                    for posi_id in ring_ids:
+                        pgon_ids = deps.setdefault(posi_id, [])
+                        if pgon_id not in pgon_ids:
+                            pgon_ids.append(pgon_id)
+            self._tris_deps[ssid] = deps
+        return deps
+    # ----------------------------------------------------------------------------------------------
+    def _graph_dirty_tris(self, posi_ids, pgon_ids = ()):
+        """Clear the cached triangles of the pgons that use the posis, and of the pgons in 
+        pgon_ids. The posis are removed from the index, the pgons are added again when they are
+        triangulated again.
+        """
+        if not self._tris_cached or not self._graph_tris_cache():
+            return
+        cache = self._graph_tris_cache(True)
+        deps = self._graph_tris_deps()
+        dirty = set(pgon_ids)
+        for posi_id in posi_ids:
+            posi_pgon_ids = deps.pop(posi_id, None)
+            if posi_pgon_ids is not None:
+                dirty.update(posi_pgon_ids)
+        for pgon_id in dirty:
+            cache.pop(pgon_id, None)
+    # ----------------------------------------------------------------------------------------------
+    def _graph_prune_tris(self):
+        """Remove the cached triangles of the snapshots that no longer exist.
+        """
+        ssids = set(self.graph.get_snapshots())
+        for ssid in [ssid for ssid in self._tris if ssid not in ssids]:
+            del self._tris[ssid]
+            del self._tris_deps[ssid]
+            self._tris_shared.discard(ssid)
+    # ----------------------------------------------------------------------------------------------
+    def _graph_posis_changed(self, posi_ids):
+        """The coordinates of posis were set, moved or deleted. Clear the cached triangles of the 
+        pgons that use the posis, and mark the posis to be updated in the spatial index and the 
+        cached bboxes.
+        """
+        self._graph_dirty_tris(posi_ids)
+        if self._grid is not None:
+            self._grid_dirty.update(posi_ids)
+        if self._bboxes:
+            self._bbox_dirty.update(posi_ids)
+    # ----------------------------------------------------------------------------------------------
+    def _graph_grid(self):
+        """Get the spatial index of the posis in the active snapshot, see spatial.Grid. The index
+        is created in one step when it is first used. After that, only the posis that were changed
+        are updated.
+        """
+        graph = self.graph
+        if self._grid is None:
+            posi_ids = graph.successors_id(
+                graph.get_node_id(_GR_ENTS_NODE[ENT_TYPE.POSI]), _GR_EDGE_TYPE.META)
+            coords = graph.get_table_rows(posi_ids, _GR_XYZ_NODE)
+            self._grid = Grid(Grid.get_cell_size(coords))
+            self._grid.update(posi_ids, coords)
+            self._grid_dirty = set()
+        elif self._grid_dirty:
+            posi_ids = sorted(self._grid_dirty)
+            self._grid.update(posi_ids, graph.get_table_rows(posi_ids, _GR_XYZ_NODE))
+            self._grid_dirty = set()
+        return self._grid
+    # ----------------------------------------------------------------------------------------------
+    def _graph_bboxes(self, ent_ids):
+        """Get the bboxes of objects and colls, each a tuple with the minimum and maximum XYZ 
+        coordinates, or None. Bboxes that are not cached are computed and cached. The bboxes of 
+        all the objects are computed in bulk, then the bboxes of the colls are combined from the 
+        bboxes of their ents.
+
+        :return: A list of bboxes, one for each ent id.
+        """
+        self._graph_update_bboxes()
+        graph = self.graph
+        succs = graph.successors_id
+        names = graph.get_node_name
+        ent = _GR_EDGE_TYPE.ENT
+        bboxes = self._bboxes
+        # find the objects and colls that are not cached, including the ents in the colls
+        obj_ids = []
+        coll_ids = []
+        found = set()
+        stack = [ent_id for ent_id in ent_ids if ent_id not in bboxes]
+        while stack:
+            ent_id = stack.pop()
+            if ent_id in found:
+                continue
+            found.add(ent_id)
+            if names(ent_id)[:2] == ENT_TYPE.COLL:
+                coll_ids.append(ent_id)
+                stack.extend(ent1_id for ent1_id in succs(ent_id, ent) if ent1_id not in bboxes)
+            else:
+                obj_ids.append(ent_id)
+        # objects, the posis of points, and the posis of the first wire of plines and pgons
+        if obj_ids:
+            objs_posi_ids = []
+            for obj_id in obj_ids:
+                if names(obj_id)[:2] == ENT_TYPE.POINT:
+                    objs_posi_ids.append([succs(succs(obj_id, ent)[0], ent)[0]])
+                    continue
+                edge_ids = succs(succs(obj_id, ent)[0], ent)
+                posi_ids = [succs(succs(edge_id, ent)[0], ent)[0] for edge_id in edge_ids]
+                posi_ids.append(succs(succs(edge_ids[-1], ent)[-1], ent)[0])
+                objs_posi_ids.append(posi_ids)
+            coords = iter(graph.get_table_rows(list(chain.from_iterable(objs_posi_ids)), 
+                _GR_XYZ_NODE))
+            for obj_id, posi_ids in zip(obj_ids, objs_posi_ids):
+                bboxes[obj_id] = self._bbox_of_coords([next(coords) for _ in posi_ids])
+        # colls, after the colls they contain
+        on_stack = set()
+        for coll_id in coll_ids:
+            stack = [coll_id]
+            while stack:
+                coll1_id = stack[-1]
+                if coll1_id in bboxes:
+                    stack.pop()
+                    continue
+                on_stack.add(coll1_id)
+                ent1_ids = succs(coll1_id, ent)
+                pending = [ent1_id for ent1_id in ent1_ids 
+                    if ent1_id not in bboxes and ent1_id not in on_stack]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                bboxes[coll1_id] = self._bbox_combine(bboxes.get(ent1_id) for ent1_id in ent1_ids)
+                on_stack.discard(coll1_id)
+                stack.pop()
+        return [bboxes[ent_id] for ent_id in ent_ids]
+    # ----------------------------------------------------------------------------------------------
+    def _graph_update_bboxes(self):
+        """Clear the cached bboxes of the objects that use the posis that were changed, and the 
+        bboxes of the colls that contain those objects.
+        """
+        if not self._bbox_dirty:
+            return
+        posi_ids = self._bbox_dirty
+        self._bbox_dirty = set()
+        preds = self.graph.predecessors_id
+        names = self.graph.get_node_name
+        ent = _GR_EDGE_TYPE.ENT
+        obj_ids = set()
+        for posi_id in posi_ids:
+            for vert_id in preds(posi_id, ent):
+                for ent_id in preds(vert_id, ent):
+                    if names(ent_id)[:2] == ENT_TYPE.POINT:
+                        obj_ids.add(ent_id)
+                        continue
+                    for wire_id in preds(ent_id, ent):
+                        obj_ids.update(preds(wire_id, ent))
+        self._graph_dirty_bboxes(obj_ids)
+    # ----------------------------------------------------------------------------------------------
+    def _graph_dirty_bboxes(self, ent_ids):
+        """Clear the cached bboxes of objects or colls, and of the colls that contain them. If an
+        ent is not cached, then the colls that contain it are not cached either.
+        """
+        bboxes = self._bboxes
+        if not bboxes:
+            return
+        preds = self.graph.predecessors_id
+        stack = list(ent_ids)
+        while stack:
+            ent_id = stack.pop()
+            if ent_id in bboxes:
+                del bboxes[ent_id]
+                stack.extend(preds(ent_id, _GR_EDGE_TYPE.ENT))
+    # ----------------------------------------------------------------------------------------------
+    def _graph_posi_id_lists(self, index_lists, offsets = None):
+        """Get the node ids of lists of posis. The posis can be posi IDs, or integer indexes into
+        the list of live posis. Integers can also be NumPy integers.
+        If offsets is not None, index_lists is a flat list, which is split at the offsets.
+        NumPy arrays are converted to lists.
+        Throws an error if a posi ID or index is not a live posi.
+        """
+        if hasattr(index_lists, 'tolist'):
+            index_lists = index_lists.tolist() # NumPy array
+        if offsets is not None:
+            offsets = list(offsets.tolist() if hasattr(offsets, 'tolist') else offsets)
+            ends = offsets[1:] + [len(index_lists)]
+            index_lists = [index_lists[start:end] for start, end in zip(offsets, ends)]
+        graph = self.graph
+        node_id = graph.get_node_id
+        live_posis = graph.successors_view(_GR_ENTS_NODE[ENT_TYPE.POSI], _GR_EDGE_TYPE.META)
+        live_ids = [] # the ids of the live posis, only got if there are integer indexes
+        def posi_id(posi):
+            if isinstance(posi, numbers.Integral):
+                if not live_ids:
+                    live_ids.extend(graph.successors_id(node_id(_GR_ENTS_NODE[ENT_TYPE.POSI]), 
+                        _GR_EDGE_TYPE.META))
+                if not 0 <= posi < len(live_ids):
+                    raise Exception('Position index out of range: ' + str(posi) + '.')
+                return live_ids[posi]
+            if not posi in live_posis:
+                raise Exception('Position does not exist: ' + str(posi) + '.')
+            return node_id(posi)
+        return [[posi_id(posi) for posi in posis] for posis in index_lists]
+    # ----------------------------------------------------------------------------------------------
     def _graph_add_attrib(self, ent_type, name, data_type):
         """Add an attribute node to the graph.
         """
@@ -1037,6 +2327,43 @@ class SIM(object):
     # ==============================================================================================
     # UTILITY 
     # ==============================================================================================
+    def _unit_vec(self, vec):
+        """Get a vector with length 1, in the same direction as vec.
+        """
+        length = math.sqrt(vec[0] * vec[0] + vec[1] * vec[1] + vec[2] * vec[2])
+        if length == 0:
+            raise Exception('The vector has zero length.')
+        return [vec[0] / length, vec[1] / length, vec[2] / length]
+    # ----------------------------------------------------------------------------------------------
+    def _linear_xform(self, mat, origin):
+        """Create a 4x4 matrix from a 3x3 matrix, so that the origin does not move.
+        """
+        return [mat[i] + [origin[i] - sum(mat[i][j] * origin[j] for j in range(3))] 
+            for i in range(3)] + [[0, 0, 0, 1]]
+    # ----------------------------------------------------------------------------------------------
+    def _bbox_of_coords(self, coords):
+        """Get the bbox of a list of XYZ coordinates, a tuple with the minimum and maximum XYZ 
+        coordinates. Coordinates that are None are skipped. If there are no coordinates, then None
+        is returned.
+        """
+        coords = [xyz for xyz in coords if xyz is not None]
+        if not coords:
+            return None
+        xs, ys, zs = zip(*coords)
+        return (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+    # ----------------------------------------------------------------------------------------------
+    def _bbox_combine(self, bboxes):
+        """Get the bbox that contains multiple bboxes. Bboxes that are None are skipped. If there
+        are no bboxes, then None is returned.
+        """
+        bboxes = [bbox for bbox in bboxes if bbox is not None]
+        if not bboxes:
+            return None
+        if len(bboxes) == 1:
+            return bboxes[0]
+        values = list(zip(*bboxes))
+        return tuple([min(values[i]) for i in range(3)] + [max(values[i]) for i in range(3, 6)])
+    # ----------------------------------------------------------------------------------------------
     def _check_type(self, value):
         val_type = type(value)
         if val_type == int or val_type == float:
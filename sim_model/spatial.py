@@ -0,0 +1,273 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+# ==================================================================================================
+# A spatial index of points, as a uniform grid of cubic cells.
+#
+# The cells are stored in a dict, so only cells that contain points use memory, and points can be
+# anywhere, not only inside the area of the points the grid was created with. Each point has an
+# integer id, and the grid stores the coordinates of each point, so queries do not have to look up
+# the coordinates.
+# ==================================================================================================
+import math
+import heapq
+from itertools import chain
+# the average number of points in each cell, when the cell size is computed from the points
+_POINTS_PER_CELL = 2
+# the offsets of the indexes of a cell and its 26 neighbours, the cell first, then the neighbours
+# that share a face, an edge and a corner
+NEIGHBOUR_OFFSETS = sorted([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)],
+    key = lambda offset: sum(map(abs, offset)))
+# ==================================================================================================
+# GRID CLASS
+# ==================================================================================================
+class Grid(object):
+    """
+    A uniform grid of points, for finding the points inside a box, the points within a radius,
+    and the nearest points. The points can be inserted, moved and removed.
+    """
+    def __init__(self, cell_size):
+        """
+        Create an empty grid.
+
+        :param cell_size: (float) The size of the cells, in each of the three axes.
+        """
+        if not cell_size > 0:
+            raise Exception('The cell size must be more than 0.')
+        self._cell_size = float(cell_size)
+        # the ids of the points in each cell, key is the cell index (i, j, k)
+        self._cells = dict()
+        # the cell index and the coordinates of each point, key is the point id
+        self._points = dict()
+        # the range of the indexes of the cells that points were inserted into
+        self._key_min = None
+        self._key_max = None
+    # ----------------------------------------------------------------------------------------------
+    @staticmethod
+    def get_cell_size(coords):
+        """
+        Get a cell size for a list of points, so that on average there are a few points in each
+        cell. Axes along which the points are flat are ignored.
+
+        :param coords: (list) A list of XYZ coordinates.
+        :return: (float) The cell size.
+        """
+        coords = [xyz for xyz in coords if xyz is not None]
+        if not coords:
+            return 1.0
+        extents = [max(xyz[axis] for xyz in coords) - min(xyz[axis] for xyz in coords)
+            for axis in range(3)]
+        max_extent = max(extents)
+        if max_extent == 0:
+            return 1.0
+        # ignore the axes that are flat, compared to the largest axis
+        extents = [extent for extent in extents if extent > max_extent * 1e-6]
+        volume = 1.0
+        for extent in extents:
+            volume *= extent
+        return (volume * _POINTS_PER_CELL / len(coords)) ** (1.0 / len(extents))
+    # ----------------------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._points)
+    # ----------------------------------------------------------------------------------------------
+    def __contains__(self, point_id):
+        return point_id in self._points
+    # ----------------------------------------------------------------------------------------------
+    def update(self, point_ids, coords):
+        """
+        Insert, move or remove multiple points. If the coordinates of a point are None, then the
+        point is removed.
+
+        :param point_ids: (int[]) A list of point ids.
+        :param coords: (list) A list of XYZ coordinates or None, one for each point.
+        :return: No value.
+        """
+        cells = self._cells
+        points = self._points
+        size = self._cell_size
+        floor = math.floor
+        for point_id, xyz in zip(point_ids, coords):
+            old = points.get(point_id)
+            if xyz is None:
+                if old is not None:
+                    self._remove_from_cell(point_id, old[0])
+                    del points[point_id]
+                continue
+            x, y, z = xyz
+            key = (int(floor(x / size)), int(floor(y / size)), int(floor(z / size)))
+            if old is not None:
+                if old[0] == key:
+                    points[point_id] = (key, (x, y, z))
+                    continue
+                self._remove_from_cell(point_id, old[0])
+            points[point_id] = (key, (x, y, z))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [point_id]
+                self._expand_range(key)
+            else:
+                cell.append(point_id)
+    # ----------------------------------------------------------------------------------------------
+    def query_box(self, min_xyz, max_xyz):
+        """
+        Get the points inside a box, including the points on the faces of the box.
+
+        :param min_xyz: (float[]) The minimum XYZ coordinates of the box.
+        :param max_xyz: (float[]) The maximum XYZ coordinates of the box.
+        :return: (int[]) A list of point ids, in no particular order.
+        """
+        x0, y0, z0 = min_xyz
+        x1, y1, z1 = max_xyz
+        points = self._points
+        result = []
+        for point_ids in self._iter_cells(self._cell_key(min_xyz), self._cell_key(max_xyz)):
+            for point_id in point_ids:
+                x, y, z = points[point_id][1]
+                if x0 <= x <= x1 and y0 <= y <= y1 and z0 <= z <= z1:
+                    result.append(point_id)
+        return result
+    # ----------------------------------------------------------------------------------------------
+    def query_radius(self, xyz, radius):
+        """
+        Get the points within a distance of a point, including the points at that distance.
+
+        :param xyz: (float[]) The XYZ coordinates of the point.
+        :param radius: (float) The distance.
+        :return: (int[]) A list of point ids, in no particular order.
+        """
+        x0, y0, z0 = xyz
+        r2 = radius * radius
+        points = self._points
+        result = []
+        min_key = self._cell_key([x0 - radius, y0 - radius, z0 - radius])
+        max_key = self._cell_key([x0 + radius, y0 + radius, z0 + radius])
+        for point_ids in self._iter_cells(min_key, max_key):
+            for point_id in point_ids:
+                x, y, z = points[point_id][1]
+                if (x - x0) * (x - x0) + (y - y0) * (y - y0) + (z - z0) * (z - z0) <= r2:
+                    result.append(point_id)
+        return result
+    # ----------------------------------------------------------------------------------------------
+    def nearest(self, xyz, num_points = 1):
+        """
+        Get the points nearest to a point. The cells are searched in shells around the cell of the
+        point, until no unsearched cell can contain points nearer than the points found.
+
+        :param xyz: (float[]) The XYZ coordinates of the point.
+        :param num_points: (int) The maximum number of points to get.
+        :return: (list) A list of tuples, each with the distance and the point id, sorted by
+            distance. Points at the same distance are sorted by id.
+        """
+        if num_points < 1 or not self._points:
+            return []
+        num_points = min(num_points, len(self._points))
+        x0, y0, z0 = xyz
+        size = self._cell_size
+        cells = self._cells
+        points = self._points
+        i0, j0, k0 = self._cell_key(xyz)
+        # the shells are searched from the first shell that reaches the range of the cells, to 
+        # the shell that reaches every cell, so the search always stops
+        key0 = (i0, j0, k0)
+        shell = max(chain([0], (key_min_i - key0_i for key_min_i, key0_i in 
+            zip(self._key_min, key0)), (key0_i - key_max_i for key_max_i, key0_i in 
+            zip(self._key_max, key0))))
+        max_shell = max(abs(key_i - key0_i) for key_i, key0_i in 
+            chain(zip(self._key_min, key0), zip(self._key_max, key0)))
+        # a heap of the nearest points found so far, with negative squared distances
+        heap = []
+        while shell <= max_shell:
+            for key in _shell_keys(i0, j0, k0, shell):
+                point_ids = cells.get(key)
+                if point_ids is None:
+                    continue
+                for point_id in point_ids:
+                    x, y, z = points[point_id][1]
+                    d2 = (x - x0) * (x - x0) + (y - y0) * (y - y0) + (z - z0) * (z - z0)
+                    item = (-d2, -point_id)
+                    if len(heap) < num_points:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+            # points in the next shells are at least this far away
+            if len(heap) == num_points and -heap[0][0] <= (shell * size) ** 2:
+                break
+            shell += 1
+        return sorted((math.sqrt(-neg_d2), -neg_point_id) for neg_d2, neg_point_id in heap)
+    # ----------------------------------------------------------------------------------------------
+    def _cell_key(self, xyz):
+        """
+        Get the index of the cell that contains a point.
+        """
+        size = self._cell_size
+        return (int(math.floor(xyz[0] / size)), int(math.floor(xyz[1] / size)),
+            int(math.floor(xyz[2] / size)))
+    # ----------------------------------------------------------------------------------------------
+    def _iter_cells(self, min_key, max_key):
+        """
+        Iterate over the lists of point ids in the cells in a range of cells. If the range has
+        more cells than the grid, then the cells of the grid are checked instead.
+        """
+        (i0, j0, k0), (i1, j1, k1) = min_key, max_key
+        cells = self._cells
+        num_keys = (i1 - i0 + 1) * (j1 - j0 + 1) * (k1 - k0 + 1)
+        if num_keys > len(cells):
+            for (i, j, k), point_ids in cells.items():
+                if i0 <= i <= i1 and j0 <= j <= j1 and k0 <= k <= k1:
+                    yield point_ids
+            return
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for k in range(k0, k1 + 1):
+                    point_ids = cells.get((i, j, k))
+                    if point_ids is not None:
+                        yield point_ids
+    # ----------------------------------------------------------------------------------------------
+    def _expand_range(self, key):
+        """
+        Expand the range of the indexes of the cells to include a cell. The range is not reduced
+        when cells are removed.
+        """
+        if self._key_min is None:
+            self._key_min = key
+            self._key_max = key
+            return
+        self._key_min = tuple(map(min, self._key_min, key))
+        self._key_max = tuple(map(max, self._key_max, key))
+    # ----------------------------------------------------------------------------------------------
+    def _remove_from_cell(self, point_id, key):
+        """
+        Remove a point from a cell, and remove the cell if it is empty.
+        """
+        cell = self._cells[key]
+        cell.remove(point_id)
+        if not cell:
+            del self._cells[key]
+# ==================================================================================================
+# END GRID CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# UTILITY
+# ==================================================================================================
+def _shell_keys(i0, j0, k0, shell):
+    """
+    Get the indexes of the cells in a shell around a cell, at a distance of shell cells.
+    """
+    if shell == 0:
+        return [(i0, j0, k0)]
+    keys = []
+    r = range(-shell, shell + 1)
+    for di in r:
+        for dj in r:
+            if abs(di) == shell or abs(dj) == shell:
+                keys.extend((i0 + di, j0 + dj, k0 + dk) for dk in r)
+            else:
+                keys.append((i0 + di, j0 + dj, k0 - shell))
+                keys.append((i0 + di, j0 + dj, k0 + shell))
+    return keys
+# ==================================================================================================
+# END UTILITY
+# ==================================================================================================
@@ -0,0 +1,622 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+# ==================================================================================================
+# Functions for triangulating polygons with holes, by ear clipping.
+#
+# The algorithm follows the earcut algorithm: the holes are joined to the boundary with bridges,
+# to create a single ring, and then ears are clipped from the ring. If no more ears can be found,
+# the ring is cleaned up, local self-intersections are cured, and finally the ring is split in
+# two along a valid diagonal.
+# ==================================================================================================
+from array import array
+try:
+    import multiprocessing as _multiprocessing
+except ImportError:
+    _multiprocessing = None # IronPython
+try:
+    from multiprocessing import shared_memory as _shared_memory # from Python 3.8
+except ImportError:
+    _shared_memory = None
+# the number of chunks of polygons for each worker, when triangulating in parallel
+_CHUNKS_PER_WORKER = 4
+# ==================================================================================================
+# TRIANGULATE
+# ==================================================================================================
+def triangulate(rings):
+    """
+    Triangulate a polygon in 3D, with holes. The first ring is the boundary, and the other rings
+    are the holes. Each ring is a list of XYZ coordinates, and is implicitly closed.
+
+    The polygon is projected onto the plane of the axes that is most parallel to the boundary. The
+    triangles have the same orientation as the boundary.
+
+    The triangles are returned as a flat list of indexes into the list of all the coordinates of
+    all the rings, three indexes for each triangle. If the polygon is degenerate, the list is
+    empty.
+
+    :param rings: (list) A list of rings, each a list of XYZ coordinates.
+    :return: (int[]) A flat list of indexes.
+    """
+    boundary = rings[0]
+    if len(boundary) < 3:
+        return []
+    # the normal of the boundary, by Newell's method
+    nx = ny = nz = 0.0
+    x0, y0, z0 = boundary[-1]
+    for x1, y1, z1 in boundary:
+        nx += (y0 - y1) * (z0 + z1)
+        ny += (z0 - z1) * (x0 + x1)
+        nz += (x0 - x1) * (y0 + y1)
+        x0, y0, z0 = x1, y1, z1
+    # project onto the plane that drops the largest component of the normal
+    anx, any_, anz = abs(nx), abs(ny), abs(nz)
+    if anz >= anx and anz >= any_:
+        axes, normal = (0, 1), nz
+    elif anx >= any_:
+        axes, normal = (1, 2), nx
+    else:
+        axes, normal = (2, 0), ny
+    if normal == 0:
+        return []
+    i, j = axes
+    xs = [xyz[i] for ring in rings for xyz in ring]
+    ys = [xyz[j] for ring in rings for xyz in ring]
+    hole_starts = []
+    start = len(boundary)
+    for ring in rings[1:]:
+        hole_starts.append(start)
+        start += len(ring)
+    tris = triangulate_2d(xs, ys, hole_starts)
+    # make the triangles have the same orientation as the boundary
+    if tris and (_tri_area(xs, ys, tris[0], tris[1], tris[2]) > 0) != (normal > 0):
+        for k in range(0, len(tris), 3):
+            tris[k + 1], tris[k + 2] = tris[k + 2], tris[k + 1]
+    return tris
+# --------------------------------------------------------------------------------------------------
+def triangulate_2d(xs, ys, hole_starts = None):
+    """
+    Triangulate a polygon in 2D, with holes. The points of the boundary are followed by the points
+    of each hole. The rings can have any orientation.
+
+    :param xs: (float[]) The X coordinates of all the points.
+    :param ys: (float[]) The Y coordinates of all the points.
+    :param hole_starts: (int[]) The index of the first point of each hole, or None.
+    :return: (int[]) A flat list of indexes, three for each triangle.
+    """
+    tris = []
+    boundary_end = hole_starts[0] if hole_starts else len(xs)
+    outer = _linked_ring(xs, ys, 0, boundary_end, True)
+    if outer is None or outer.next is outer.prev:
+        return tris
+    if hole_starts:
+        outer = _eliminate_holes(xs, ys, hole_starts, outer)
+    _earcut_linked(outer, tris, 0)
+    return tris
+# ==================================================================================================
+# END TRIANGULATE
+# ==================================================================================================
+
+
+# ==================================================================================================
+# BATCH TRIANGULATE
+# ==================================================================================================
+def triangulate_flat(coords, ring_starts, pgon_starts):
+    """
+    Triangulate multiple polygons, with the coordinates of all the polygons in one flat list.
+
+    The rings of all the polygons are stored one after the other. The coordinates of ring r are
+    coords[ring_starts[r] * 3 : ring_starts[r + 1] * 3]. The rings of polygon p are the rings from
+    pgon_starts[p] to pgon_starts[p + 1], the boundary first.
+
+    :param coords: (float[]) A flat list of XYZ coordinates, three numbers for each point.
+    :param ring_starts: (int[]) The index of the first point of each ring, and then the number of
+        points.
+    :param pgon_starts: (int[]) The index of the first ring of each polygon, and then the number of
+        rings.
+    :return: (tuple[]) A tuple of indexes for each polygon, see triangulate().
+    """
+    result = []
+    for p in range(len(pgon_starts) - 1):
+        rings = []
+        for r in range(pgon_starts[p], pgon_starts[p + 1]):
+            start = ring_starts[r] * 3
+            end = ring_starts[r + 1] * 3
+            rings.append([coords[i:i + 3] for i in range(start, end, 3)])
+        result.append(tuple(triangulate(rings)))
+    return result
+# --------------------------------------------------------------------------------------------------
+def triangulate_flat_parallel(coords, ring_starts, pgon_starts, workers):
+    """
+    Triangulate multiple polygons in parallel, with a pool of processes. See triangulate_flat().
+
+    The polygons are split into chunks, several for each worker. If shared memory is available, 
+    the coordinates are copied once into a shared memory block, and each worker reads the 
+    coordinates of its chunks from the block. Otherwise the coordinates of each chunk are sent to 
+    the worker. If multiprocessing is not available, the polygons are triangulated in this 
+    process.
+
+    :param coords: (float[]) A flat list of XYZ coordinates, three numbers for each point.
+    :param ring_starts: (int[]) The index of the first point of each ring, and then the number of
+        points.
+    :param pgon_starts: (int[]) The index of the first ring of each polygon, and then the number of
+        rings.
+    :param workers: (int) The number of processes.
+    :return: (tuple[]) A tuple of indexes for each polygon, see triangulate().
+    """
+    num_pgons = len(pgon_starts) - 1
+    if _multiprocessing is None or workers < 2 or num_pgons < 2:
+        return triangulate_flat(coords, ring_starts, pgon_starts)
+    # split the polygons into chunks
+    chunk_size = max(1, -(-num_pgons // (workers * _CHUNKS_PER_WORKER)))
+    bounds = [(p, min(p + chunk_size, num_pgons)) for p in range(0, num_pgons, chunk_size)]
+    shared = None
+    if _shared_memory is not None:
+        coords = array('d', coords)
+        shared = _shared_memory.SharedMemory(create = True, size = max(1, len(coords) * 8))
+        shared.buf[:len(coords) * 8] = coords.tobytes()
+    try:
+        tasks = []
+        for p0, p1 in bounds:
+            r0 = pgon_starts[p0]
+            r1 = pgon_starts[p1]
+            start = ring_starts[r0]
+            chunk_ring_starts = [ring_start - start for ring_start in ring_starts[r0:r1 + 1]]
+            chunk_pgon_starts = [pgon_start - r0 for pgon_start in pgon_starts[p0:p1 + 1]]
+            if shared is None:
+                chunk_coords = array('d', coords[start * 3:ring_starts[r1] * 3])
+            else:
+                chunk_coords = (shared.name, start * 3, ring_starts[r1] * 3)
+            tasks.append((chunk_coords, chunk_ring_starts, chunk_pgon_starts))
+        pool = _multiprocessing.Pool(workers)
+        try:
+            chunks = pool.map(_triangulate_chunk, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        if shared is not None:
+            shared.close()
+            shared.unlink()
+    return [tris for chunk in chunks for tris in chunk]
+# --------------------------------------------------------------------------------------------------
+def _triangulate_chunk(task):
+    """
+    Triangulate a chunk of polygons, in a worker process. The coordinates are either an array, or
+    the name of a shared memory block and the range of the coordinates in the block.
+    """
+    chunk_coords, ring_starts, pgon_starts = task
+    if isinstance(chunk_coords, tuple):
+        name, start, end = chunk_coords
+        shared = _shared_memory.SharedMemory(name = name)
+        try:
+            values = shared.buf[start * 8:end * 8].cast('d')
+            chunk_coords = values.tolist()
+            values.release()
+        finally:
+            shared.close()
+    return triangulate_flat(chunk_coords, ring_starts, pgon_starts)
+# ==================================================================================================
+# END BATCH TRIANGULATE
+# ==================================================================================================
+
+
+# ==================================================================================================
+# RING NODE CLASS
+# ==================================================================================================
+class _Node(object):
+    # a point in a doubly linked ring
+    # i is the index of the point, x and y are the coordinates
+    __slots__ = ('i', 'x', 'y', 'prev', 'next', 'steiner')
+    def __init__(self, i, x, y):
+        self.i = i
+        self.x = x
+        self.y = y
+        self.prev = None
+        self.next = None
+        self.steiner = False
+# --------------------------------------------------------------------------------------------------
+def _insert_node(i, x, y, last):
+    """
+    Create a node, and insert it after last. If last is None, the node is a ring on its own.
+    """
+    p = _Node(i, x, y)
+    if last is None:
+        p.prev = p
+        p.next = p
+    else:
+        p.next = last.next
+        p.prev = last
+        last.next.prev = p
+        last.next = p
+    return p
+# --------------------------------------------------------------------------------------------------
+def _remove_node(p):
+    """
+    Remove a node from its ring.
+    """
+    p.next.prev = p.prev
+    p.prev.next = p.next
+# --------------------------------------------------------------------------------------------------
+def _split_ring(a, b):
+    """
+    Split a ring in two along the diagonal from a to b, by duplicating a and b. Returns the
+    duplicate of b, which is in the other ring.
+    """
+    a2 = _Node(a.i, a.x, a.y)
+    b2 = _Node(b.i, b.x, b.y)
+    an = a.next
+    bp = b.prev
+    a.next = b
+    b.prev = a
+    a2.next = an
+    an.prev = a2
+    b2.next = a2
+    a2.prev = b2
+    bp.next = b2
+    b2.prev = bp
+    return b2
+# ==================================================================================================
+# END RING NODE CLASS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# EAR CLIPPING FUNCTIONS
+# ==================================================================================================
+def _linked_ring(xs, ys, start, end, clockwise):
+    """
+    Create a linked ring from the points from start to end, with the given orientation.
+    """
+    last = None
+    if clockwise == (_signed_area(xs, ys, start, end) > 0):
+        for i in range(start, end):
+            last = _insert_node(i, xs[i], ys[i], last)
+    else:
+        for i in range(end - 1, start - 1, -1):
+            last = _insert_node(i, xs[i], ys[i], last)
+    if last is not None and _equals(last, last.next):
+        _remove_node(last)
+        last = last.next
+    return last
+# --------------------------------------------------------------------------------------------------
+def _filter_points(start, end = None):
+    """
+    Remove duplicate and collinear points from a ring.
+    """
+    if start is None:
+        return start
+    if end is None:
+        end = start
+    p = start
+    while True:
+        again = False
+        if not p.steiner and (_equals(p, p.next) or _area(p.prev, p, p.next) == 0):
+            _remove_node(p)
+            p = end = p.prev
+            if p is p.next:
+                break
+            again = True
+        else:
+            p = p.next
+        if not again and p is end:
+            break
+    return end
+# --------------------------------------------------------------------------------------------------
+def _earcut_linked(ear, tris, attempt):
+    """
+    Clip ears from a ring, and add the triangles to tris. If no ears can be found, try again after
+    filtering points, then after curing local self-intersections, and then by splitting the ring.
+    """
+    if ear is None:
+        return
+    stop = ear
+    while ear.prev is not ear.next:
+        prev = ear.prev
+        nxt = ear.next
+        if _is_ear(ear):
+            tris.extend((prev.i, ear.i, nxt.i))
+            _remove_node(ear)
+            ear = nxt.next
+            stop = nxt.next
+            continue
+        ear = nxt
+        if ear is stop:
+            if attempt == 0:
+                _earcut_linked(_filter_points(ear), tris, 1)
+            elif attempt == 1:
+                ear = _cure_local_intersections(_filter_points(ear), tris)
+                _earcut_linked(ear, tris, 2)
+            else:
+                _split_earcut(ear, tris)
+            break
+# --------------------------------------------------------------------------------------------------
+def _is_ear(ear):
+    """
+    Check if a node is an ear: it must be convex, and no other point can be inside the triangle.
+    """
+    a = ear.prev
+    b = ear
+    c = ear.next
+    if _area(a, b, c) >= 0:
+        return False # reflex
+    ax, ay, bx, by, cx, cy = a.x, a.y, b.x, b.y, c.x, c.y
+    x0 = min(ax, bx, cx)
+    y0 = min(ay, by, cy)
+    x1 = max(ax, bx, cx)
+    y1 = max(ay, by, cy)
+    p = c.next
+    while p is not a:
+        if x0 <= p.x <= x1 and y0 <= p.y <= y1 and \
+                _point_in_triangle(ax, ay, bx, by, cx, cy, p.x, p.y) and \
+                _area(p.prev, p, p.next) >= 0:
+            return False
+        p = p.next
+    return True
+# --------------------------------------------------------------------------------------------------
+def _cure_local_intersections(start, tris):
+    """
+    Find and clip small self-intersections, where two edges cross around a point.
+    """
+    p = start
+    while True:
+        a = p.prev
+        b = p.next.next
+        if not _equals(a, b) and _intersects(a, p, p.next, b) and \
+                _locally_inside(a, b) and _locally_inside(b, a):
+            tris.extend((a.i, p.i, b.i))
+            _remove_node(p)
+            _remove_node(p.next)
+            p = start = b
+        p = p.next
+        if p is start:
+            break
+    return _filter_points(p)
+# --------------------------------------------------------------------------------------------------
+def _split_earcut(start, tris):
+    """
+    Split the ring in two along a valid diagonal, and triangulate both rings.
+    """
+    a = start
+    while True:
+        b = a.next.next
+        while b is not a.prev:
+            if a.i != b.i and _is_valid_diagonal(a, b):
+                c = _split_ring(a, b)
+                a = _filter_points(a, a.next)
+                c = _filter_points(c, c.next)
+                _earcut_linked(a, tris, 0)
+                _earcut_linked(c, tris, 0)
+                return
+            b = b.next
+        a = a.next
+        if a is start:
+            break
+# ==================================================================================================
+# END EAR CLIPPING FUNCTIONS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# HOLE FUNCTIONS
+# ==================================================================================================
+def _eliminate_holes(xs, ys, hole_starts, outer):
+    """
+    Join the holes to the boundary with bridges, from left to right, to create a single ring.
+    """
+    queue = []
+    hole_ends = hole_starts[1:] + [len(xs)]
+    for start, end in zip(hole_starts, hole_ends):
+        ring = _linked_ring(xs, ys, start, end, False)
+        if ring is None:
+            continue
+        if ring is ring.next:
+            ring.steiner = True
+        queue.append(_get_leftmost(ring))
+    queue.sort(key = lambda p: p.x)
+    for hole in queue:
+        outer = _eliminate_hole(hole, outer)
+    return outer
+# --------------------------------------------------------------------------------------------------
+def _eliminate_hole(hole, outer):
+    """
+    Join a hole to the boundary, with a bridge from the leftmost point of the hole.
+    """
+    bridge = _find_hole_bridge(hole, outer)
+    if bridge is None:
+        return outer
+    bridge_reverse = _split_ring(bridge, hole)
+    # filter collinear points around the cuts
+    filtered_bridge = _filter_points(bridge, bridge.next)
+    _filter_points(bridge_reverse, bridge_reverse.next)
+    return filtered_bridge if outer is bridge else outer
+# --------------------------------------------------------------------------------------------------
+def _find_hole_bridge(hole, outer):
+    """
+    Find a point on the boundary that can be joined to the leftmost point of a hole.
+    """
+    p = outer
+    hx = hole.x
+    hy = hole.y
+    qx = float('-inf')
+    m = None
+    # find a segment intersected by a ray from the hole point to the left
+    while True:
+        if p.y >= hy >= p.next.y and p.next.y != p.y:
+            x = p.x + (hy - p.y) * (p.next.x - p.x) / (p.next.y - p.y)
+            if hx >= x > qx:
+                qx = x
+                m = p if p.x < p.next.x else p.next
+                if x == hx:
+                    return m # the hole touches the boundary
+        p = p.next
+        if p is outer:
+            break
+    if m is None:
+        return None
+    # look for points inside the triangle of the hole point, the intersection and the endpoint
+    # if there are any, pick the one with the smallest angle to the ray
+    stop = m
+    mx = m.x
+    my = m.y
+    tan_min = float('inf')
+    p = m
+    while True:
+        if hx >= p.x >= mx and hx != p.x and _point_in_triangle(hx if hy < my else qx, hy,
+                mx, my, qx if hy < my else hx, hy, p.x, p.y):
+            tan = abs(hy - p.y) / (hx - p.x)
+            if _locally_inside(p, hole) and (tan < tan_min or (tan == tan_min and
+                    (p.x > m.x or (p.x == m.x and _sector_contains_sector(m, p))))):
+                m = p
+                tan_min = tan
+        p = p.next
+        if p is stop:
+            break
+    return m
+# --------------------------------------------------------------------------------------------------
+def _get_leftmost(start):
+    """
+    Get the leftmost point of a ring.
+    """
+    p = start
+    leftmost = start
+    while True:
+        if p.x < leftmost.x or (p.x == leftmost.x and p.y < leftmost.y):
+            leftmost = p
+        p = p.next
+        if p is start:
+            break
+    return leftmost
+# --------------------------------------------------------------------------------------------------
+def _sector_contains_sector(m, p):
+    """
+    Check if the sector of the ring at m contains the sector at p.
+    """
+    return _area(m.prev, m, p.prev) < 0 and _area(p.next, m, m.next) < 0
+# ==================================================================================================
+# END HOLE FUNCTIONS
+# ==================================================================================================
+
+
+# ==================================================================================================
+# GEOMETRY FUNCTIONS
+# ==================================================================================================
+def _signed_area(xs, ys, start, end):
+    """
+    Get twice the signed area of the points from start to end.
+    """
+    total = 0.0
+    j = end - 1
+    for i in range(start, end):
+        total += (xs[j] - xs[i]) * (ys[i] + ys[j])
+        j = i
+    return total
+# --------------------------------------------------------------------------------------------------
+def _tri_area(xs, ys, a, b, c):
+    """
+    Get twice the signed area of a triangle, positive if counter-clockwise.
+    """
+    return (xs[b] - xs[a]) * (ys[c] - ys[a]) - (xs[c] - xs[a]) * (ys[b] - ys[a])
+# --------------------------------------------------------------------------------------------------
+def _area(p, q, r):
+    """
+    Get twice the signed area of the triangle of three nodes, negative if counter-clockwise.
+    """
+    return (q.y - p.y) * (r.x - q.x) - (q.x - p.x) * (r.y - q.y)
+# --------------------------------------------------------------------------------------------------
+def _equals(p1, p2):
+    """
+    Check if two nodes have the same coordinates.
+    """
+    return p1.x == p2.x and p1.y == p2.y
+# --------------------------------------------------------------------------------------------------
+def _point_in_triangle(ax, ay, bx, by, cx, cy, px, py):
+    """
+    Check if a point is inside a triangle, or on its edges.
+    """
+    return (cx - px) * (ay - py) >= (ax - px) * (cy - py) and \
+        (ax - px) * (by - py) >= (bx - px) * (ay - py) and \
+        (bx - px) * (cy - py) >= (cx - px) * (by - py)
+# --------------------------------------------------------------------------------------------------
+def _sign(num):
+    return (num > 0) - (num < 0)
+# --------------------------------------------------------------------------------------------------
+def _on_segment(p, q, r):
+    """
+    Check if q is on the segment from p to r, for collinear points.
+    """
+    return min(p.x, r.x) <= q.x <= max(p.x, r.x) and min(p.y, r.y) <= q.y <= max(p.y, r.y)
+# --------------------------------------------------------------------------------------------------
+def _intersects(p1, q1, p2, q2):
+    """
+    Check if the segments p1-q1 and p2-q2 intersect.
+    """
+    o1 = _sign(_area(p1, q1, p2))
+    o2 = _sign(_area(p1, q1, q2))
+    o3 = _sign(_area(p2, q2, p1))
+    o4 = _sign(_area(p2, q2, q1))
+    if o1 != o2 and o3 != o4:
+        return True
+    if o1 == 0 and _on_segment(p1, p2, q1):
+        return True
+    if o2 == 0 and _on_segment(p1, q2, q1):
+        return True
+    if o3 == 0 and _on_segment(p2, p1, q2):
+        return True
+    if o4 == 0 and _on_segment(p2, q1, q2):
+        return True
+    return False
+# --------------------------------------------------------------------------------------------------
+def _intersects_ring(a, b):
+    """
+    Check if the diagonal from a to b intersects any edge of the ring.
+    """
+    p = a
+    while True:
+        if p.i != a.i and p.next.i != a.i and p.i != b.i and p.next.i != b.i and \
+                _intersects(p, p.next, a, b):
+            return True
+        p = p.next
+        if p is a:
+            break
+    return False
+# --------------------------------------------------------------------------------------------------
+def _locally_inside(a, b):
+    """
+    Check if the diagonal from a to b is locally inside the ring, at a.
+    """
+    if _area(a.prev, a, a.next) < 0:
+        return _area(a, b, a.next) >= 0 and _area(a, a.prev, b) >= 0
+    return _area(a, b, a.prev) < 0 or _area(a, a.next, b) < 0
+# --------------------------------------------------------------------------------------------------
+def _middle_inside(a, b):
+    """
+    Check if the middle of the diagonal from a to b is inside the ring.
+    """
+    p = a
+    inside = False
+    px = (a.x + b.x) / 2
+    py = (a.y + b.y) / 2
+    while True:
+        if ((p.y > py) != (p.next.y > py)) and p.next.y != p.y and \
+                px < (p.next.x - p.x) * (py - p.y) / (p.next.y - p.y) + p.x:
+            inside = not inside
+        p = p.next
+        if p is a:
+            break
+    return inside
+# --------------------------------------------------------------------------------------------------
+def _is_valid_diagonal(a, b):
+    """
+    Check if the diagonal from a to b can be used to split the ring.
+    """
+    if a.next.i == b.i or a.prev.i == b.i or _intersects_ring(a, b):
+        return False
+    if _locally_inside(a, b) and _locally_inside(b, a) and _middle_inside(a, b) and \
+            (_area(a.prev, a, b.prev) != 0 or _area(a, b.prev, b) != 0):
+        return True
+    return _equals(a, b) and _area(a.prev, a, a.next) > 0 and _area(b.prev, b, b.next) > 0
+# ==================================================================================================
+# END GEOMETRY FUNCTIONS
+# ==================================================================================================
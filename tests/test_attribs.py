@@ -63,6 +63,14 @@ class TestAttribs(unittest.TestCase):
         self.assertTrue( self.model.has_model_attrib("a_list") )
         self.assertTrue( self.model.has_model_attrib("a_dict") )
         self.assertFalse( self.model.has_model_attrib("abc") )
+
+    def test_set_attrib_val_errors(self):
+        points = self.model.get_ents(ENT_TYPE.POINT)
+        posis = self.model.get_ents(ENT_TYPE.POSI)
+        self.assertRaises(Exception, self.model.set_attrib_val, 'pt99', 'test', 'hello3')
+        self.assertRaises(Exception, self.model.set_attrib_val, posis[0], 'test', 'hello3')
+        self.assertRaises(Exception, self.model.set_attrib_val, 'hello1', 'test', 'hello3')
+        self.assertEqual(self.model.get_attrib_val(points[0], 'test'), 'hello1')
        
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
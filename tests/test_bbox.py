@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+ENT_TYPE = sim.ENT_TYPE
+
+class TestBbox(unittest.TestCase):
+
+    def setUp(self):
+        # a point, an open pline and a pgon, and a coll with the pline and a coll with the pgon
+        m = sim.SIM()
+        m.add_posis([[0,0,0], [1,2,3], [4,0,0], [4,1,1], [10,10,0], [12,10,0], [12,13,0]])
+        m.add_point('ps0')
+        m.add_pline(['ps1', 'ps2', 'ps3'], False)
+        m.add_pgon(['ps4', 'ps5', 'ps6'])
+        m.add_coll()
+        m.add_coll()
+        m.add_coll_ent('co0', 'pl0')
+        m.add_coll_ent('co0', 'co1')
+        m.add_coll_ent('co1', 'pg0')
+        self.model = m
+
+    def test_get_bbox(self):
+        m = self.model
+        self.assertListEqual(m.get_bbox('pt0'), [[0,0,0], [0,0,0]])
+        self.assertListEqual(m.get_bbox('pl0'), [[1,0,0], [4,2,3]])
+        self.assertListEqual(m.get_bbox(['pg0', 'ps0']), [[0,0,0], [12,13,0]])
+        self.assertListEqual(m.get_bbox('co0'), [[1,0,0], [12,13,3]])
+        self.assertIsNone(m.get_bbox(m.add_coll()))
+        self.assertIsNone(m.get_bbox([]))
+        self.assertRaises(Exception, m.get_bbox, m.get_ents(ENT_TYPE.VERT, 'pt0'))
+
+    def test_get_bboxes(self):
+        m = self.model
+        self.assertListEqual(m.get_bboxes(ENT_TYPE.POSI)[:2], 
+            [[[0,0,0], [0,0,0]], [[1,2,3], [1,2,3]]])
+        self.assertListEqual(m.get_bboxes(ENT_TYPE.COLL), [[[1,0,0], [12,13,3]], 
+            [[10,10,0], [12,13,0]]])
+        self.assertRaises(Exception, m.get_bboxes, ENT_TYPE.EDGE)
+
+    def test_update(self):
+        m = self.model
+        m.get_bboxes(ENT_TYPE.COLL)
+        # moved posis clear the objects and the colls that contain them
+        m.move('pg0', [0,0,10])
+        self.assertListEqual(m.get_bbox('co0'), [[1,0,0], [12,13,10]])
+        m.set_posi_coords('ps1', [-1,2,3])
+        self.assertListEqual(m.get_bbox('pl0'), [[-1,0,0], [4,2,3]])
+        self.assertListEqual(m.get_bbox('co0'), [[-1,0,0], [12,13,10]])
+        # colls that are changed
+        m.add_coll_ent('co1', 'pt0')
+        self.assertListEqual(m.get_bbox('co1'), [[0,0,0], [12,13,10]])
+        m.rem_coll_ent('co0', 'co1')
+        self.assertListEqual(m.get_bbox('co0'), [[-1,0,0], [4,2,3]])
+        # deleted ents
+        m.del_ents(['pl0'])
+        self.assertIsNone(m.get_bbox('co0'))
+        self.assertListEqual(m.get_bbox('co1'), [[0,0,0], [12,13,10]])
+
+    def test_snapshots(self):
+        m = self.model
+        ssid = m.get_active_snapshot()
+        self.assertListEqual(m.get_bbox('co1'), [[10,10,0], [12,13,0]])
+        m.new_snapshot()
+        m.set_posi_coords('ps6', [12,20,0])
+        self.assertListEqual(m.get_bbox('co1'), [[10,10,0], [12,20,0]])
+        m.set_active_snapshot(ssid)
+        self.assertListEqual(m.get_bbox('co1'), [[10,10,0], [12,13,0]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+ENT_TYPE = sim.ENT_TYPE
+DATA_TYPE = sim.DATA_TYPE
+
+class TestBulk(unittest.TestCase):
+
+    def setUp(self):
+        m = sim.SIM()
+        m.add_posis([[0,0,0], [1,0,0], [1,1,0], [0,1,0], [0,0,0], (0.5,0.5,0)])
+        self.model = m
+
+    def test_add_posis(self):
+        self.assertEqual(self.model.num_ents(ENT_TYPE.POSI), 6)
+        self.assertListEqual(self.model.get_posi_coords('ps1'), [1,0,0])
+        self.assertListEqual(self.model.get_posi_coords('ps4'), [0,0,0])
+        self.assertListEqual(self.model.get_posi_coords('ps5'), [0.5,0.5,0])
+        self.assertListEqual(self.model.add_posis([[1,0,0]]), ['ps6'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI), 
+            self.model.query(ENT_TYPE.POSI, 'xyz', '!=', None))
+
+    def test_add_plines(self):
+        plines = self.model.add_plines([['ps0', 'ps1', 'ps2'], ['ps3', 'ps0']], [True, False])
+        self.assertListEqual(plines, ['pl0', 'pl1'])
+        self.assertTrue(self.model.is_pline_closed('pl0'))
+        self.assertFalse(self.model.is_pline_closed('pl1'))
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, 'pl0'), ['ps0', 'ps1', 'ps2'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, 'pl1'), ['ps3', 'ps0'])
+        self.assertEqual(self.model.num_ents(ENT_TYPE.EDGE), 4)
+        # flat list of indexes, with offsets
+        plines = self.model.add_plines([0, 1, 2, 3, 1, 2, 3], False, [0, 4])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, plines[0]), ['ps0', 'ps1', 'ps2', 'ps3'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, plines[1]), ['ps1', 'ps2', 'ps3'])
+        self.assertRaises(Exception, self.model.add_plines, [['ps0']], True)
+
+    def test_add_plines_same_as_add_pline(self):
+        m = sim.SIM()
+        m.add_posis([[0,0,0], [1,0,0], [1,1,0]])
+        m.add_pline(['ps0', 'ps1', 'ps2'], True)
+        self.model.add_plines([['ps0', 'ps1', 'ps2']], [True])
+        for ent_type in [ENT_TYPE.VERT, ENT_TYPE.EDGE, ENT_TYPE.WIRE]:
+            for ent in m.get_ents(ent_type):
+                for target_ent_type in [ENT_TYPE.POSI, ENT_TYPE.VERT, ENT_TYPE.EDGE]:
+                    self.assertListEqual(m.get_ents(target_ent_type, ent), 
+                        self.model.get_ents(target_ent_type, ent))
+        self.assertListEqual(m.get_ents(ENT_TYPE.EDGE, '_v0'), 
+            self.model.get_ents(ENT_TYPE.EDGE, '_v0'))
+
+    def test_add_pgons(self):
+        pgons = self.model.add_pgons([['ps0', 'ps1', 'ps2', 'ps3'], ['ps0', 'ps1', 'ps2']], 
+            [[[5, 1, 2]], []])
+        self.assertListEqual(pgons, ['pg0', 'pg1'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.WIRE, 'pg0'), ['_w0', '_w1'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.WIRE, 'pg1'), ['_w2'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, '_w1'), ['ps5', 'ps1', 'ps2'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, 'pg1'), ['ps0', 'ps1', 'ps2'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.PGON, 'ps5'), ['pg0'])
+        self.assertEqual(self.model.num_ents(ENT_TYPE.EDGE), 10)
+        # flat list of indexes, with offsets
+        pgons = self.model.add_pgons([0, 1, 2, 1, 2, 3], None, [0, 3])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, pgons[1]), ['ps1', 'ps2', 'ps3'])
+        self.assertRaises(Exception, self.model.add_pgons, [['ps0', 'ps1']])
+        self.assertRaises(Exception, self.model.add_pgons, [['ps0', 'ps1', 'ps2']], [[[0, 1]]])
+        with self.assertRaises(Exception) as context:
+            self.model.add_pgon([])
+        self.assertNotIsInstance(context.exception, IndexError)
+
+    def test_add_pgons_deleted_posis(self):
+        self.model.del_ents(['ps0'])
+        # indexes are into the live posis
+        pgon = self.model.add_pgons([[0, 1, 2]])[0]
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, pgon), ['ps1', 'ps2', 'ps3'])
+        self.assertRaises(Exception, self.model.add_pgons, [['ps0', 'ps1', 'ps2']])
+        self.assertRaises(Exception, self.model.add_pgons, [[1, 2, 5]])
+        self.assertRaises(Exception, self.model.add_plines, [[-1, 0]], False)
+        self.assertRaises(Exception, self.model.add_pgons, [['ps1', 'ps2', 'ps3']], [[['ps0', 1, 2]]])
+        self.assertEqual(self.model.num_ents(ENT_TYPE.PGON), 1)
+
+if __name__ == '__main__':
+    unittest.main()
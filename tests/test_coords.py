@@ -0,0 +1,61 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+from sim_model import io_sim
+ENT_TYPE = sim.ENT_TYPE
+DATA_TYPE = sim.DATA_TYPE
+
+class TestCoords(unittest.TestCase):
+
+    def setUp(self):
+        m = sim.SIM()
+        m.add_posis([[0,0,0], [1,0,0], [1,1,0]])
+        m.add_posi()
+        m.add_pgon(['ps0', 'ps1', 'ps2'])
+        self.model = m
+
+    def test_get_set_coords(self):
+        self.assertListEqual(self.model.get_posi_coords('ps1'), [1,0,0])
+        self.assertIsNone(self.model.get_posi_coords('ps3'))
+        self.model.set_posi_coords('ps3', [0,1,0])
+        self.assertListEqual(self.model.get_posis_coords(['ps3', 'ps0']), [[0,1,0], [0,0,0]])
+        self.model.set_posis_coords(['ps0', 'ps1'], [[2,2,2], [3,3,3]])
+        self.assertListEqual(self.model.get_attrib_val('ps1', 'xyz'), [3,3,3])
+        self.assertListEqual(self.model.get_vert_coords('_v0'), [2,2,2])
+        self.model.del_attrib_val('ps3', 'xyz')
+        self.assertIsNone(self.model.get_posi_coords('ps3'))
+        self.assertRaises(Exception, self.model.set_posi_coords, 'ps0', [1,2])
+
+    def test_query_coords(self):
+        self.assertListEqual(self.model.query(ENT_TYPE.POSI, 'xyz', '==', None), ['ps3'])
+        self.assertListEqual(self.model.query(ENT_TYPE.POSI, 'xyz', '==', [1,1,0]), ['ps2'])
+        self.assertListEqual(self.model.get_attrib_vals(ENT_TYPE.POSI, 'xyz'),
+            [[0,0,0], [1,0,0], [1,1,0]])
+        self.assertRaises(Exception, self.model.query, ENT_TYPE.POSI, 'xyz', '>', [0,0,0])
+
+    def test_float32(self):
+        m = sim.SIM(float32 = True)
+        posi = m.add_posi([0.1, 0.2, 0.3])
+        self.assertNotEqual(m.get_posi_coords(posi), [0.1, 0.2, 0.3])
+        self.assertAlmostEqual(m.get_posi_coords(posi)[0], 0.1, places = 6)
+        self.assertListEqual(m.query(ENT_TYPE.POSI, 'xyz', '==', [0.1, 0.2, 0.3]), [posi])
+
+    def test_del_posis(self):
+        self.model.del_ents(['pg0'], del_posis = True)
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI), ['ps3'])
+        self.assertIsNone(self.model.get_posi_coords('ps0'))
+
+    def test_export_import(self):
+        self.model.set_posi_coords('ps3', [1,1,0])
+        m = sim.SIM()
+        io_sim.import_sim(m, io_sim.export_sim(self.model))
+        self.assertListEqual(m.get_posis_coords(m.get_ents(ENT_TYPE.POSI)),
+            [[0,0,0], [1,0,0], [1,1,0], [1,1,0]])
+
+if __name__ == '__main__':
+    unittest.main()
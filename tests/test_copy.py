@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+from sim_model import io_sim
+ENT_TYPE = sim.ENT_TYPE
+DATA_TYPE = sim.DATA_TYPE
+
+class TestCopy(unittest.TestCase):
+
+    def setUp(self):
+        m = sim.SIM()
+        posis = m.add_posis([[0,0,0], [1,0,0], [1,1,0], [0,1,0]])
+        m.add_pgon([posis, m.add_posis([[0.2,0.2,0], [0.4,0.2,0], [0.4,0.4,0]])])
+        m.add_pline(posis[:3], True)
+        m.add_point(posis[3])
+        m.add_coll()
+        m.add_coll()
+        m.add_coll_ent('co0', 'pg0')
+        m.add_coll_ent('co0', 'co1')
+        m.add_coll_ent('co1', 'pt0')
+        m.add_attrib(ENT_TYPE.PGON, 'area', DATA_TYPE.NUM)
+        m.set_attrib_val('pg0', 'area', 0.5)
+        m.add_attrib(ENT_TYPE.VERT, 'index', DATA_TYPE.NUM)
+        m.set_attrib_val('_v1', 'index', 1)
+        self.model = m
+
+    def test_copy_ents(self):
+        m = self.model
+        copies = m.copy_ents(['pl0', 'pg0'], [0,0,1])
+        self.assertListEqual(copies, ['pl1', 'pg1'])
+        # the posis shared by the pline and pgon are copied once
+        self.assertEqual(m.num_ents(ENT_TYPE.POSI), 14)
+        self.assertListEqual(m.get_ent_posis('pl1'), ['ps7', 'ps8', 'ps9', 'ps7'])
+        self.assertListEqual(m.get_ent_posis('pg1'),
+            [['ps7', 'ps8', 'ps9', 'ps10'], ['ps11', 'ps12', 'ps13']])
+        self.assertListEqual(m.get_posi_coords('ps10'), [0,1,1])
+        self.assertEqual(m.get_attrib_val('pg1', 'area'), 0.5)
+        self.assertTrue(m.is_pline_closed('pl1'))
+        # the exported geometry of the copies is the same as the originals
+        data = io_sim.export_sim_data(m)
+        self.assertListEqual(data['geometry']['pgons'][0],
+            [[posi_i - 7 for posi_i in posis_i] for posis_i in data['geometry']['pgons'][1]])
+
+    def test_copy_vert_preds(self):
+        m = self.model
+        graph = m.graph
+        ent = sim._GR_EDGE_TYPE.ENT
+        # the start vert of a closed wire, with the edges in reverse order
+        vert = m.get_ents(ENT_TYPE.VERT, 'pl0')[0]
+        graph.set_predecessors(vert, list(reversed(graph.predecessors(vert, ent))), ent)
+        copy = m.copy_ents('pl0')
+        verts = m.get_ents(ENT_TYPE.VERT, 'pl0')
+        for vert, vert_copy in zip(verts, m.get_ents(ENT_TYPE.VERT, copy)):
+            self.assertListEqual([m.get_ents(ENT_TYPE.EDGE, 'pl0').index(edge) 
+                for edge in graph.predecessors(vert, ent)], [m.get_ents(ENT_TYPE.EDGE, 
+                copy).index(edge) for edge in graph.predecessors(vert_copy, ent)])
+
+    def test_copy_coll(self):
+        m = self.model
+        self.assertListEqual(m.copy_ents('co0'), ['co2'])
+        self.assertListEqual(m.get_ents(ENT_TYPE.PGON, 'co2'), ['pg1'])
+        self.assertListEqual(m.get_ents(ENT_TYPE.POINT, 'co2'), ['pt1'])
+        self.assertListEqual(m.get_ents(ENT_TYPE.COLL), ['co0', 'co1', 'co2', 'co3'])
+        self.assertListEqual(m.get_ents(ENT_TYPE.POINT, 'co3'), ['pt1'])
+        self.assertListEqual(m.get_posi_coords(m.get_ents(ENT_TYPE.POSI, 'pt1')[0]), [0,1,0])
+        self.assertRaises(Exception, m.copy_ents, '_v0')
+
+    def test_clone_ents(self):
+        m = self.model
+        self.assertListEqual(m.clone_ents(['pg0']), ['pg1'])
+        self.assertListEqual(m.get_ents(ENT_TYPE.PGON), ['pg1'])
+        # posis still used by the pline and the point are not deleted
+        self.assertListEqual(m.get_ents(ENT_TYPE.POSI),
+            ['ps0', 'ps1', 'ps2', 'ps3', 'ps7', 'ps8', 'ps9', 'ps10', 'ps11', 'ps12', 'ps13'])
+        self.assertListEqual(m.get_ent_posis('pg1'),
+            [['ps7', 'ps8', 'ps9', 'ps10'], ['ps11', 'ps12', 'ps13']])
+        self.assertEqual(m.get_attrib_val('pg1', 'area'), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
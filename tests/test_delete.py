@@ -0,0 +1,79 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+ENT_TYPE = sim.ENT_TYPE
+DATA_TYPE = sim.DATA_TYPE
+
+class TestDelete(unittest.TestCase):
+
+    def setUp(self):
+        m = sim.SIM()
+        posis = [m.add_posi([0,0,0]), m.add_posi([1,0,0]), m.add_posi([1,1,0]), m.add_posi([0,1,0])]
+        m.add_pgon(posis[:3])
+        m.add_pgon([posis[0], posis[2], posis[3]])
+        m.add_pline(posis[:2], False)
+        m.add_point(posis[3])
+        coll = m.add_coll()
+        m.add_coll_ent(coll, 'pg0')
+        m.add_attrib(ENT_TYPE.PGON, 'area', DATA_TYPE.NUM)
+        m.set_attrib_val('pg0', 'area', 0.5)
+        m.set_attrib_val('pg1', 'area', 0.25)
+        self.model = m
+
+    def test_del_pgon(self):
+        self.model.del_ents('pg0')
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.PGON), ['pg1'])
+        self.assertEqual(self.model.num_ents(ENT_TYPE.WIRE), 2)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.EDGE), 4)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.VERT), 6)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.POSI), 4)
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.PGON, 'ps1'), [])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.PGON, 'co0'), [])
+        self.assertListEqual(self.model.query(ENT_TYPE.PGON, 'area', '==', 0.5), [])
+        self.assertListEqual(self.model.query(ENT_TYPE.PGON, 'area', '<', 1), ['pg1'])
+
+    def test_del_posis(self):
+        self.model.del_ents(['pg0', 'pt0'], True)
+        # ps0 and ps2 are used by pg1, ps1 is used by pl0
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI), ['ps0', 'ps1', 'ps2', 'ps3'])
+        self.model.del_ents(['pl0', 'pg1'], True)
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI), [])
+        self.assertEqual(self.model.num_ents(ENT_TYPE.VERT), 0)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.EDGE), 0)
+
+    def test_del_coll(self):
+        self.model.del_ents('co0')
+        self.assertEqual(self.model.num_ents(ENT_TYPE.COLL), 0)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.PGON), 2)
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.COLL, 'pg0'), [])
+
+    def test_del_bad_ents(self):
+        self.assertRaises(Exception, self.model.del_ents, '_w0')
+        # used posis are not deleted
+        self.model.del_ents('ps0')
+        self.assertEqual(self.model.num_ents(ENT_TYPE.POSI), 4)
+
+    def test_new_ent_names(self):
+        self.model.del_ents('pg1')
+        self.assertEqual(self.model.add_pgon(['ps0', 'ps1', 'ps3']), 'pg2')
+
+    def test_compact(self):
+        self.model.del_ents(['pg0', 'pt0'], True)
+        renames = self.model.compact()
+        self.assertEqual(renames['pg1'], 'pg0')
+        self.assertEqual(renames['_w1'], '_w0')
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.PGON), ['pg0'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, 'pg0'), ['ps0', 'ps2', 'ps3'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, 'pl0'), ['ps0', 'ps1'])
+        self.assertEqual(self.model.get_attrib_val('pg0', 'area'), 0.25)
+        self.assertListEqual(self.model.get_attrib_vals(ENT_TYPE.PGON, 'area'), [0.25])
+        self.assertListEqual(self.model.get_posi_coords('ps3'), [0,1,0])
+        self.assertEqual(self.model.add_pgon(['ps0', 'ps1', 'ps3']), 'pg1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ from __future__ import print_function
 # from __future__ import unicode_literals
 import unittest
 import sys, os
+import tempfile
 sys.path.insert(0, os.path.abspath('..'))
 from sim_model import sim
 from sim_model import io_sim
@@ -76,6 +77,46 @@ class TestImport(unittest.TestCase):
         colls = self.model.get_ents(ENT_TYPE.COLL)
         self.assertEqual(len(colls), 2)
 
+    def test_save_load_graph(self):
+        # make some geom
+        create_geom(self.model)
+        sim_data = io_sim.export_sim_data(self.model)
+        # save and load the graph
+        fd, filepath = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.model.graph.save(filepath)
+            model2 = sim.SIM()
+            model2.graph.load(filepath)
+        finally:
+            os.remove(filepath)
+        # check
+        self.assertEqual(io_sim.export_sim_data(model2), sim_data)
+        model2.add_point(model2.add_posi([0,0,0]))
+        self.assertEqual(len(model2.get_ents(ENT_TYPE.POINT)), 2)
+
+    def test_journal_recover(self):
+        create_geom(self.model)
+        fd, filepath = tempfile.mkstemp()
+        os.close(fd)
+        fd, journal = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.model.graph.start_journal(journal)
+            self.model.graph.checkpoint(filepath)
+            self.model.set_posi_coords('ps0', [0,0,1])
+            self.model.add_pgon(['ps1', 'ps2', 'ps3'])
+            self.model.graph.stop_journal()
+            # recover from the checkpoint and the journal
+            model2 = sim.SIM()
+            model2.graph.load(filepath)
+            model2.graph.replay_journal(journal)
+        finally:
+            os.remove(filepath)
+            os.remove(journal)
+        # check
+        self.assertEqual(io_sim.export_sim_data(model2), io_sim.export_sim_data(self.model))
+
     def test_export_import_sim_str(self):
         # make some geom
         create_geom(self.model)
@@ -95,6 +136,38 @@ class TestImport(unittest.TestCase):
         colls = self.model.get_ents(ENT_TYPE.COLL)
         self.assertEqual(len(colls), 2)
 
+    def test_export_import_closed_pline(self):
+        # make some geom
+        create_geom(self.model)
+        # export and import into a new model
+        m2 = sim.SIM()
+        io_sim.import_sim_data(m2, io_sim.export_sim_data(self.model))
+        # check
+        self.assertEqual(m2.num_ents(ENT_TYPE.VERT), self.model.num_ents(ENT_TYPE.VERT))
+        self.assertEqual(m2.num_ents(ENT_TYPE.EDGE), self.model.num_ents(ENT_TYPE.EDGE))
+        self.assertTrue(m2.is_pline_closed('pl1'))
+        self.assertFalse(m2.is_pline_closed('pl0'))
+        self.assertEqual(m2.get_ent_posis('pl1'), self.model.get_ent_posis('pl1'))
+
+    def test_import_sub_ent_attribs(self):
+        create_geom(self.model)
+        m2 = sim.SIM()
+        io_sim.import_sim_data(m2, io_sim.export_sim_data(self.model))
+        m2.add_posi()
+        m2.add_attrib(ENT_TYPE.VERT, 'index', DATA_TYPE.NUM)
+        for i, vert in enumerate(m2.get_ents(ENT_TYPE.VERT, 'pg0')):
+            m2.set_attrib_val(vert, 'index', i)
+        m2.add_attrib(ENT_TYPE.WIRE, 'name', DATA_TYPE.STR)
+        m2.set_attrib_val(m2.get_ents(ENT_TYPE.WIRE, 'pl1')[0], 'name', 'closed')
+        # import into a model that already has entities
+        io_sim.import_sim_data(self.model, io_sim.export_sim_data(m2))
+        self.assertListEqual([self.model.get_attrib_val(vert, 'index') 
+            for vert in self.model.get_ents(ENT_TYPE.VERT, 'pg1')], [0, 1, 2, 3])
+        self.assertEqual(self.model.get_attrib_val(
+            self.model.get_ents(ENT_TYPE.WIRE, 'pl3')[0], 'name'), 'closed')
+        self.assertEqual(self.model.get_posi_coords('ps7'), [-10,0,-10])
+        self.assertIsNone(self.model.get_posi_coords('ps8'))
+
     def test_import_model_attribs(self):
         # create a model with some modle attributes
         m2 = sim.SIM()
@@ -4,6 +4,9 @@ from __future__ import print_function
 # from __future__ import unicode_literals
 import unittest
 import sys, os
+import tempfile
+import shutil
+import threading
 sys.path.insert(0, os.path.abspath('..'))
 from sim_model import graph
 
@@ -170,5 +173,703 @@ class TestGraph(unittest.TestCase):
         self.graph.set_predecessors('ccc', ['bbb', 'aaa'], 'et1')
         self.assertListEqual(self.graph.predecessors('ccc', 'et1'), ['bbb', 'aaa'])
 
+    def test_redirect_edges(self):
+        ids = self.graph.add_nodes(['aaa', 'bbb', 'ccc', 'ddd'])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge('aaa', 'ccc', 'et1')
+        self.graph.add_edge('aaa', 'ddd', 'et1')
+        self.graph.add_edge('bbb', 'ddd', 'et1')
+        self.graph.redirect_edges_id({ids[3]: ids[2]}, 'et1')
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['ccc'])
+        self.assertListEqual(self.graph.successors('bbb', 'et1'), ['ccc'])
+        self.assertListEqual(self.graph.predecessors('ccc', 'et1'), ['aaa', 'bbb'])
+        self.assertListEqual(self.graph.predecessors('ddd', 'et1'), [])
+        self.graph.add_edge_type('et2', False)
+        self.assertRaises(Exception, self.graph.redirect_edges_id, {ids[3]: ids[2]}, 'et2')
+
+    def test_node_ids(self):
+        id_a = self.graph.add_node('aaa')
+        id_b = self.graph.add_node('bbb')
+        self.assertEqual(self.graph.get_node_id('aaa'), id_a)
+        self.assertEqual(self.graph.get_node_id('bbb'), id_b)
+        self.assertEqual(self.graph.get_node_name(id_b), 'bbb')
+        self.assertRaises(Exception, self.graph.get_node_id, 'ccc')
+
+    def test_successors_predecessors_id(self):
+        id_a = self.graph.add_node('aaa')
+        id_b = self.graph.add_node('bbb')
+        id_c = self.graph.add_node('ccc')
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge_id(id_a, id_b, 'et1')
+        self.graph.add_edge_id(id_a, id_c, 'et1')
+        self.assertListEqual(self.graph.successors_id(id_a, 'et1'), [id_b, id_c])
+        self.assertListEqual(self.graph.predecessors_id(id_c, 'et1'), [id_a])
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb', 'ccc'])
+
+    def test_large_row(self):
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_node('aaa')
+        names = ['n' + str(i) for i in range(100)]
+        for name in names:
+            self.graph.add_node(name)
+            self.graph.add_edge('aaa', name, 'et1')
+        self.graph.add_edge('aaa', 'n0', 'et1')
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), names)
+        self.graph.del_edge('aaa', 'n50', 'et1')
+        self.assertFalse(self.graph.has_edge('aaa', 'n50', 'et1'))
+        self.assertEqual(self.graph.degree_out('aaa', 'et1'), 99)
+
+    def test_snapshot_copy_on_write(self):
+        self.graph.add_node('aaa')
+        self.graph.add_node('bbb')
+        self.graph.add_node('ccc')
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge_type('et2', True)
+        self.graph.add_edge('aaa', 'bbb', 'et1')
+        self.graph.add_edge('aaa', 'ccc', 'et2')
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.assertTrue(self.graph.has_edge('aaa', 'bbb', 'et1'))
+        # modify the new snapshot
+        self.graph.add_edge('aaa', 'ccc', 'et1')
+        self.graph.del_edge('aaa', 'ccc', 'et2')
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb', 'ccc'])
+        self.assertListEqual(self.graph.predecessors('ccc', 'et2'), [])
+        # the old snapshot is unchanged
+        self.assertListEqual(self.graph.successors('aaa', 'et1', ssid0), ['bbb'])
+        self.assertListEqual(self.graph.predecessors('ccc', 'et2', ssid0), ['aaa'])
+        # modify the old snapshot
+        self.graph.set_active_snapshot(ssid0)
+        self.graph.del_edge('aaa', 'bbb', 'et1')
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), [])
+        self.assertListEqual(self.graph.successors('aaa', 'et1', ssid1), ['bbb', 'ccc'])
+        self.assertListEqual(self.graph.predecessors('bbb', 'et1', ssid1), ['aaa'])
+
+    def test_snapshot_ids(self):
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot()
+        self.graph.set_active_snapshot(ssid0)
+        ssid2 = self.graph.new_snapshot(ssid0)
+        self.assertEqual(len(set([ssid0, ssid1, ssid2])), 3)
+        self.assertEqual(self.graph.get_active_snapshot(), ssid2)
+        self.assertRaises(Exception, self.graph.new_snapshot, 99)
+
+    def test_diff_snapshots(self):
+        self.graph.add_node('aaa')
+        self.graph.add_node('bbb')
+        self.graph.add_node('ccc')
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge_type('et2', False)
+        self.graph.add_edge('aaa', 'bbb', 'et1')
+        self.graph.add_edge('aaa', 'ccc', 'et2')
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.assertDictEqual(self.graph.diff_snapshots(ssid0, ssid1), {})
+        self.graph.add_edge('bbb', 'ccc', 'et1')
+        self.graph.del_edge('aaa', 'bbb', 'et1')
+        diff = self.graph.diff_snapshots(ssid0, ssid1)
+        self.assertListEqual(list(diff.keys()), ['et1'])
+        self.assertListEqual(diff['et1'][0], [('bbb', 'ccc')])
+        self.assertListEqual(diff['et1'][1], [('aaa', 'bbb')])
+        # reversed
+        diff = self.graph.diff_snapshots(ssid1, ssid0)
+        self.assertListEqual(diff['et1'][0], [('aaa', 'bbb')])
+        self.assertListEqual(diff['et1'][1], [('bbb', 'ccc')])
+        # a third snapshot, with changes in both
+        ssid2 = self.graph.new_snapshot(ssid1)
+        self.graph.add_edge('ccc', 'aaa', 'et2')
+        self.graph.set_active_snapshot(ssid0)
+        self.graph.del_edge('aaa', 'ccc', 'et2')
+        diff = self.graph.diff_snapshots(ssid0, ssid2)
+        self.assertListEqual(diff['et2'][0], [('aaa', 'ccc'), ('ccc', 'aaa')])
+        self.assertListEqual(diff['et2'][1], [])
+        # an empty snapshot
+        ssid3 = self.graph.new_snapshot()
+        diff = self.graph.diff_snapshots(ssid3, ssid0)
+        self.assertListEqual(diff['et1'][0], [('aaa', 'bbb')])
+
+    def test_add_nodes_edges(self):
+        ids = self.graph.add_nodes(['aaa', 'bbb', 'ccc'], {'k1': 1})
+        self.assertListEqual(self.graph.get_nodes(), ['aaa', 'bbb', 'ccc'])
+        self.assertListEqual([self.graph.get_node_id(n) for n in ['aaa', 'bbb', 'ccc']], ids)
+        self.assertEqual(self.graph.get_node_prop('ccc', 'k1'), 1)
+        self.assertRaises(Exception, self.graph.add_nodes, ['ddd', 'aaa'])
+        self.assertRaises(Exception, self.graph.add_nodes, ['ddd', 'ddd'])
+        self.assertFalse(self.graph.has_node('ddd'))
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edges([('aaa', 'bbb'), ('aaa', 'ccc'), ('bbb', 'ccc'), ('aaa', 'bbb')], 'et1')
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb', 'ccc'])
+        self.assertListEqual(self.graph.predecessors('ccc', 'et1'), ['aaa', 'bbb'])
+        self.assertRaises(Exception, self.graph.add_edges, [('aaa', 'ddd')], 'et1')
+
+    def test_node_prop_columns(self):
+        self.graph.add_nodes(['aaa', 'bbb'], {'k1': 1})
+        self.graph.add_node('ccc')
+        self.graph.set_node_prop('bbb', 'k2', 'str123')
+        self.graph.set_node_prop('aaa', 'k1', 2)
+        self.assertEqual(self.graph.get_node_prop('aaa', 'k1'), 2)
+        self.assertEqual(self.graph.get_node_prop('bbb', 'k1'), 1)
+        self.assertListEqual(self.graph.get_node_prop_names('aaa'), ['k1'])
+        self.assertListEqual(self.graph.get_node_prop_names('bbb'), ['k1', 'k2'])
+        self.assertListEqual(self.graph.get_node_prop_names('ccc'), [])
+        self.assertRaises(KeyError, self.graph.get_node_prop, 'ccc', 'k1')
+        self.assertRaises(KeyError, self.graph.get_node_prop, 'aaa', 'k3')
+        self.assertRaises(Exception, self.graph.get_node_prop, 'ddd', 'k1')
+
+    def test_freeze_thaw(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc', 'ddd'])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge_type('et2', False)
+        self.graph.add_edges([('ccc', 'aaa'), ('aaa', 'bbb'), ('aaa', 'ccc')], 'et1')
+        self.graph.add_edges([('aaa', 'bbb')], 'et2')
+        self.graph.add_node('eee')
+        self.graph.freeze()
+        self.assertTrue(self.graph.is_frozen())
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb', 'ccc'])
+        self.assertListEqual(self.graph.predecessors('aaa', 'et1'), ['ccc'])
+        self.assertListEqual(self.graph.successors('ddd', 'et1'), [])
+        self.assertListEqual(self.graph.successors('eee', 'et1'), [])
+        self.assertListEqual(self.graph.get_nodes_with_out_edge('et1'), ['ccc', 'aaa'])
+        self.assertEqual(self.graph.degree_out('aaa', 'et1'), 2)
+        self.assertEqual(self.graph.degree_in('ccc', 'et1'), 1)
+        self.assertTrue(self.graph.has_edge('aaa', 'bbb', 'et2'))
+        self.assertFalse(self.graph.has_edge('bbb', 'aaa', 'et2'))
+        self.assertRaises(Exception, self.graph.add_edge, 'bbb', 'ccc', 'et1')
+        self.assertRaises(Exception, self.graph.del_edge, 'aaa', 'bbb', 'et1')
+        self.assertRaises(Exception, self.graph.clear_snapshot)
+        self.assertRaises(Exception, self.graph.add_node, 'fff')
+        # a new snapshot from a frozen snapshot can be modified
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.assertFalse(self.graph.is_frozen())
+        self.graph.del_edge('aaa', 'bbb', 'et1')
+        self.graph.add_edge('ddd', 'eee', 'et1')
+        self.graph.add_node('fff')
+        self.assertListEqual(self.graph.successors('fff', 'et1', ssid0), [])
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['ccc'])
+        self.assertListEqual(self.graph.successors('aaa', 'et1', ssid0), ['bbb', 'ccc'])
+        diff = self.graph.diff_snapshots(ssid0, ssid1)
+        self.assertEqual(diff['et1'], ([('ddd', 'eee')], [('aaa', 'bbb')]))
+        # thaw
+        self.graph.thaw(ssid0)
+        self.assertFalse(self.graph.is_frozen(ssid0))
+        self.graph.add_edge('bbb', 'ccc', 'et1', ssid0)
+        self.assertListEqual(self.graph.successors('bbb', 'et1', ssid0), ['ccc'])
+        self.assertListEqual(self.graph.get_nodes_with_out_edge('et1', ssid0), ['ccc', 'aaa', 'bbb'])
+
+    def test_freeze_large_row(self):
+        nodes = ['n' + str(i) for i in range(100)]
+        self.graph.add_nodes(nodes)
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edges([('n0', node) for node in nodes[1:]], 'et1')
+        self.graph.freeze()
+        self.assertListEqual(self.graph.successors('n0', 'et1'), nodes[1:])
+        self.graph.thaw()
+        self.graph.del_edge('n0', 'n50', 'et1')
+        self.assertEqual(self.graph.degree_out('n0', 'et1'), 98)
+        self.assertListEqual(self.graph.predecessors('n50', 'et1'), [])
+
+    def test_save_load(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc', 1.5], {'k1': 1})
+        self.graph.set_node_prop('aaa', 'k2', [1,2,3])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge_type('et2', False)
+        self.graph.add_edges([('ccc', 'aaa'), ('aaa', 'bbb'), ('aaa', 1.5)], 'et1')
+        self.graph.add_edges([('aaa', 'bbb')], 'et2')
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.graph.del_edge('aaa', 'bbb', 'et1')
+        self.graph.freeze(ssid0)
+        fd, filepath = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.graph.save(filepath)
+            for use_mmap in [False, True]:
+                g = graph.Graph()
+                g.load(filepath, use_mmap)
+                self.assertListEqual(g.get_nodes(), ['aaa', 'bbb', 'ccc', 1.5])
+                self.assertEqual(g.get_node_prop(1.5, 'k1'), 1)
+                self.assertListEqual(g.get_node_prop('aaa', 'k2'), [1,2,3])
+                self.assertEqual(g.get_active_snapshot(), ssid1)
+                self.assertTrue(g.is_frozen(ssid0))
+                self.assertFalse(g.is_frozen(ssid1))
+                self.assertListEqual(g.successors('aaa', 'et1', ssid0), ['bbb', 1.5])
+                self.assertListEqual(g.successors('aaa', 'et1'), [1.5])
+                self.assertListEqual(g.predecessors('aaa', 'et1'), ['ccc'])
+                self.assertListEqual(g.successors('aaa', 'et2'), ['bbb'])
+                self.assertEqual(g.diff_snapshots(ssid0, ssid1), {'et1': ([], [('aaa', 'bbb')])})
+                # the snapshot that was not frozen can be modified
+                g.add_node('ddd')
+                g.add_edge('ddd', 'aaa', 'et1')
+                self.assertListEqual(g.predecessors('aaa', 'et1'), ['ccc', 'ddd'])
+                self.assertRaises(Exception, g.add_edge, 'ddd', 'aaa', 'et1', ssid0)
+                del g
+        finally:
+            os.remove(filepath)
+
+    def test_save_mmapped(self):
+        nodes = ['n' + str(i) for i in range(5000)]
+        self.graph.add_nodes(nodes)
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edges(list(zip(nodes[:-1], nodes[1:])), 'et1')
+        self.graph.freeze()
+        dirpath = tempfile.mkdtemp()
+        filepath = os.path.join(dirpath, 'graph.bin')
+        try:
+            self.graph.save(filepath)
+            g = graph.Graph()
+            g.load(filepath, True)
+            # save back to the file that is memory-mapped
+            g.save(filepath)
+            self.assertListEqual(g.successors('n4998', 'et1'), ['n4999'])
+            g.checkpoint(filepath)
+            g2 = graph.Graph()
+            g2.load(filepath, True)
+            self.assertListEqual(g2.predecessors('n1', 'et1'), ['n0'])
+            self.assertEqual(len(g2.get_nodes_with_out_edge('et1')), 4999)
+            self.assertListEqual(os.listdir(dirpath), ['graph.bin'])
+            del g, g2
+        finally:
+            shutil.rmtree(dirpath, ignore_errors = True)
+
+    def test_traverse(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc', 'ddd', 'eee'])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge_type('et2', False)
+        self.graph.add_edges([('aaa', 'bbb'), ('aaa', 'ccc'), ('ddd', 'ccc')], 'et1')
+        self.graph.add_edges([('ccc', 'eee'), ('bbb', 'ddd')], 'et2')
+        FWD, REV = graph.Graph.FWD, graph.Graph.REV
+        self.assertListEqual(self.graph.traverse(['aaa', 'ddd'], [('et1', FWD)]), ['bbb', 'ccc'])
+        self.assertListEqual(self.graph.traverse(['aaa', 'ddd'], [('et1', FWD), ('et2', FWD)]), 
+            ['ddd', 'eee'])
+        self.assertListEqual(self.graph.traverse(['ccc'], [('et1', REV), ('et1', FWD)]), 
+            ['bbb', 'ccc'])
+        self.assertListEqual(self.graph.traverse(['ccc'], [('et1', REV), ('et1', FWD, 
+            lambda node: node != 'ccc')]), ['bbb'])
+        nodes, offsets = self.graph.traverse(['ddd', 'aaa', 'eee'], [('et1', FWD)], True)
+        self.assertListEqual(nodes, ['ccc', 'bbb', 'ccc'])
+        self.assertListEqual(offsets, [0, 1, 3, 3])
+        self.assertRaises(Exception, self.graph.traverse, ['aaa'], [('et2', REV)])
+        self.assertRaises(Exception, self.graph.traverse, ['fff'], [('et1', FWD)])
+        self.graph.freeze()
+        self.assertListEqual(self.graph.traverse(['aaa', 'ddd'], [('et1', FWD), ('et2', FWD)]), 
+            ['ddd', 'eee'])
+
+    def test_delete_snapshot(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc'])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge('aaa', 'bbb', 'et1')
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.graph.add_edge('aaa', 'ccc', 'et1')
+        self.assertListEqual(self.graph.get_snapshots(), [ssid0, ssid1])
+        self.assertRaises(Exception, self.graph.delete_snapshot, ssid1)
+        self.graph.delete_snapshot(ssid0)
+        self.assertListEqual(self.graph.get_snapshots(), [ssid1])
+        self.assertRaises(Exception, self.graph.set_active_snapshot, ssid0)
+        self.assertRaises(Exception, self.graph.delete_snapshot, ssid0)
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb', 'ccc'])
+
+    def test_snapshot_size(self):
+        nodes = ['n' + str(i) for i in range(100)]
+        self.graph.add_nodes(nodes)
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edges([(node, 'n0') for node in nodes[1:]], 'et1')
+        ssid0 = self.graph.get_active_snapshot()
+        size0 = self.graph.get_snapshot_size()
+        self.assertTrue(size0 > 0)
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.assertEqual(self.graph.get_snapshot_size(ssid1), size0)
+        self.assertTrue(self.graph.get_snapshot_size(ssid1, False) < 1000)
+        self.assertTrue(self.graph.get_snapshots_size() < size0 + 1000)
+        self.graph.del_edge('n1', 'n0', 'et1')
+        self.assertTrue(self.graph.get_snapshot_size(ssid1, False) > 1000)
+        self.graph.freeze(ssid0)
+        self.assertTrue(self.graph.get_snapshot_size(ssid0, False) < size0)
+
+    def test_snapshot_policy(self):
+        self.graph.add_nodes(['aaa', 'bbb'])
+        self.graph.add_edge_type('et1', True)
+        ssids = [self.graph.get_active_snapshot()]
+        for _ in range(4):
+            ssids.append(self.graph.new_snapshot(ssids[-1]))
+        self.graph.set_snapshot_policy(max_snapshots = 3)
+        self.assertListEqual(self.graph.get_snapshots(), ssids[2:])
+        # lru
+        self.graph.set_active_snapshot(ssids[2])
+        self.graph.set_snapshot_policy(max_snapshots = 2, lru = True)
+        self.assertListEqual(self.graph.get_snapshots(), [ssids[2], ssids[4]])
+        ssid5 = self.graph.new_snapshot(ssids[2])
+        self.assertListEqual(self.graph.get_snapshots(), [ssids[2], ssid5])
+        # bytes
+        self.graph.set_snapshot_policy(max_bytes = 0)
+        self.assertListEqual(self.graph.get_snapshots(), [ssid5])
+        self.graph.set_snapshot_policy()
+        self.graph.new_snapshot(ssid5)
+        self.assertEqual(len(self.graph.get_snapshots()), 2)
+
+    def test_spill_snapshot(self):
+        dirpath = tempfile.mkdtemp()
+        try:
+            self.graph.set_spill_policy(dirpath = dirpath)
+            self.graph.add_nodes(['aaa', 'bbb', 'ccc'])
+            self.graph.add_edge_type('et1', True)
+            self.graph.add_edge('aaa', 'bbb', 'et1')
+            ssid0 = self.graph.get_active_snapshot()
+            ssid1 = self.graph.new_snapshot(ssid0)
+            self.graph.add_edge('aaa', 'ccc', 'et1')
+            self.assertRaises(Exception, self.graph.spill_snapshot, ssid1)
+            self.graph.spill_snapshot(ssid0)
+            self.assertTrue(self.graph.is_spilled(ssid0))
+            self.assertEqual(len(os.listdir(dirpath)), 1)
+            # reload by reading
+            self.assertListEqual(self.graph.successors('aaa', 'et1', ssid0), ['bbb'])
+            self.assertFalse(self.graph.is_spilled(ssid0))
+            self.assertEqual(len(os.listdir(dirpath)), 0)
+            # reload by setting the active snapshot, then modify
+            self.graph.spill_snapshot(ssid0)
+            self.graph.set_active_snapshot(ssid0)
+            self.assertFalse(self.graph.is_spilled(ssid0))
+            self.graph.add_edge('bbb', 'ccc', 'et1')
+            self.assertListEqual(self.graph.successors('bbb', 'et1'), ['ccc'])
+            self.assertListEqual(self.graph.successors('bbb', 'et1', ssid1), [])
+            # delete a spilled snapshot
+            self.graph.spill_snapshot(ssid1)
+            self.graph.delete_snapshot(ssid1)
+            self.assertEqual(len(os.listdir(dirpath)), 0)
+        finally:
+            shutil.rmtree(dirpath)
+
+    def test_spill_policy(self):
+        self.graph.add_nodes(['aaa', 'bbb'])
+        self.graph.add_edge_type('et1', True)
+        ssids = [self.graph.get_active_snapshot()]
+        self.graph.set_spill_policy(max_resident = 2)
+        for i in range(4):
+            self.graph.del_edge('aaa', None, 'et1')
+            self.graph.add_edge('aaa', 'bbb' if i % 2 else 'aaa', 'et1')
+            ssids.append(self.graph.new_snapshot(ssids[-1]))
+        self.assertListEqual([self.graph.is_spilled(ssid) for ssid in ssids], 
+            [True, True, True, False, False])
+        self.graph.set_active_snapshot(ssids[1])
+        self.assertListEqual([self.graph.is_spilled(ssid) for ssid in ssids], 
+            [True, False, True, True, False])
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb'])
+        self.assertListEqual(self.graph.successors('aaa', 'et1', ssids[2]), ['aaa'])
+        self.assertEqual(self.graph.get_snapshot_size(ssids[0]), self.graph.get_snapshot_size(ssids[3]))
+        # save and load, with spilled snapshots
+        fd, filepath = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.graph.save(filepath)
+            self.assertTrue(self.graph.is_spilled(ssids[0]))
+            g = graph.Graph()
+            g.load(filepath)
+            self.assertListEqual(g.successors('aaa', 'et1', ssids[0]), ['aaa'])
+            self.assertListEqual(g.successors('aaa', 'et1', ssids[3]), ['bbb'])
+        finally:
+            os.remove(filepath)
+
+    def test_view(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc'])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge('aaa', 'bbb', 'et1')
+        view = self.graph.new_view()
+        self.graph.add_edge('aaa', 'ccc', 'et1')
+        self.graph.set_node_prop('bbb', 'p1', 1)
+        self.assertListEqual(view.successors('aaa', 'et1'), ['bbb'])
+        self.assertListEqual(view.predecessors('bbb', 'et1'), ['aaa'])
+        self.assertEqual(view.degree('aaa', 'et1'), 1)
+        self.assertEqual(view.get_node_prop('bbb', 'p1'), 1)
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb', 'ccc'])
+        self.assertRaises(AttributeError, getattr, view, 'add_edge')
+        self.assertRaises(Exception, self.graph.add_edge, 'bbb', 'ccc', 'et1', view.ssid)
+        self.assertRaises(Exception, self.graph.delete_snapshot, view.ssid)
+        # the pinned snapshot is not deleted by the retention policy
+        self.graph.set_snapshot_policy(max_snapshots = 1)
+        self.assertEqual(len(self.graph.get_snapshots()), 2)
+        self.graph.release_view(view)
+        self.assertListEqual(self.graph.get_snapshots(), [self.graph.get_active_snapshot()])
+        self.assertRaises(Exception, self.graph.release_view, view)
+
+    def test_concurrent(self):
+        nodes = ['n' + str(i) for i in range(100)]
+        self.graph.add_nodes(nodes)
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edges(list(zip(nodes, nodes[1:])), 'et1')
+        self.graph.set_concurrent(True)
+        self.assertTrue(self.graph.is_concurrent())
+        errors = []
+        def read():
+            view = self.graph.new_view()
+            for _ in range(20):
+                # every view is a chain of 100 nodes, whatever the writer does
+                if len(view.traverse(['n0'], [('et1', graph.Graph.FWD)] * 99)) != 1:
+                    errors.append(view.ssid)
+            self.graph.release_view(view)
+        def write():
+            for i in range(200):
+                node = nodes[i % 99]
+                next_node = nodes[i % 99 + 1]
+                self.graph.del_edge(node, next_node, 'et1')
+                self.graph.add_edge(node, next_node, 'et1')
+        threads = [threading.Thread(target = read) for _ in range(4)]
+        threads.append(threading.Thread(target = write))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual(errors, [])
+        self.assertListEqual(self.graph.get_snapshots(), [0])
+        self.graph.set_concurrent(False)
+        self.assertFalse(self.graph.is_concurrent())
+
+    def test_journal(self):
+        dirpath = tempfile.mkdtemp()
+        try:
+            journal = os.path.join(dirpath, 'journal')
+            self.graph.add_nodes(['aaa', 'bbb'])
+            self.graph.add_edge_type('et1', True)
+            self.graph.add_edge('aaa', 'bbb', 'et1')
+            base = os.path.join(dirpath, 'base')
+            self.graph.checkpoint(base)
+            self.graph.start_journal(journal)
+            self.graph.add_node('ccc')
+            self.graph.add_nodes(['ddd', 'eee'], {'p1': 1})
+            self.graph.set_node_prop('ccc', 'p1', [2, 'x'])
+            self.graph.add_edge_type('et2', False)
+            self.graph.add_edges([('aaa', 'ccc'), ('bbb', 'ccc')], 'et1')
+            ssid0 = self.graph.get_active_snapshot()
+            ssid1 = self.graph.new_snapshot(ssid0)
+            self.graph.del_edge('aaa', 'bbb', 'et1')
+            self.graph.del_edge(None, 'ccc', 'et1')
+            self.graph.set_successors('ddd', ['aaa', 'eee'], 'et2')
+            self.graph.set_active_snapshot(ssid0)
+            self.graph.freeze(ssid1)
+            self.graph.flush_journal()
+            # replay onto the base
+            g = graph.Graph()
+            g.load(base)
+            offset = g.replay_journal(journal)
+            self.assertEqual(offset, os.path.getsize(journal))
+            self.assertEqual(g.to_string(), self.graph.to_string())
+            self.assertEqual(g.get_node_prop('eee', 'p1'), 1)
+            self.assertListEqual(g.get_node_prop('ccc', 'p1'), [2, 'x'])
+            self.assertTrue(g.is_frozen(ssid1))
+            # follow the journal from the offset
+            self.graph.thaw(ssid1)
+            self.graph.delete_snapshot(ssid1)
+            self.graph.stop_journal()
+            self.assertGreater(g.replay_journal(journal, offset), offset)
+            self.assertListEqual(g.get_snapshots(), [ssid0])
+            # the journal does not match
+            self.assertRaises(Exception, g.replay_journal, journal)
+            # an incomplete record at the end is ignored
+            with open(journal, 'ab') as f:
+                f.write(b'\x05\x10\x00')
+            g = graph.Graph()
+            g.load(base)
+            g.replay_journal(journal)
+            self.assertEqual(g.to_string(), self.graph.to_string())
+        finally:
+            shutil.rmtree(dirpath)
+
+    def test_nodes_view(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc'])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edges([('aaa', 'bbb'), ('aaa', 'ccc')], 'et1')
+        view = self.graph.successors_view('aaa', 'et1')
+        self.assertEqual(len(view), 2)
+        self.assertListEqual(list(view), ['bbb', 'ccc'])
+        self.assertEqual(view[1], 'ccc')
+        self.assertTrue('bbb' in view)
+        self.assertFalse('aaa' in view)
+        self.assertFalse('zzz' in view)
+        self.assertListEqual(list(self.graph.predecessors_view('ccc', 'et1')), ['aaa'])
+        self.assertEqual(len(self.graph.successors_view('bbb', 'et1')), 0)
+        self.assertListEqual(list(self.graph.nodes_view()), ['aaa', 'bbb', 'ccc'])
+        self.assertTrue('ccc' in self.graph.nodes_view())
+        self.assertEqual(self.graph.num_nodes(), 3)
+        view = self.graph.nodes_with_in_edge_view('et1')
+        self.assertListEqual(list(view), ['bbb', 'ccc'])
+        self.assertEqual(view[0], 'bbb')
+        self.assertEqual(view[-1], 'ccc')
+        self.assertRaises(IndexError, view.__getitem__, 2)
+        self.assertEqual(self.graph.count_nodes_with_out_edge('et1'), 1)
+        self.assertEqual(self.graph.count_nodes_with_in_edge('et1'), 2)
+        self.assertTrue(self.graph.has_out_edge('aaa', 'et1'))
+        self.assertFalse(self.graph.has_in_edge('aaa', 'et1'))
+        # frozen
+        self.graph.freeze()
+        self.assertListEqual(list(self.graph.successors_view('aaa', 'et1')), ['bbb', 'ccc'])
+        self.assertListEqual(list(self.graph.nodes_with_out_edge_view('et1')), ['aaa'])
+        self.assertEqual(self.graph.successors_view('aaa', 'et1')[1], 'ccc')
+        view = self.graph.nodes_with_in_edge_view('et1')
+        self.assertEqual(view[1], 'ccc')
+        self.assertEqual(view[-2], 'bbb')
+        self.assertTrue(self.graph.has_in_edge('ccc', 'et1'))
+
+    def test_del_nodes(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc', 'ddd'])
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edge_type('et2', False)
+        self.graph.add_edges([('aaa', 'bbb'), ('aaa', 'ccc'), ('ccc', 'bbb')], 'et1')
+        self.graph.add_edges([('aaa', 'bbb'), ('ddd', 'bbb'), ('bbb', 'ccc')], 'et2')
+        ssid0 = self.graph.get_active_snapshot()
+        self.graph.new_snapshot(ssid0)
+        self.graph.del_nodes(['bbb', 'ddd'])
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['ccc'])
+        self.assertListEqual(self.graph.predecessors('bbb', 'et1'), [])
+        self.assertListEqual(self.graph.successors('ccc', 'et1'), [])
+        self.assertListEqual(self.graph.successors('aaa', 'et2'), [])
+        self.assertListEqual(self.graph.successors('bbb', 'et2'), [])
+        self.assertTrue(self.graph.has_node('bbb'))
+        # the old snapshot is unchanged
+        self.assertListEqual(self.graph.predecessors('bbb', 'et1', ssid0), ['aaa', 'ccc'])
+        self.assertListEqual(self.graph.successors('ddd', 'et2', ssid0), ['bbb'])
+        self.graph.freeze(ssid0)
+        self.assertRaises(Exception, self.graph.del_node, 'aaa', ssid0)
+        self.assertRaises(Exception, self.graph.del_node, 'zzz')
+
+    def test_compact(self):
+        self.graph.add_nodes(['aaa', 'bbb', 'ccc', 'ddd', 'eee'])
+        self.graph.set_node_prop('ccc', 'p', 3)
+        self.graph.set_node_prop('ddd', 'p', 4)
+        self.graph.add_edge_type('et1', True)
+        self.graph.add_edges([('aaa', 'bbb'), ('aaa', 'ccc'), ('ccc', 'ddd')], 'et1')
+        ssid0 = self.graph.get_active_snapshot()
+        self.graph.freeze(ssid0)
+        self.graph.new_snapshot(ssid0)
+        self.graph.del_node('bbb')
+        # bbb is still used in the frozen snapshot
+        new_ids = self.graph.compact(['eee'])
+        self.assertListEqual(new_ids, [0, 1, 2, 3, 4])
+        self.assertListEqual(self.graph.successors('aaa', 'et1', ssid0), ['bbb', 'ccc'])
+        self.assertTrue(self.graph.is_frozen(ssid0))
+        self.graph.delete_snapshot(ssid0)
+        new_ids = self.graph.compact(None, {'ccc': 'bbb', 'ddd': 'ccc'})
+        self.assertListEqual(new_ids, [0, -1, 1, 2, -1])
+        self.assertListEqual(self.graph.get_nodes(), ['aaa', 'bbb', 'ccc'])
+        self.assertListEqual(self.graph.successors('aaa', 'et1'), ['bbb'])
+        self.assertListEqual(self.graph.predecessors('ccc', 'et1'), ['bbb'])
+        self.assertEqual(self.graph.get_node_prop('ccc', 'p'), 4)
+        self.assertEqual(self.graph.get_node_id('ccc'), 2)
+        self.assertRaises(Exception, self.graph.compact, None, {'aaa': 'bbb'})
+
+    def test_counters(self):
+        self.assertEqual(self.graph.reserve_ids('c1'), 0)
+        self.assertEqual(self.graph.reserve_ids('c1', 10), 1)
+        self.assertEqual(self.graph.reserve_ids('c2', 5), 0)
+        self.assertEqual(self.graph.get_counter('c1'), 11)
+        self.assertEqual(self.graph.get_counter('c3'), 0)
+        # counters do not depend on the snapshot
+        ssid0 = self.graph.get_active_snapshot()
+        self.graph.new_snapshot(ssid0)
+        self.assertEqual(self.graph.reserve_ids('c1'), 11)
+        self.graph.set_active_snapshot(ssid0)
+        self.assertEqual(self.graph.reserve_ids('c1'), 12)
+        dirpath = tempfile.mkdtemp()
+        try:
+            base = os.path.join(dirpath, 'base')
+            journal = os.path.join(dirpath, 'journal')
+            self.graph.save(base)
+            self.graph.start_journal(journal)
+            self.graph.reserve_ids('c2', 3)
+            self.graph.set_counter('c3', 7)
+            self.graph.stop_journal()
+            g = graph.Graph()
+            g.load(base)
+            self.assertEqual(g.get_counter('c1'), 13)
+            g.replay_journal(journal)
+            self.assertEqual(g.get_counter('c2'), 8)
+            self.assertEqual(g.get_counter('c3'), 7)
+        finally:
+            shutil.rmtree(dirpath)
+
+    def test_tables(self):
+        ids = self.graph.add_nodes(['a', 'b', 'c', 'd'])
+        self.graph.add_table('xyz', 3)
+        self.assertTrue(self.graph.has_table('xyz'))
+        self.assertRaises(Exception, self.graph.add_table, 'xyz', 3)
+        self.assertRaises(Exception, self.graph.get_table_row, ids[0], 'uvw')
+        self.graph.set_table_rows(ids[:3], [[0,0,0], [1,0,0], [1,1,0]], 'xyz')
+        self.graph.set_table_row(ids[1], [1,2,3], 'xyz')
+        self.assertRaises(Exception, self.graph.set_table_row, ids[0], [1,2], 'xyz')
+        self.assertListEqual(self.graph.get_table_row(ids[1], 'xyz'), [1,2,3])
+        self.assertIsNone(self.graph.get_table_row(ids[3], 'xyz'))
+        self.assertListEqual(self.graph.get_table_rows(ids, 'xyz'), 
+            [[0,0,0], [1,2,3], [1,1,0], None])
+        self.assertListEqual(self.graph.get_table_node_ids('xyz'), ids[:3])
+        # tables are copied on write by snapshots
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.assertListEqual(self.graph.diff_table('xyz', ssid0, ssid1), [])
+        self.graph.set_table_row(ids[3], [5,5,5], 'xyz')
+        self.graph.del_table_row(ids[0], 'xyz')
+        self.assertListEqual(self.graph.get_table_node_ids('xyz'), ids[1:])
+        self.assertListEqual(self.graph.get_table_node_ids('xyz', ssid0), ids[:3])
+        self.assertListEqual(self.graph.diff_table('xyz', ssid0, ssid1), ['a', 'd'])
+        self.graph.del_node('b')
+        self.assertIsNone(self.graph.get_table_row(ids[1], 'xyz'))
+        self.assertListEqual(self.graph.get_table_row(ids[1], 'xyz', ssid0), [1,2,3])
+        # save, load and journal
+        dirpath = tempfile.mkdtemp()
+        try:
+            base = os.path.join(dirpath, 'base')
+            journal = os.path.join(dirpath, 'journal')
+            self.graph.save(base)
+            self.graph.start_journal(journal)
+            self.graph.add_table('uv', 2, 'f')
+            self.graph.set_table_rows(ids[2:], [[0.5,0.5], [1,1]], 'uv')
+            self.graph.set_table_row(ids[2], [7,8,9], 'xyz')
+            self.graph.stop_journal()
+            g = graph.Graph()
+            g.load(base)
+            self.assertListEqual(g.get_table_rows(ids, 'xyz'), [None, None, [1,1,0], [5,5,5]])
+            self.assertListEqual(g.get_table_rows(ids, 'xyz', ssid0), 
+                [[0,0,0], [1,2,3], [1,1,0], None])
+            g.replay_journal(journal)
+            self.assertListEqual(g.get_table_row(ids[2], 'xyz'), [7,8,9])
+            self.assertListEqual(g.get_table_row(ids[3], 'uv'), [1,1])
+        finally:
+            shutil.rmtree(dirpath)
+        # compact moves the rows
+        self.graph.delete_snapshot(ssid0)
+        self.graph.add_edge_type('e1', False)
+        self.graph.add_edge('c', 'd', 'e1')
+        new_ids = self.graph.compact()
+        self.assertEqual(new_ids[ids[1]], -1)
+        self.assertListEqual(self.graph.get_table_row(new_ids[ids[2]], 'xyz'), [7,8,9])
+        self.assertListEqual(self.graph.get_table_row(new_ids[ids[3]], 'xyz'), [5,5,5])
+
+    def test_table_pages(self):
+        ids = self.graph.add_nodes(['n' + str(i) for i in range(5000)])
+        self.graph.add_table('xyz', 3)
+        self.graph.set_table_rows(ids, [[i, 0, 0] for i in ids], 'xyz')
+        self.graph.set_table_rows(ids[::7], [[i, 1, 0] for i in ids[::7]], 'xyz')
+        self.assertListEqual(self.graph.get_table_row(ids[4998], 'xyz'), [4998, 1, 0])
+        # only the page that is modified is copied
+        ssid0 = self.graph.get_active_snapshot()
+        ssid1 = self.graph.new_snapshot(ssid0)
+        self.graph.set_active_snapshot(ssid1)
+        self.graph.set_table_row(ids[2000], [0, 0, 1], 'xyz')
+        self.assertLess(self.graph.get_snapshot_size(ssid1, False), 
+            self.graph.get_snapshot_size(ssid1) / 4)
+        self.assertListEqual(self.graph.diff_table('xyz', ssid0, ssid1), ['n2000'])
+        self.assertListEqual(self.graph.get_table_row(ids[2000], 'xyz', ssid0), [2000, 0, 0])
+        # the pages stay shared after save and load
+        dirpath = tempfile.mkdtemp()
+        try:
+            filepath = os.path.join(dirpath, 'graph.bin')
+            self.graph.save(filepath)
+            g = graph.Graph()
+            g.load(filepath)
+        finally:
+            shutil.rmtree(dirpath)
+        self.assertListEqual(g.get_table_rows(ids[1999:2002], 'xyz'), 
+            [[1999, 0, 0], [0, 0, 1], [2001, 0, 0]])
+        self.assertListEqual(g.diff_table('xyz', ssid0, ssid1), ['n2000'])
+        self.assertLess(g.get_snapshot_size(ssid1, False), g.get_snapshot_size(ssid1) / 4)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
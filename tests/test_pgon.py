@@ -74,5 +74,16 @@ class TestPolygons(unittest.TestCase):
         pgon = self.model.get_ents(ENT_TYPE.PGON, colls[0])
         self.assertEqual(list(pgon), ['pg0'])
 
+    def test_posis_to_ents(self):
+        point = self.model.add_point('ps0')
+        pgon2 = self.model.add_pgon(['ps2', 'ps1', self.model.add_posi([0,0,0])])
+        posis = self.model.get_ents(ENT_TYPE.POSI)
+        self.assertEqual(self.model.get_ents(ENT_TYPE.PGON, posis), ['pg0', pgon2])
+        self.assertEqual(self.model.get_ents(ENT_TYPE.POINT, posis), [point])
+        self.assertEqual(self.model.get_ents(ENT_TYPE.EDGE, '_v3'), [])
+        self.assertEqual(self.model.get_ents(ENT_TYPE.POINT, '_v0'), [])
+        self.assertEqual(self.model.get_ents(ENT_TYPE.POSI, [pgon2, 'pg0', 'co0']), 
+            ['ps2', 'ps1', 'ps3', 'ps0'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -51,6 +51,10 @@ class TestAttribs(unittest.TestCase):
         self.assertEqual(list(result), [])
         result = self.model.query(ENT_TYPE.POINT, 'some_number', '<=', 60)
         self.assertEqual(list(result), ['pt1'])
+        self.model.set_attrib_val('pt2', 'some_number', 10)
+        self.model.set_attrib_val('pt0', 'some_number', 20)
+        result = self.model.query(ENT_TYPE.POINT, 'some_number', '<', 50)
+        self.assertEqual(list(result), ['pt0', 'pt2'])
 
         
     def test_query_none(self):
@@ -66,6 +70,9 @@ class TestAttribs(unittest.TestCase):
         result = self.model.query(ENT_TYPE.POINT, 'some_number', '==', None)
         result.sort()
         self.assertEqual(list(result), ['pt0', 'pt2'])
+    def test_iter_ents(self):
+        self.assertEqual(list(self.model.iter_ents(ENT_TYPE.POINT)), ['pt0', 'pt1', 'pt2'])
+        self.assertEqual(list(self.model.iter_ents(ENT_TYPE.PGON)), [])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
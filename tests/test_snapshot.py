@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+ENT_TYPE = sim.ENT_TYPE
+DATA_TYPE = sim.DATA_TYPE
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        m = sim.SIM()
+        posis = [m.add_posi([0,0,0]), m.add_posi([1,0,0]), m.add_posi([1,1,0])]
+        m.add_pgon(posis)
+        m.add_attrib(ENT_TYPE.PGON, 'area', DATA_TYPE.NUM)
+        m.set_attrib_val('pg0', 'area', 0.5)
+        self.model = m
+
+    def test_new_snapshot(self):
+        ssid0 = self.model.get_active_snapshot()
+        ssid1 = self.model.new_snapshot()
+        self.assertEqual(self.model.get_active_snapshot(), ssid1)
+        self.model.add_point(self.model.add_posi([5,5,5]))
+        self.assertEqual(self.model.num_ents(ENT_TYPE.POINT), 1)
+        self.model.set_active_snapshot(ssid0)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.POINT), 0)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.PGON), 1)
+
+    def test_diff_snapshots(self):
+        ssid0 = self.model.get_active_snapshot()
+        ssid1 = self.model.new_snapshot()
+        point = self.model.add_point('ps2')
+        self.model.set_attrib_val('pg0', 'area', 0.75)
+        self.model.set_posi_coords('ps0', [0,0,1])
+        diff = self.model.diff_snapshots(ssid0, ssid1)
+        self.assertListEqual(diff['created'], ['_v3', point])
+        self.assertListEqual(diff['deleted'], [])
+        self.assertListEqual(sorted(diff['reattributed']), ['pg0', 'ps0'])
+        diff = self.model.diff_snapshots(ssid1, ssid0)
+        self.assertListEqual(diff['deleted'], ['_v3', point])
+
+    def test_frozen_reads(self):
+        self.model.graph.freeze()
+        self.assertEqual(self.model.num_ents(ENT_TYPE.PGON), 1)
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, 'pg0'), ['ps0', 'ps1', 'ps2'])
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.PGON, 'ps1'), ['pg0'])
+        self.assertEqual(self.model.get_attrib_val('pg0', 'area'), 0.5)
+        self.assertListEqual(self.model.get_posi_coords('ps2'), [1,1,0])
+        self.assertListEqual(self.model.query(ENT_TYPE.PGON, 'area', '==', 0.5), ['pg0'])
+        self.assertRaises(Exception, self.model.add_posi, [5,5,5])
+        self.model.graph.thaw()
+        self.model.add_posi([5,5,5])
+        self.assertEqual(self.model.num_ents(ENT_TYPE.POSI), 4)
+
+    def test_delete_snapshot(self):
+        ssid0 = self.model.get_active_snapshot()
+        ssid1 = self.model.new_snapshot()
+        self.model.set_attrib_val('pg0', 'area', 0.75)
+        self.assertRaises(Exception, self.model.delete_snapshot, ssid1)
+        self.model.delete_snapshot(ssid0)
+        self.assertRaises(Exception, self.model.set_active_snapshot, ssid0)
+        self.assertEqual(self.model.get_attrib_val('pg0', 'area'), 0.75)
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, 'pg0'), ['ps0', 'ps1', 'ps2'])
+
+    def test_new_ent_names(self):
+        ssid0 = self.model.get_active_snapshot()
+        self.model.new_snapshot()
+        point0 = self.model.add_point('ps0')
+        self.model.set_active_snapshot(ssid0)
+        point1 = self.model.add_point('ps1')
+        self.assertNotEqual(point0, point1)
+        self.assertListEqual(self.model.get_ents(ENT_TYPE.POSI, point1), ['ps1'])
+
+    def test_view(self):
+        view = self.model.new_view()
+        self.model.set_attrib_val('pg0', 'area', 0.75)
+        self.model.add_point('ps2')
+        self.assertEqual(view.get_attrib_val('pg0', 'area'), 0.5)
+        self.assertEqual(view.num_ents(ENT_TYPE.POINT), 0)
+        self.assertListEqual(view.get_ents(ENT_TYPE.POSI, 'pg0'), ['ps0', 'ps1', 'ps2'])
+        self.assertRaises(Exception, view.add_posi, [5,5,5])
+        self.model.release_view(view)
+        self.assertEqual(self.model.num_ents(ENT_TYPE.POINT), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+from sim_model import spatial
+ENT_TYPE = sim.ENT_TYPE
+
+class TestSpatial(unittest.TestCase):
+
+    def setUp(self):
+        # a 10 x 10 grid of posis, and a pgon at each corner
+        m = sim.SIM()
+        m.add_posis([[x, y, 0] for y in range(10) for x in range(10)])
+        m.add_pgon(['ps0', 'ps1', 'ps11'])
+        m.add_pgon(['ps88', 'ps89', 'ps99'])
+        self.model = m
+
+    def test_query_bbox(self):
+        m = self.model
+        self.assertListEqual(m.query_bbox(ENT_TYPE.POSI, [[1.5,1.5,-1], [3,2,1]]),
+            ['ps22', 'ps23'])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.PGON, [[-1,-1,-1], [0.5,0.5,1]]), ['pg0'])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.PGON, [[4,4,4], [5,5,5]]), [])
+
+    def test_query_bbox_objects(self):
+        m = self.model
+        # objects that cover the box, with no posis inside the box
+        big = m.add_pgon(['ps0', 'ps9', 'ps99', 'ps90'])
+        diagonal = m.add_pline(['ps11', 'ps88'], False)
+        coll = m.add_coll()
+        m.add_coll_ent(coll, diagonal)
+        box = [[4.1,4.1,-1], [4.9,4.9,1]]
+        self.assertListEqual(m.query_bbox(ENT_TYPE.POSI, box), [])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.PGON, box), [big])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.PLINE, box), [diagonal])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.COLL, box), [coll])
+        # the bboxes are updated when the posis move
+        m.move(diagonal, [0,0,5])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.PLINE, box), [])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.COLL, [[4,4,4], [5,5,5]]), [coll])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.PGON, box), [big])
+
+    def test_nearest_posis(self):
+        m = self.model
+        self.assertListEqual(m.nearest_posis([0.1,0.2,0]), ['ps0'])
+        self.assertListEqual(m.nearest_posis([4.6,5,0], 3), ['ps55', 'ps54', 'ps45'])
+        self.assertListEqual(m.nearest_posis([100,100,100], 2), ['ps99', 'ps89'])
+        self.assertEqual(len(m.nearest_posis([0,0,0], 1000)), 100)
+
+    def test_query_radius(self):
+        m = self.model
+        self.assertListEqual(m.query_radius([5,5,0], 1), ['ps45', 'ps54', 'ps55', 'ps56', 'ps65'])
+        self.assertListEqual(m.query_radius([5,5,5], 1), [])
+
+    def test_update(self):
+        m = self.model
+        self.assertListEqual(m.nearest_posis([20,20,0]), ['ps99'])
+        # moved, added and deleted posis are updated
+        m.move('pg0', [20,20,0])
+        self.assertListEqual(m.nearest_posis([20,20,0]), ['ps0'])
+        posi = m.add_posi([-5,-5,0])
+        copies = m.copy_ents(['pg1'], [-20,-20,0])
+        self.assertListEqual(m.nearest_posis([-5,-5,0]), [posi])
+        self.assertListEqual(m.query_bbox(ENT_TYPE.PGON, [[-20,-20,-1], [-10,-10,1]]), copies)
+        m.del_ents(['pg0'], del_posis = True)
+        self.assertListEqual(m.nearest_posis([20,20,0]), ['ps99'])
+        # snapshots
+        ssid = m.get_active_snapshot()
+        m.new_snapshot()
+        m.set_posi_coords('ps2', [50,50,50])
+        self.assertListEqual(m.nearest_posis([50,50,50]), ['ps2'])
+        m.set_active_snapshot(ssid)
+        self.assertListEqual(m.nearest_posis([50,50,50]), ['ps99'])
+
+    def test_grid(self):
+        grid = spatial.Grid(2)
+        grid.update([0, 1, 2], [[0,0,0], [1,1,1], [5,5,5]])
+        self.assertEqual(len(grid), 3)
+        grid.update([0, 2], [None, [1,1,1.5]])
+        self.assertNotIn(0, grid)
+        self.assertListEqual(grid.nearest([1,1,2], 2), [(0.5, 2), (1.0, 1)])
+        self.assertListEqual(sorted(grid.query_box([0,0,0], [1,1,1.5])), [1, 2])
+        self.assertRaises(Exception, spatial.Grid, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+from sim_model import triangulate
+ENT_TYPE = sim.ENT_TYPE
+
+def tris_area(model, tris):
+    # the signed area of triangles in the xy plane
+    area = 0
+    for tri in tris:
+        (ax, ay, _), (bx, by, _), (cx, cy, _) = model.get_posis_coords(tri)
+        area += ((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+    return area
+
+def cached_tris(model, pgon):
+    # the cached triangles of a pgon in the active snapshot, or None
+    cache = model._tris.get(model.get_active_snapshot(), {})
+    return cache.get(model.graph.get_node_id(pgon))
+
+class TestTri(unittest.TestCase):
+
+    def setUp(self):
+        m = sim.SIM()
+        square = m.add_posis([[0,0,0], [10,0,0], [10,10,0], [0,10,0]])
+        hole0 = m.add_posis([[2,2,0], [2,4,0], [4,4,0], [4,2,0]])
+        hole1 = m.add_posis([[6,6,0], [8,6,0], [7,8,0]])
+        m.add_pgon(square)
+        m.add_pgon([square, hole0, hole1])
+        self.model = m
+
+    def test_square(self):
+        tris = self.model.get_pgon_tris('pg0')
+        self.assertEqual(len(tris), 2)
+        self.assertAlmostEqual(tris_area(self.model, tris), 100)
+
+    def test_holes(self):
+        tris = self.model.get_pgon_tris('pg1')
+        self.assertEqual(len(tris), 11 + 2 * 2 - 2)
+        self.assertAlmostEqual(tris_area(self.model, tris), 100 - 4 - 2)
+
+    def test_concave(self):
+        m = self.model
+        posis = m.add_posis([[0,0,0], [4,0,0], [4,4,0], [2,1,0], [0,4,0]])
+        tris = m.get_pgon_tris(m.add_pgon(posis))
+        self.assertEqual(len(tris), 3)
+        self.assertAlmostEqual(tris_area(m, tris), 10)
+        # the reflex position is not an ear
+        self.assertNotIn([posis[2], posis[3], posis[4]], tris)
+
+    def test_orientation(self):
+        m = self.model
+        # a clockwise square, in the xy plane
+        tris = m.get_pgon_tris(m.add_pgon(m.add_posis([[0,0,0], [0,1,0], [1,1,0], [1,0,0]])))
+        self.assertAlmostEqual(tris_area(m, tris), -1)
+        # a vertical square in the yz plane and a vertical square in the xz plane
+        tris = triangulate.triangulate([[[0,0,0], [0,1,0], [0,1,1], [0,0,1]]])
+        self.assertEqual(len(tris), 6)
+        tris = triangulate.triangulate([[[0,0,0], [1,0,0], [1,0,1], [0,0,1]]])
+        self.assertEqual(len(tris), 6)
+        # a degenerate pgon has no triangles
+        self.assertListEqual(triangulate.triangulate([[[0,0,0], [1,0,0], [2,0,0]]]), [])
+
+    def test_triangulate_pgons(self):
+        m = self.model
+        m.triangulate_pgons()
+        self.assertEqual(len(cached_tris(m, 'pg1')), 13 * 3)
+        # the triangles are stored as indexes, so moving posis keeps them valid
+        m.move('pg1', [0,0,5])
+        self.assertEqual(len(m.get_pgon_tris('pg1')), 13)
+        # adding a hole clears the triangles
+        m.add_pgon_hole('pg0', m.add_posis([[2,6,0], [4,6,0], [3,8,0]]))
+        self.assertIsNone(cached_tris(m, 'pg0'))
+        self.assertEqual(len(m.get_pgon_tris('pg0')), 7)
+        self.assertRaises(Exception, m.get_pgon_tris, 'ps0')
+
+    def test_cache(self):
+        m = self.model
+        self.assertEqual(m.triangulate_pgons(), 2)
+        self.assertEqual(m.triangulate_pgons(), 0)
+        # moving a posi of a hole only clears pg1
+        m.set_posi_coords('ps4', [3,3,0])
+        self.assertIsNotNone(cached_tris(m, 'pg0'))
+        self.assertIsNone(cached_tris(m, 'pg1'))
+        self.assertEqual(m.triangulate_pgons(), 1)
+        # transforms clear both pgons, posis that are not used by pgons clear nothing
+        m.move('ps0', [0,0,1])
+        self.assertEqual(m.triangulate_pgons(), 2)
+        m.set_posis_coords(m.add_posis([[0,0,0]]), [[1,1,1]])
+        self.assertEqual(m.triangulate_pgons(), 0)
+        # the index is rebuilt after compacting
+        m.compact()
+        m.set_attrib_val('ps8', 'xyz', [7,7,0])
+        self.assertEqual(m.triangulate_pgons(['pg0', 'pg1']), 1)
+
+    def test_workers(self):
+        m = self.model
+        for i in range(10):
+            m.copy_ents('pg1', [i * 20, 0, 0])
+        m.triangulate_pgons()
+        tris = [cached_tris(m, pgon) for pgon in m.get_ents(ENT_TYPE.PGON)]
+        m.move(m.get_ents(ENT_TYPE.PGON), [0,0,1])
+        self.assertEqual(m.triangulate_pgons(workers = 2), 12)
+        self.assertListEqual(
+            [cached_tris(m, pgon) for pgon in m.get_ents(ENT_TYPE.PGON)], tris)
+        # the cache still works
+        m.set_posi_coords('ps4', [2,2,0])
+        self.assertEqual(m.triangulate_pgons(workers = 2), 1)
+
+    def test_cache_snapshots(self):
+        m = self.model
+        m.triangulate_pgons()
+        ssid0 = m.get_active_snapshot()
+        ssid1 = m.new_snapshot()
+        m.add_pgon_hole('pg0', m.add_posis([[2,6,0], [4,6,0], [3,8,0]]))
+        m.scale('pg1', [0,0,0], 2)
+        self.assertEqual(m.triangulate_pgons(), 2)
+        self.assertEqual(len(m.get_pgon_tris('pg0')), 7)
+        # each snapshot keeps its own triangles, so switching snapshots clears nothing
+        m.set_active_snapshot(ssid0)
+        self.assertEqual(m.triangulate_pgons(), 0)
+        self.assertEqual(len(m.get_pgon_tris('pg0')), 2)
+        m.set_active_snapshot(ssid1)
+        self.assertEqual(m.triangulate_pgons(), 0)
+        self.assertEqual(len(m.get_pgon_tris('pg0')), 7)
+        # the cache is not stored in the graph
+        self.assertNotIn('tris', m.graph.get_node_prop_names('pg0'))
+        # changes in one snapshot do not clear the triangles of the other snapshot
+        m.move('pg0', [0,0,1])
+        self.assertIsNone(cached_tris(m, 'pg0'))
+        m.set_active_snapshot(ssid0)
+        self.assertIsNotNone(cached_tris(m, 'pg0'))
+        m.set_active_snapshot(ssid1)
+        # deleted snapshots are removed from the cache
+        m.delete_snapshot(ssid0)
+        self.assertNotIn(ssid0, m._tris)
+        # views do not use the cache
+        view = m.new_view()
+        m.set_posi_coords('ps0', [1,1,0])
+        self.assertEqual(len(view.get_pgon_tris('pg0')), 7)
+        self.assertEqual(view.triangulate_pgons(), 2)
+        m.release_view(view)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+ENT_TYPE = sim.ENT_TYPE
+DATA_TYPE = sim.DATA_TYPE
+
+class TestWeld(unittest.TestCase):
+
+    def setUp(self):
+        # two triangles that share an edge, with one posi for each corner
+        m = sim.SIM()
+        m.add_posis([[0,0,0], [1,0,0], [0,1,0], [1,0,0.00001], [1,1,0], [0,1,0]])
+        m.add_pgon(['ps0', 'ps1', 'ps2'])
+        m.add_pgon(['ps3', 'ps4', 'ps5'])
+        m.add_attrib(ENT_TYPE.POSI, 'w', DATA_TYPE.NUM)
+        m.set_attrib_val('ps5', 'w', 1)
+        self.model = m
+
+    def test_weld_posis(self):
+        m = self.model
+        self.assertEqual(m.weld_posis(), 1)
+        self.assertListEqual(m.get_ents(ENT_TYPE.POSI), ['ps0', 'ps1', 'ps2', 'ps3', 'ps4'])
+        self.assertListEqual(m.get_ent_posis('pg1'), [['ps3', 'ps4', 'ps2']])
+        self.assertListEqual(m.get_ents(ENT_TYPE.PGON, 'ps2'), ['pg0', 'pg1'])
+        self.assertIsNone(m.get_attrib_val('ps5', 'w'))
+        self.assertEqual(m.weld_posis(), 0)
+        self.assertEqual(m.weld_posis(tolerance = 0.001), 1)
+        self.assertListEqual(m.get_ent_posis('pg1'), [['ps1', 'ps4', 'ps2']])
+        self.assertListEqual(m.get_ents(ENT_TYPE.POSI, 'ps1'), ['ps1'])
+        self.assertEqual(len(m.get_ents(ENT_TYPE.VERT, 'ps1')), 2)
+
+    def test_weld_exact(self):
+        m = self.model
+        # only the posis in the list are welded
+        self.assertEqual(m.weld_posis(['ps1', 'ps3', 'ps4'], 0.001), 1)
+        self.assertListEqual(m.get_ent_posis('pg1'), [['ps1', 'ps4', 'ps5']])
+        self.assertEqual(m.weld_posis(tolerance = 0), 1)
+        self.assertListEqual(m.get_ent_posis('pg1'), [['ps1', 'ps4', 'ps2']])
+
+    def test_weld_tris(self):
+        m = self.model
+        m.triangulate_pgons()
+        m.weld_posis(tolerance = 0.001)
+        self.assertIn(m.graph.get_node_id('pg0'), m._tris[m.get_active_snapshot()])
+        self.assertNotIn(m.graph.get_node_id('pg1'), m._tris[m.get_active_snapshot()])
+        self.assertListEqual(sorted(m.get_pgon_tris('pg1')[0]), ['ps1', 'ps2', 'ps4'])
+
+if __name__ == '__main__':
+    unittest.main()
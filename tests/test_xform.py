@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+# from __future__ import unicode_literals
+import unittest
+import math
+import sys, os
+sys.path.insert(0, os.path.abspath('..'))
+from sim_model import sim
+ENT_TYPE = sim.ENT_TYPE
+DATA_TYPE = sim.DATA_TYPE
+
+class TestXform(unittest.TestCase):
+
+    def setUp(self):
+        m = sim.SIM()
+        m.add_posis([[0,0,0], [1,0,0], [1,1,0], [5,5,5]])
+        m.add_pgon(['ps0', 'ps1', 'ps2'])
+        m.add_pline(['ps1', 'ps2'], False)
+        self.model = m
+
+    def assertCoordsEqual(self, posis, coords):
+        for xyz, expected in zip(self.model.get_posis_coords(posis), coords):
+            for value, expected_value in zip(xyz, expected):
+                self.assertAlmostEqual(value, expected_value)
+
+    def test_xform_posis(self):
+        self.model.xform_posis(['pg0', 'pl0'], [[1,0,0,1], [0,1,0,2], [0,0,1,3], [0,0,0,1]])
+        self.assertCoordsEqual(['ps0', 'ps1', 'ps2', 'ps3'], [[1,2,3], [2,2,3], [2,3,3], [5,5,5]])
+        self.model.xform_posis('ps3', [[2,0,0,0], [0,2,0,0], [0,0,2,0], [0,0,0,2]])
+        self.assertCoordsEqual(['ps3'], [[5,5,5]])
+        self.assertRaises(Exception, self.model.xform_posis, 'ps3', [[1,0,0], [0,1,0], [0,0,1]])
+
+    def test_move(self):
+        self.model.move('pg0', [0,0,10])
+        self.assertCoordsEqual(['ps0', 'ps1', 'ps3'], [[0,0,10], [1,0,10], [5,5,5]])
+
+    def test_rotate(self):
+        self.model.rotate('pg0', [1,0,0], [0,0,1], math.pi / 2)
+        self.assertCoordsEqual(['ps0', 'ps1', 'ps2'], [[1,-1,0], [1,0,0], [0,0,0]])
+
+    def test_scale(self):
+        self.model.scale('pg0', [1,1,0], 2)
+        self.assertCoordsEqual(['ps0', 'ps1', 'ps2'], [[-1,-1,0], [1,-1,0], [1,1,0]])
+        self.model.scale('ps3', [0,0,0], [1,2,3])
+        self.assertCoordsEqual(['ps3'], [[5,10,15]])
+
+    def test_mirror(self):
+        self.model.mirror('pg0', [0.5,0,0], [2,0,0])
+        self.assertCoordsEqual(['ps0', 'ps1', 'ps2'], [[1,0,0], [0,0,0], [0,1,0]])
+        self.assertRaises(Exception, self.model.mirror, 'pg0', [0,0,0], [0,0,0])
+
+if __name__ == '__main__':
+    unittest.main()